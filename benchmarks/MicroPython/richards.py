@@ -3,79 +3,102 @@
 #
 # The original license details are availble here:
 # http://web.archive.org/web/20050825101121/http://www.sunlabs.com/people/mario/java_benchmarking/index.html
-
-# This file itself, and its souce control history is however based on the
-# following. It is unclear whether this still bears any relevance since the
-# nature of the code was essentially reverted back to the Smalltalk version.
 #
-# Derived from http://pws.prserv.net/dlissett/ben/bench1.htm
-# Licensed CC BY-NC-SA 1.0
+# Generated by benchmarks/Python/bundle.py from richards.py for MicroPython. Do not edit.
+import sys
+from array import array
+from gc import mem_alloc, mem_free
+import utime
+
+
+class Benchmark:
+
+    def benchmark(self):
+        pass
+
+    def verify_result(self, result):
+        pass
+
+    def inner_benchmark_loop(self, inner_iterations):
+        for _ in range(inner_iterations):
+            if not self.verify_result(self.benchmark()):
+                return False
+        return True
+
 
 _NO_TASK = None
+
+
 _NO_WORK = None
 
+
 _IDLER = 0
+
+
 _WORKER = 1
+
+
 _HANDLER_A = 2
+
+
 _HANDLER_B = 3
+
+
 _DEVICE_A = 4
+
+
 _DEVICE_B = 5
 
+
 _NUM_TYPES = 6
 
+
 _DEVICE_PACKET_KIND = 0
+
+
 _WORK_PACKET_KIND = 1
 
+
 _DATA_SIZE = 4
 
+
 _TRACING = False
 
 
-class Richards():
+class Richards(Benchmark):
+
     def benchmark(self):
         return _Scheduler().start()
 
     def verify_result(self, result):
         return result
-    
-    def inner_benchmark_loop(self, inner_iterations):
-        for _ in range(inner_iterations):
-            if not self.verify_result(self.benchmark()):
-                return False
-        return True
 
 
 class _RBObject:
+
     @staticmethod
     def append(packet, queue_head):
         packet.link = _NO_WORK
         if _NO_WORK == queue_head:
             return packet
-
         mouse = queue_head
-
         while True:
             link = mouse.link
             if link == _NO_WORK:
                 break
             mouse = link
-
         mouse.link = packet
         return queue_head
 
 
 class _Scheduler(_RBObject):
+
     def __init__(self):
-        # init tracing
         self._layout = 0
-
-        # init scheduler
         self._task_list = _NO_TASK
         self._current_task = _NO_TASK
         self._current_task_identity = 0
-
         self._task_table = [_NO_TASK] * _NUM_TYPES
-
         self._queue_count = 0
         self._hold_count = 0
 
@@ -87,15 +110,12 @@ class _Scheduler(_RBObject):
                 function_work = data_record.pending
                 if _NO_WORK == function_work:
                     return self.mark_waiting()
-
                 data_record.pending = _NO_WORK
                 return self.queue_packet(function_work)
-
             data_record.pending = function_work
             if _TRACING:
                 self._trace(function_work.datum)
             return self._hold_self()
-
         self.create_task(identity, priority, work, state, data, fn)
 
     def create_handler(self, identity, priority, work, state):
@@ -107,25 +127,20 @@ class _Scheduler(_RBObject):
                     data_record.work_in_add(work_arg)
                 else:
                     data_record.device_in_add(work_arg)
-
             work_packet = data_record.work_in
             if _NO_WORK == work_packet:
                 return self.mark_waiting()
-
             count = work_packet.datum
             if count >= _DATA_SIZE:
                 data_record.work_in = work_packet.link
                 return self.queue_packet(work_packet)
-
             device_packet = data_record.device_in
             if _NO_WORK == device_packet:
                 return self.mark_waiting()
-
             data_record.device_in = device_packet.link
             device_packet.datum = work_packet.data[count]
             work_packet.datum = count + 1
             return self.queue_packet(device_packet)
-
         self.create_task(identity, priority, work, state, data, fn)
 
     def create_idler(self, identity, priority, work, state):
@@ -135,23 +150,18 @@ class _Scheduler(_RBObject):
             data_record.count = data_record.count - 1
             if 0 == data_record.count:
                 return self._hold_self()
-
-            if 0 == (data_record.control & 1):
+            if 0 == data_record.control & 1:
                 data_record.control = data_record.control // 2
                 return self.release(_DEVICE_A)
-
-            data_record.control = (data_record.control // 2) ^ 53_256
+            data_record.control = data_record.control // 2 ^ 53256
             return self.release(_DEVICE_B)
-
         self.create_task(identity, priority, work, state, data, fn)
 
     def create_packet(self, link, identity, kind):
         return _Packet(link, identity, kind)
 
     def create_task(self, identity, priority, work, state, data, fn):
-        t = _TaskControlBlock(
-            self._task_list, identity, priority, work, state, data, fn
-        )
+        t = _TaskControlBlock(self._task_list, identity, priority, work, state, data, fn)
         self._task_list = t
         self._task_table[identity] = t
 
@@ -161,11 +171,7 @@ class _Scheduler(_RBObject):
         def fn(work, data_record):
             if _NO_WORK == work:
                 return self.mark_waiting()
-
-            data_record.destination = (
-                _HANDLER_B if _HANDLER_A == data_record.destination else _HANDLER_A
-            )
-
+            data_record.destination = _HANDLER_B if _HANDLER_A == data_record.destination else _HANDLER_A
             work.identity = data_record.destination
             work.datum = 0
             for i in range(_DATA_SIZE):
@@ -173,42 +179,31 @@ class _Scheduler(_RBObject):
                 if data_record.count > 26:
                     data_record.count = 1
                 work.data[i] = 65 + data_record.count - 1
-
             return self.queue_packet(work)
-
         self.create_task(identity, priority, work, state, data, fn)
 
     def start(self):
         self.create_idler(_IDLER, 0, _NO_WORK, _TaskState.with_running())
         wkq = self.create_packet(_NO_WORK, _WORKER, _WORK_PACKET_KIND)
         wkq = self.create_packet(wkq, _WORKER, _WORK_PACKET_KIND)
-
         self.create_worker(_WORKER, 1000, wkq, _TaskState.with_waiting_with_packet())
         wkq = self.create_packet(_NO_WORK, _DEVICE_A, _DEVICE_PACKET_KIND)
         wkq = self.create_packet(wkq, _DEVICE_A, _DEVICE_PACKET_KIND)
         wkq = self.create_packet(wkq, _DEVICE_A, _DEVICE_PACKET_KIND)
-
-        self.create_handler(
-            _HANDLER_A, 2000, wkq, _TaskState.with_waiting_with_packet()
-        )
+        self.create_handler(_HANDLER_A, 2000, wkq, _TaskState.with_waiting_with_packet())
         wkq = self.create_packet(_NO_WORK, _DEVICE_B, _DEVICE_PACKET_KIND)
         wkq = self.create_packet(wkq, _DEVICE_B, _DEVICE_PACKET_KIND)
         wkq = self.create_packet(wkq, _DEVICE_B, _DEVICE_PACKET_KIND)
-
-        self.create_handler(
-            _HANDLER_B, 3000, wkq, _TaskState.with_waiting_with_packet()
-        )
+        self.create_handler(_HANDLER_B, 3000, wkq, _TaskState.with_waiting_with_packet())
         self.create_device(_DEVICE_A, 4000, _NO_WORK, _TaskState.with_waiting())
         self.create_device(_DEVICE_B, 5000, _NO_WORK, _TaskState.with_waiting())
-
         self.schedule()
-
-        return self._queue_count == 23_246 and self._hold_count == 9297
+        return self._queue_count == 23246 and self._hold_count == 9297
 
     def find_task(self, identity):
         t = self._task_table[identity]
         if _NO_TASK == t:
-            raise Exception("find_task failed")
+            raise Exception('find_task failed')
         return t
 
     def _hold_self(self):
@@ -220,9 +215,7 @@ class _Scheduler(_RBObject):
         task = self.find_task(packet.identity)
         if _NO_TASK == task:
             return _NO_TASK
-
         self._queue_count += 1
-
         packet.link = _NO_WORK
         packet.identity = self._current_task_identity
         return task.add_input_and_check_priority(packet, self._current_task)
@@ -231,9 +224,7 @@ class _Scheduler(_RBObject):
         task = self.find_task(identity)
         if _NO_TASK == task:
             return _NO_TASK
-
         task.set_task_holding(False)
-
         if task.priority > self._current_task.priority:
             return task
         return self._current_task
@@ -241,9 +232,8 @@ class _Scheduler(_RBObject):
     def _trace(self, msg):
         self._layout -= 1
         if 0 >= self._layout:
-            print("")
+            print('')
             self._layout = 50
-
         print(msg)
 
     def mark_waiting(self):
@@ -263,11 +253,13 @@ class _Scheduler(_RBObject):
 
 
 class _DeviceTaskDataRecord(_RBObject):
+
     def __init__(self):
         self.pending = _NO_WORK
 
 
 class _HandlerTaskDataRecord(_RBObject):
+
     def __init__(self):
         self.work_in = _NO_WORK
         self.device_in = _NO_WORK
@@ -280,12 +272,14 @@ class _HandlerTaskDataRecord(_RBObject):
 
 
 class _IdleTaskDataRecord(_RBObject):
+
     def __init__(self):
         self.control = 1
-        self.count = 10_000
+        self.count = 10000
 
 
 class _Packet(_RBObject):
+
     def __init__(self, link, identity, kind):
         self.link = link
         self.kind = kind
@@ -295,6 +289,7 @@ class _Packet(_RBObject):
 
 
 class _TaskState(_RBObject):
+
     def __init__(self):
         self._task_holding = False
         self._task_waiting = False
@@ -339,7 +334,7 @@ class _TaskState(_RBObject):
         return self._task_holding or (not self._packet_pending and self._task_waiting)
 
     def is_waiting_with_packet(self):
-        return self._packet_pending and self._task_waiting and not self._task_holding
+        return self._packet_pending and self._task_waiting and (not self._task_holding)
 
     @classmethod
     def with_running(cls):
@@ -355,16 +350,8 @@ class _TaskState(_RBObject):
 
 
 class _TaskControlBlock(_TaskState):
-    def __init__(
-        self,
-        link,
-        identity,
-        priority,
-        initial_work_queue,
-        initial_state,
-        private_data,
-        fn,
-    ):
+
+    def __init__(self, link, identity, priority, initial_work_queue, initial_state, private_data, fn):
         super().__init__()
         self.link = link
         self.identity = identity
@@ -372,7 +359,6 @@ class _TaskControlBlock(_TaskState):
         self.priority = priority
         self._input = initial_work_queue
         self._handle = private_data
-
         self._packet_pending = initial_state.is_packet_pending()
         self._task_waiting = initial_state.is_task_waiting()
         self._task_holding = initial_state.is_task_holding()
@@ -385,7 +371,6 @@ class _TaskControlBlock(_TaskState):
                 return self
         else:
             self._input = self.append(packet, self._input)
-
         return old_task
 
     def run_task(self):
@@ -398,89 +383,110 @@ class _TaskControlBlock(_TaskState):
                 self.packet_pending()
         else:
             message = _NO_WORK
-
         return self.function(message, self._handle)
 
 
 class _WorkerTaskDataRecord(_RBObject):
+
     def __init__(self):
         self.destination = _HANDLER_A
         self.count = 0
 
 
+CLOCKS = {'us': (utime.ticks_us, 'us'), 'cpu': (utime.ticks_cpu, 'cpu-ticks')}
+
+
+DEFAULT_CLOCK = 'us'
+
+
+def ticks_diff(end, start):
+    return utime.ticks_diff(end, start)
+
+
+def new_sample_buffer(size):
+    return array('I', bytes(4 * size))
+
+
+SAMPLE_SIZE = 1000
+
 
-import utime
-#The following Run class falls under:
-# This code is based on the SOM class library.
-#
-# Copyright (c) 2001-2021 see AUTHORS.md file
-#
-# Permission is hereby granted, free of charge, to any person obtaining a copy
-# of this software and associated documentation files (the 'Software'), to deal
-# in the Software without restriction, including without limitation the rights
-# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
-# copies of the Software, and to permit persons to whom the Software is
-# furnished to do so, subject to the following conditions:
-#
-# The above copyright notice and this permission notice shall be included in
-# all copies or substantial portions of the Software.
-#
-# THE SOFTWARE IS PROVIDED 'AS IS', WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
-# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
-# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
-# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
-# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
-# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
-# THE SOFTWARE.
 class Run:
-    def __init__(self, name):
+
+    def __init__(self, name, benchmark_suite, num_iterations):
         self._name = name
-        self._benchmark_suite = Richards
-        self._total = 0
-        self._num_iterations = 200
+        self._benchmark_suite = benchmark_suite
+        self._num_iterations = num_iterations
         self._inner_iterations = 1
+        self._clock, self._unit = CLOCKS[DEFAULT_CLOCK]
+        self._print_iterations = True
+        self._heap_tracking = False
+        self._heap = None
 
     def run_benchmark(self):
-        print("Starting " + self._name + " benchmark ...")
-
-        self._do_runs(self._benchmark_suite())
-        self._report_benchmark()
+        print('Starting ' + self._name + ' benchmark ...')
+        bench = self._benchmark_suite()
+        run_times = new_sample_buffer(min(self._num_iterations, SAMPLE_SIZE))
+        if self._heap_tracking:
+            total = self._do_heap_runs(bench, run_times)
+        else:
+            total = self._do_runs(bench, run_times)
+        if self._print_iterations:
+            self._print_results(run_times)
+        if self._heap_tracking:
+            self._report_heap()
+        self._report_benchmark(total)
         print()
 
     def measure(self, bench):
-        start_time = utime.ticks_ms()
+        clock = self._clock
+        start_time = clock()
         if not bench.inner_benchmark_loop(self._inner_iterations):
-            raise Exception("Benchmark failed with incorrect result")
-
-        end_time = utime.ticks_ms()
-        run_time = utime.ticks_diff(end_time, start_time)
-        
-
-        #self._print_result(run_time)
-
-        self._total += run_time
-
-    def _do_runs(self, bench):
-        for _ in range(self._num_iterations):
-            self.measure(bench)
-
-    def _report_benchmark(self):
-        print(
-            self._name
-            + ": iterations="
-            + str(self._num_iterations)
-            + " average: "
-            + str(round(self._total / self._num_iterations))
-            + "ms total: "
-            + str(self._total)
-            + "ms\n"
-        )
+            raise Exception('Benchmark failed with incorrect result')
+        return ticks_diff(clock(), start_time)
+
+    def _do_runs(self, bench, run_times):
+        size = len(run_times)
+        total = 0
+        for i in range(self._num_iterations):
+            run_time = self.measure(bench)
+            run_times[i % size] = run_time
+            total += run_time
+        return total
+
+    def _do_heap_runs(self, bench, run_times):
+        size = len(run_times)
+        total = 0
+        collections = 0
+        max_alloc = mem_alloc()
+        min_free = mem_free()
+        for i in range(self._num_iterations):
+            alloc_before = mem_alloc()
+            run_time = self.measure(bench)
+            alloc_after = mem_alloc()
+            free_after = mem_free()
+            if alloc_after < alloc_before:
+                collections += 1
+            max_alloc = max(max_alloc, alloc_after)
+            min_free = min(min_free, free_after)
+            run_times[i % size] = run_time
+            total += run_time
+        self._heap = (collections, max_alloc, min_free)
+        return total
+
+    def _report_heap(self):
+        collections, max_alloc, min_free = self._heap
+        print(self._name + ': heap: iterations-with-collection: ' + str(collections) + ' max-alloc: ' + str(max_alloc) + 'B min-free: ' + str(min_free) + 'B')
+
+    def _report_benchmark(self, total):
+        print(self._name + ': iterations=' + str(self._num_iterations) + ' average: ' + str(total // self._num_iterations) + self._unit + ' total: ' + str(total) + self._unit + '\n')
+
+    def _print_results(self, run_times):
+        size = len(run_times)
+        for i in range(self._num_iterations - size, self._num_iterations):
+            self._print_result(run_times[i % size])
 
     def _print_result(self, run_time):
-        print(self._name + ": iterations=1 runtime: " + str(run_time) + "ms")
-
-    #def print_total(self):
-        #print("Total Runtime: " + str(self._total) + "ms")
+        print(self._name + ': iterations=1 runtime: ' + str(run_time) + self._unit)
 
     def set_num_iterations(self, num_iterations):
         self._num_iterations = num_iterations
@@ -488,6 +494,33 @@ class Run:
     def set_inner_iterations(self, inner_iterations):
         self._inner_iterations = inner_iterations
 
+    def set_clock(self, clock):
+        self._clock, self._unit = CLOCKS[clock]
+
+    def set_print_iterations(self, print_iterations):
+        self._print_iterations = print_iterations
+
+    def set_heap_tracking(self, heap_tracking):
+        self._heap_tracking = heap_tracking
+
+
+def main(name, benchmark_suite, num_iterations):
+    run = Run(name, benchmark_suite, num_iterations)
+    args = [arg for arg in sys.argv[1:] if arg[:2] != '--']
+    if '--summary-only' in sys.argv:
+        run.set_print_iterations(False)
+    if '--heap' in sys.argv:
+        if mem_alloc is None:
+            print('The runtime does not report its heap usage')
+            sys.exit(1)
+        run.set_heap_tracking(True)
+    if len(args) > 0:
+        run.set_num_iterations(int(args[0]))
+    if len(args) > 1:
+        run.set_inner_iterations(int(args[1]))
+    if len(args) > 2:
+        run.set_clock(args[2])
+    run.run_benchmark()
+
 
-test = Run("Richards")
-test.run_benchmark()
\ No newline at end of file
+main('Richards', Richards, 200)
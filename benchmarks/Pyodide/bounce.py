@@ -19,133 +19,189 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
+#
+# Generated by benchmarks/Python/bundle.py from bounce.py for Pyodide. Do not edit.
+import sys
 import time
 
+
+class Benchmark:
+
+    def benchmark(self):
+        pass
+
+    def verify_result(self, result):
+        pass
+
+    def inner_benchmark_loop(self, inner_iterations):
+        for _ in range(inner_iterations):
+            if not self.verify_result(self.benchmark()):
+                return False
+        return True
+
+
 class Random:
+
     def __init__(self):
         self._seed = 74755
 
     def next(self):
-        self._seed = ((self._seed * 1309) + 13849) & 65535
-
+        self._seed = self._seed * 1309 + 13849 & 65535
         return self._seed
 
 
 class Ball:
+
     def __init__(self, random):
         self._x = random.next() % 500
         self._y = random.next() % 500
-        self._x_vel = (random.next() % 300) - 150
-        self._y_vel = (random.next() % 300) - 150
+        self._x_vel = random.next() % 300 - 150
+        self._y_vel = random.next() % 300 - 150
 
     def bounce(self):
         x_limit = 500
         y_limit = 500
         bounced = False
-
         self._x += self._x_vel
         self._y += self._y_vel
-
         if self._x > x_limit:
             self._x = x_limit
             self._x_vel = -abs(self._x_vel)
             bounced = True
-
         if self._x < 0:
             self._x = 0
             self._x_vel = abs(self._x_vel)
             bounced = True
-
         if self._y > y_limit:
             self._y = y_limit
             self._y_vel = -abs(self._y_vel)
             bounced = True
-
         if self._y < 0:
             self._y = 0
             self._y_vel = abs(self._y_vel)
             bounced = True
-
         return bounced
 
 
-class Bounce():
-    def inner_benchmark_loop(self, inner_iterations):
-        for _ in range(inner_iterations):
-            if not self.verify_result(self.benchmark()):
-                return False
-        return True
+class Bounce(Benchmark):
 
     def benchmark(self):
         random = Random()
-
         ball_count = 100
         bounces = 0
         balls = [None] * ball_count
-
         for i in range(ball_count):
             balls[i] = Ball(random)
-
         for i in range(50):
             for ball in balls:
                 if ball.bounce():
                     bounces += 1
-
         return bounces
 
     def verify_result(self, result):
         return result == 1331
 
 
-class Run:
-    def __init__(self, name):
-        self._name = name
-        self._benchmark_suite = Bounce
-        self._total = 0
-        self._num_iterations = 3200
-        self._inner_iterations = 1
+CLOCKS = {'us': (time.perf_counter_ns, 'us')}
 
-    def run_benchmark(self):
-        print("Starting " + self._name + " benchmark ...")
 
-        self._do_runs(self._benchmark_suite())
-        self._report_benchmark()
-        print()
+DEFAULT_CLOCK = 'us'
 
-    def measure(self, bench):
-        start_time = time.perf_counter_ns()
-        if not bench.inner_benchmark_loop(self._inner_iterations):
-            raise Exception("Benchmark failed with incorrect result")
 
-        end_time = time.perf_counter_ns()
-        run_time = (end_time - start_time)
+mem_alloc = None
+
 
-        #self._print_result(run_time)
+mem_free = None
 
-        self._total += run_time
 
-    def _do_runs(self, bench):
-        for _ in range(self._num_iterations):
-            self.measure(bench)
+def ticks_diff(end, start):
+    return (end - start) // 1000
 
-    def _report_benchmark(self):
-        print(
-            self._name
-            + ": iterations="
-            + str(self._num_iterations)
-            + " average: "
-            + str((self._total /1000000) / self._num_iterations)
-            + "ms total: "
-            + str(self._total/1000000)
-            + "ms\n"
-        )
 
-    #def _print_result(self, run_time):
-        #print(self._name + ": iterations=1 runtime: " + str(run_time/1000000) + "ms")
+def new_sample_buffer(size):
+    return [0] * size
 
 
-    def print_total(self):
-        print("Total Runtime: " + str(self._total) + "ms")
+SAMPLE_SIZE = 1000
+
+
+class Run:
+
+    def __init__(self, name, benchmark_suite, num_iterations):
+        self._name = name
+        self._benchmark_suite = benchmark_suite
+        self._num_iterations = num_iterations
+        self._inner_iterations = 1
+        self._clock, self._unit = CLOCKS[DEFAULT_CLOCK]
+        self._print_iterations = True
+        self._heap_tracking = False
+        self._heap = None
+
+    def run_benchmark(self):
+        print('Starting ' + self._name + ' benchmark ...')
+        bench = self._benchmark_suite()
+        run_times = new_sample_buffer(min(self._num_iterations, SAMPLE_SIZE))
+        if self._heap_tracking:
+            total = self._do_heap_runs(bench, run_times)
+        else:
+            total = self._do_runs(bench, run_times)
+        if self._print_iterations:
+            self._print_results(run_times)
+        if self._heap_tracking:
+            self._report_heap()
+        self._report_benchmark(total)
+        print()
+
+    def measure(self, bench):
+        clock = self._clock
+        start_time = clock()
+        if not bench.inner_benchmark_loop(self._inner_iterations):
+            raise Exception('Benchmark failed with incorrect result')
+        return ticks_diff(clock(), start_time)
+
+    def _do_runs(self, bench, run_times):
+        size = len(run_times)
+        total = 0
+        for i in range(self._num_iterations):
+            run_time = self.measure(bench)
+            run_times[i % size] = run_time
+            total += run_time
+        return total
+
+    def _do_heap_runs(self, bench, run_times):
+        size = len(run_times)
+        total = 0
+        collections = 0
+        max_alloc = mem_alloc()
+        min_free = mem_free()
+        for i in range(self._num_iterations):
+            alloc_before = mem_alloc()
+            run_time = self.measure(bench)
+            alloc_after = mem_alloc()
+            free_after = mem_free()
+            if alloc_after < alloc_before:
+                collections += 1
+            max_alloc = max(max_alloc, alloc_after)
+            min_free = min(min_free, free_after)
+            run_times[i % size] = run_time
+            total += run_time
+        self._heap = (collections, max_alloc, min_free)
+        return total
+
+    def _report_heap(self):
+        collections, max_alloc, min_free = self._heap
+        print(self._name + ': heap: iterations-with-collection: ' + str(collections) + ' max-alloc: ' + str(max_alloc) + 'B min-free: ' + str(min_free) + 'B')
+
+    def _report_benchmark(self, total):
+        print(self._name + ': iterations=' + str(self._num_iterations) + ' average: ' + str(total // self._num_iterations) + self._unit + ' total: ' + str(total) + self._unit + '\n')
+
+    def _print_results(self, run_times):
+        size = len(run_times)
+        for i in range(self._num_iterations - size, self._num_iterations):
+            self._print_result(run_times[i % size])
+
+    def _print_result(self, run_time):
+        print(self._name + ': iterations=1 runtime: ' + str(run_time) + self._unit)
 
     def set_num_iterations(self, num_iterations):
         self._num_iterations = num_iterations
@@ -153,5 +209,33 @@ class Run:
     def set_inner_iterations(self, inner_iterations):
         self._inner_iterations = inner_iterations
 
-test = Run("Bounce")
-test.run_benchmark()
+    def set_clock(self, clock):
+        self._clock, self._unit = CLOCKS[clock]
+
+    def set_print_iterations(self, print_iterations):
+        self._print_iterations = print_iterations
+
+    def set_heap_tracking(self, heap_tracking):
+        self._heap_tracking = heap_tracking
+
+
+def main(name, benchmark_suite, num_iterations):
+    run = Run(name, benchmark_suite, num_iterations)
+    args = [arg for arg in sys.argv[1:] if arg[:2] != '--']
+    if '--summary-only' in sys.argv:
+        run.set_print_iterations(False)
+    if '--heap' in sys.argv:
+        if mem_alloc is None:
+            print('The runtime does not report its heap usage')
+            sys.exit(1)
+        run.set_heap_tracking(True)
+    if len(args) > 0:
+        run.set_num_iterations(int(args[0]))
+    if len(args) > 1:
+        run.set_inner_iterations(int(args[1]))
+    if len(args) > 2:
+        run.set_clock(args[2])
+    run.run_benchmark()
+
+
+main('Bounce', Bounce, 3200)
@@ -29,28 +29,37 @@
 # CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
 # OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
-
-# The Computer Language Benchmarks Game
-# http://benchmarksgame.alioth.debian.org
 #
-#  contributed by Karl von Laudermann
-#  modified by Jeremy Echols
-#  modified by Detlef Reichl
-#  modified by Joseph LaFata
-#  modified by Peter Zotov
+# Generated by benchmarks/Python/bundle.py from mandelbrot.py for Pyodide. Do not edit.
+import sys
+import time
 
-# http://benchmarksgame.alioth.debian.org/u64q/program.php?test=mandelbrot&lang=yarv&id=3
 
+class Benchmark:
+
+    def benchmark(self):
+        pass
+
+    def verify_result(self, result):
+        pass
+
+    def inner_benchmark_loop(self, inner_iterations):
+        for _ in range(inner_iterations):
+            if not self.verify_result(self.benchmark()):
+                return False
+        return True
+
+
+class Mandelbrot(Benchmark):
 
-class Mandelbrot():
     def inner_benchmark_loop(self, inner_iterations):
         return self._verify_result(self._mandelbrot(inner_iterations), inner_iterations)
 
     def benchmark(self):
-        raise Exception("Should never be reached")
+        raise Exception('Should never be reached')
 
     def verify_result(self, result):
-        raise Exception("Should never be reached")
+        raise Exception('Should never be reached')
 
     @staticmethod
     def _verify_result(result, inner_iterations):
@@ -60,9 +69,8 @@ class Mandelbrot():
             return result == 50
         if inner_iterations == 1:
             return result == 128
-
-        print("No verification result for " + str(inner_iterations) + " found")
-        print("Result is: " + str(result))
+        print('No verification result for ' + str(inner_iterations) + ' found')
+        print('Result is: ' + str(result))
         return False
 
     @staticmethod
@@ -70,37 +78,29 @@ class Mandelbrot():
         _sum = 0
         byte_acc = 0
         bit_num = 0
-
         y = 0
-
         while y < size:
-            ci = (2.0 * y / size) - 1.0
+            ci = 2.0 * y / size - 1.0
             x = 0
-
             while x < size:
                 zrzr = 0.0
                 zi = 0.0
                 zizi = 0.0
-                cr = (2.0 * x / size) - 1.5
-
+                cr = 2.0 * x / size - 1.5
                 z = 0
                 not_done = True
                 escape = 0
                 while not_done and z < 50:
                     zr = zrzr - zizi + cr
                     zi = 2.0 * zr * zi + ci
-
                     zrzr = zr * zr
                     zizi = zi * zi
-
                     if zrzr + zizi > 4.0:
                         not_done = False
                         escape = 1
                     z += 1
-
                 byte_acc = (byte_acc << 1) + escape
                 bit_num = bit_num + 1
-
                 if bit_num == 8:
                     _sum ^= byte_acc
                     byte_acc = 0
@@ -112,82 +112,109 @@ class Mandelbrot():
                     bit_num = 0
                 x += 1
             y += 1
-
         return _sum
 
 
-import time
-#The following Run class falls under:
-# This code is based on the SOM class library.
-#
-# Copyright (c) 2001-2021 see AUTHORS.md file
-#
-# Permission is hereby granted, free of charge, to any person obtaining a copy
-# of this software and associated documentation files (the 'Software'), to deal
-# in the Software without restriction, including without limitation the rights
-# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
-# copies of the Software, and to permit persons to whom the Software is
-# furnished to do so, subject to the following conditions:
-#
-# The above copyright notice and this permission notice shall be included in
-# all copies or substantial portions of the Software.
-#
-# THE SOFTWARE IS PROVIDED 'AS IS', WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
-# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
-# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
-# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
-# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
-# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
-# THE SOFTWARE.
-class Run:
-    def __init__(self, name):
-        self._name = name
-        self._benchmark_suite = Mandelbrot
-        self._total = 0
-        self._num_iterations = 1600*3200
-        self._inner_iterations = 1
+CLOCKS = {'us': (time.perf_counter_ns, 'us')}
 
-    def run_benchmark(self):
-        print("Starting " + self._name + " benchmark ...")
 
-        self._do_runs(self._benchmark_suite())
-        self._report_benchmark()
-        print()
+DEFAULT_CLOCK = 'us'
 
-    def measure(self, bench):
-        start_time = time.perf_counter_ns()
-        if not bench.inner_benchmark_loop(self._inner_iterations):
-            raise Exception("Benchmark failed with incorrect result")
 
-        end_time = time.perf_counter_ns()
-        run_time = (end_time - start_time)
+mem_alloc = None
+
 
-        #self._print_result(run_time)
+mem_free = None
 
-        self._total += run_time
 
-    def _do_runs(self, bench):
-        for _ in range(self._num_iterations):
-            self.measure(bench)
+def ticks_diff(end, start):
+    return (end - start) // 1000
 
-    def _report_benchmark(self):
-        print(
-            self._name
-            + ": iterations="
-            + str(self._num_iterations)
-            + " average: "
-            + str((self._total/1000000) / self._num_iterations)
-            + "ms total: "
-            + str(self._total/1000000)
-            + "ms\n"
-        )
 
-    #def _print_result(self, run_time):
-        #print(self._name + ": iterations=1 runtime: " + str(run_time/1000000) + "ms")
+def new_sample_buffer(size):
+    return [0] * size
 
 
-    def print_total(self):
-        print("Total Runtime: " + str(self._total) + "ms")
+SAMPLE_SIZE = 1000
+
+
+class Run:
+
+    def __init__(self, name, benchmark_suite, num_iterations):
+        self._name = name
+        self._benchmark_suite = benchmark_suite
+        self._num_iterations = num_iterations
+        self._inner_iterations = 1
+        self._clock, self._unit = CLOCKS[DEFAULT_CLOCK]
+        self._print_iterations = True
+        self._heap_tracking = False
+        self._heap = None
+
+    def run_benchmark(self):
+        print('Starting ' + self._name + ' benchmark ...')
+        bench = self._benchmark_suite()
+        run_times = new_sample_buffer(min(self._num_iterations, SAMPLE_SIZE))
+        if self._heap_tracking:
+            total = self._do_heap_runs(bench, run_times)
+        else:
+            total = self._do_runs(bench, run_times)
+        if self._print_iterations:
+            self._print_results(run_times)
+        if self._heap_tracking:
+            self._report_heap()
+        self._report_benchmark(total)
+        print()
+
+    def measure(self, bench):
+        clock = self._clock
+        start_time = clock()
+        if not bench.inner_benchmark_loop(self._inner_iterations):
+            raise Exception('Benchmark failed with incorrect result')
+        return ticks_diff(clock(), start_time)
+
+    def _do_runs(self, bench, run_times):
+        size = len(run_times)
+        total = 0
+        for i in range(self._num_iterations):
+            run_time = self.measure(bench)
+            run_times[i % size] = run_time
+            total += run_time
+        return total
+
+    def _do_heap_runs(self, bench, run_times):
+        size = len(run_times)
+        total = 0
+        collections = 0
+        max_alloc = mem_alloc()
+        min_free = mem_free()
+        for i in range(self._num_iterations):
+            alloc_before = mem_alloc()
+            run_time = self.measure(bench)
+            alloc_after = mem_alloc()
+            free_after = mem_free()
+            if alloc_after < alloc_before:
+                collections += 1
+            max_alloc = max(max_alloc, alloc_after)
+            min_free = min(min_free, free_after)
+            run_times[i % size] = run_time
+            total += run_time
+        self._heap = (collections, max_alloc, min_free)
+        return total
+
+    def _report_heap(self):
+        collections, max_alloc, min_free = self._heap
+        print(self._name + ': heap: iterations-with-collection: ' + str(collections) + ' max-alloc: ' + str(max_alloc) + 'B min-free: ' + str(min_free) + 'B')
+
+    def _report_benchmark(self, total):
+        print(self._name + ': iterations=' + str(self._num_iterations) + ' average: ' + str(total // self._num_iterations) + self._unit + ' total: ' + str(total) + self._unit + '\n')
+
+    def _print_results(self, run_times):
+        size = len(run_times)
+        for i in range(self._num_iterations - size, self._num_iterations):
+            self._print_result(run_times[i % size])
+
+    def _print_result(self, run_time):
+        print(self._name + ': iterations=1 runtime: ' + str(run_time) + self._unit)
 
     def set_num_iterations(self, num_iterations):
         self._num_iterations = num_iterations
@@ -195,6 +222,33 @@ class Run:
     def set_inner_iterations(self, inner_iterations):
         self._inner_iterations = inner_iterations
 
+    def set_clock(self, clock):
+        self._clock, self._unit = CLOCKS[clock]
+
+    def set_print_iterations(self, print_iterations):
+        self._print_iterations = print_iterations
+
+    def set_heap_tracking(self, heap_tracking):
+        self._heap_tracking = heap_tracking
+
+
+def main(name, benchmark_suite, num_iterations):
+    run = Run(name, benchmark_suite, num_iterations)
+    args = [arg for arg in sys.argv[1:] if arg[:2] != '--']
+    if '--summary-only' in sys.argv:
+        run.set_print_iterations(False)
+    if '--heap' in sys.argv:
+        if mem_alloc is None:
+            print('The runtime does not report its heap usage')
+            sys.exit(1)
+        run.set_heap_tracking(True)
+    if len(args) > 0:
+        run.set_num_iterations(int(args[0]))
+    if len(args) > 1:
+        run.set_inner_iterations(int(args[1]))
+    if len(args) > 2:
+        run.set_clock(args[2])
+    run.run_benchmark()
+
 
-test = Run("Mandelbrot")
-test.run_benchmark()
+main('Mandelbrot', Mandelbrot, 5120000)
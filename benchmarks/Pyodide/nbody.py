@@ -2,15 +2,39 @@
 # http://shootout.alioth.debian.org/
 #
 # Based on nbody.java and adapted based on the SOM version.
+#
+# Generated by benchmarks/Python/bundle.py from nbody.py for Pyodide. Do not edit.
 from math import sqrt
+import sys
+import time
+
+
+class Benchmark:
+
+    def benchmark(self):
+        pass
+
+    def verify_result(self, result):
+        pass
+
+    def inner_benchmark_loop(self, inner_iterations):
+        for _ in range(inner_iterations):
+            if not self.verify_result(self.benchmark()):
+                return False
+        return True
 
 
 PI = 3.141592653589793
+
+
 SOLAR_MASS = 4 * PI * PI
+
+
 DAYS_PER_YER = 365.24
 
 
 class _Body:
+
     def __init__(self, x, y, z, vx, vy, vz, mass):
         self.x = x
         self.y = y
@@ -27,51 +51,19 @@ class _Body:
 
 
 def jupiter():
-    return _Body(
-        4.84143144246472090e00,
-        -1.16032004402742839e00,
-        -1.03622044471123109e-01,
-        1.66007664274403694e-03,
-        7.69901118419740425e-03,
-        -6.90460016972063023e-05,
-        9.54791938424326609e-04,
-    )
+    return _Body(4.841431442464721, -1.1603200440274284, -0.10362204447112311, 0.001660076642744037, 0.007699011184197404, -6.90460016972063e-05, 0.0009547919384243266)
 
 
 def saturn():
-    return _Body(
-        8.34336671824457987e00,
-        4.12479856412430479e00,
-        -4.03523417114321381e-01,
-        -2.76742510726862411e-03,
-        4.99852801234917238e-03,
-        2.30417297573763929e-05,
-        2.85885980666130812e-04,
-    )
+    return _Body(8.34336671824458, 4.124798564124305, -0.4035234171143214, -0.002767425107268624, 0.004998528012349172, 2.3041729757376393e-05, 0.0002858859806661308)
 
 
 def uranus():
-    return _Body(
-        1.28943695621391310e01,
-        -1.51111514016986312e01,
-        -2.23307578892655734e-01,
-        2.96460137564761618e-03,
-        2.37847173959480950e-03,
-        -2.96589568540237556e-05,
-        4.36624404335156298e-05,
-    )
+    return _Body(12.894369562139131, -15.111151401698631, -0.22330757889265573, 0.002964601375647616, 0.0023784717395948095, -2.9658956854023756e-05, 4.366244043351563e-05)
 
 
 def neptune():
-    return _Body(
-        1.53796971148509165e01,
-        -2.59193146099879641e01,
-        1.79258772950371181e-01,
-        2.68067772490389322e-03,
-        1.62824170038242295e-03,
-        -9.51592254519715870e-05,
-        5.15138902046611451e-05,
-    )
+    return _Body(15.379697114850917, -25.919314609987964, 0.17925877295037118, 0.0026806777249038932, 0.001628241700382423, -9.515922545197159e-05, 5.1513890204661145e-05)
 
 
 def sun():
@@ -79,48 +71,40 @@ def sun():
 
 
 class NBodySystem:
+
     def __init__(self):
         self._bodies = self._create_bodies()
 
     @staticmethod
     def _create_bodies():
         bodies = [sun(), jupiter(), saturn(), uranus(), neptune()]
-
         px = 0.0
         py = 0.0
         pz = 0.0
-
         for b in bodies:
             px += b.vx * b.mass
             py += b.vy * b.mass
             pz += b.vz * b.mass
-
         bodies[0].offset_momentum(px, py, pz)
         return bodies
 
     def advance(self, dt):
         for i in range(len(self._bodies)):
             i_body = self._bodies[i]
-
             for j in range(i + 1, len(self._bodies)):
                 j_body = self._bodies[j]
-
                 dx = i_body.x - j_body.x
                 dy = i_body.y - j_body.y
                 dz = i_body.z - j_body.z
-
                 d_squared = dx * dx + dy * dy + dz * dz
                 distance = sqrt(d_squared)
                 mag = dt / (d_squared * distance)
-
-                i_body.vx = i_body.vx - (dx * j_body.mass * mag)
-                i_body.vy = i_body.vy - (dy * j_body.mass * mag)
-                i_body.vz = i_body.vz - (dz * j_body.mass * mag)
-
-                j_body.vx = j_body.vx + (dx * i_body.mass * mag)
-                j_body.vy = j_body.vy + (dy * i_body.mass * mag)
-                j_body.vz = j_body.vz + (dz * i_body.mass * mag)
-
+                i_body.vx = i_body.vx - dx * j_body.mass * mag
+                i_body.vy = i_body.vy - dy * j_body.mass * mag
+                i_body.vz = i_body.vz - dz * j_body.mass * mag
+                j_body.vx = j_body.vx + dx * i_body.mass * mag
+                j_body.vy = j_body.vy + dy * i_body.mass * mag
+                j_body.vz = j_body.vz + dz * i_body.mass * mag
         for body in self._bodies:
             body.x = body.x + dt * body.vx
             body.y = body.y + dt * body.vy
@@ -128,130 +112,144 @@ class NBodySystem:
 
     def energy(self):
         e = 0.0
-
         for i in range(len(self._bodies)):
             i_body = self._bodies[i]
-            e += (
-                0.5
-                * i_body.mass
-                * (
-                    i_body.vx * i_body.vx
-                    + i_body.vy * i_body.vy
-                    + i_body.vz * i_body.vz
-                )
-            )
-
+            e += 0.5 * i_body.mass * (i_body.vx * i_body.vx + i_body.vy * i_body.vy + i_body.vz * i_body.vz)
             for j in range(i + 1, len(self._bodies)):
                 j_body = self._bodies[j]
                 dx = i_body.x - j_body.x
                 dy = i_body.y - j_body.y
                 dz = i_body.z - j_body.z
-
                 distance = sqrt(dx * dx + dy * dy + dz * dz)
-                e -= (i_body.mass * j_body.mass) / distance
+                e -= i_body.mass * j_body.mass / distance
         return e
 
 
-class NBody():
+class NBody(Benchmark):
+
     def inner_benchmark_loop(self, inner_iterations):
         system = NBodySystem()
         for _ in range(inner_iterations):
             system.advance(0.01)
-
         return self._verify_result(system.energy(), inner_iterations)
 
     @staticmethod
     def _verify_result(result, inner_iterations):
         if inner_iterations == 250000:
             return result == -0.1690859889909308
-
         if inner_iterations == 1:
             return result == -0.16907495402506745
-
-        print("No verification result for " + str(inner_iterations) + " found")
-        print("Result is: " + str(result))
+        print('No verification result for ' + str(inner_iterations) + ' found')
+        print('Result is: ' + str(result))
         return False
 
     def benchmark(self):
-        raise Exception("Should never be reached")
+        raise Exception('Should never be reached')
 
     def verify_result(self, result):
-        raise Exception("Should never be reached")
+        raise Exception('Should never be reached')
 
 
-import time
-#The following Run class falls under:
-# This code is based on the SOM class library.
-#
-# Copyright (c) 2001-2021 see AUTHORS.md file
-#
-# Permission is hereby granted, free of charge, to any person obtaining a copy
-# of this software and associated documentation files (the 'Software'), to deal
-# in the Software without restriction, including without limitation the rights
-# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
-# copies of the Software, and to permit persons to whom the Software is
-# furnished to do so, subject to the following conditions:
-#
-# The above copyright notice and this permission notice shall be included in
-# all copies or substantial portions of the Software.
-#
-# THE SOFTWARE IS PROVIDED 'AS IS', WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
-# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
-# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
-# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
-# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
-# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
-# THE SOFTWARE.
-class Run:
-    def __init__(self, name):
-        self._name = name
-        self._benchmark_suite = NBody
-        self._total = 0
-        self._num_iterations = 800*3200
-        self._inner_iterations = 1
+CLOCKS = {'us': (time.perf_counter_ns, 'us')}
 
-    def run_benchmark(self):
-        print("Starting " + self._name + " benchmark ...")
 
-        self._do_runs(self._benchmark_suite())
-        self._report_benchmark()
-        print()
+DEFAULT_CLOCK = 'us'
 
-    def measure(self, bench):
-        start_time = time.perf_counter_ns()
-        if not bench.inner_benchmark_loop(self._inner_iterations):
-            raise Exception("Benchmark failed with incorrect result")
 
-        end_time = time.perf_counter_ns()
-        run_time = (end_time - start_time)
+mem_alloc = None
+
 
+mem_free = None
 
-        #self._print_result(run_time)
 
-        self._total += run_time
+def ticks_diff(end, start):
+    return (end - start) // 1000
 
-    def _do_runs(self, bench):
-        for _ in range(self._num_iterations):
-            self.measure(bench)
 
-    def _report_benchmark(self):
-        print(
-            self._name
-            + ": iterations="
-            + str(self._num_iterations)
-            + " average: "
-            + str((self._total/1000000) / self._num_iterations)
-            + "ms total: "
-            + str(self._total/1000000)
-            + "ms\n"
-        )
+def new_sample_buffer(size):
+    return [0] * size
 
-    #def _print_result(self, run_time):
-        #print(self._name + ": iterations=1 runtime: " + str(run_time/1000000) + "ms")
 
+SAMPLE_SIZE = 1000
 
-    def print_total(self):
-        print("Total Runtime: " + str(self._total) + "ms")
+
+class Run:
+
+    def __init__(self, name, benchmark_suite, num_iterations):
+        self._name = name
+        self._benchmark_suite = benchmark_suite
+        self._num_iterations = num_iterations
+        self._inner_iterations = 1
+        self._clock, self._unit = CLOCKS[DEFAULT_CLOCK]
+        self._print_iterations = True
+        self._heap_tracking = False
+        self._heap = None
+
+    def run_benchmark(self):
+        print('Starting ' + self._name + ' benchmark ...')
+        bench = self._benchmark_suite()
+        run_times = new_sample_buffer(min(self._num_iterations, SAMPLE_SIZE))
+        if self._heap_tracking:
+            total = self._do_heap_runs(bench, run_times)
+        else:
+            total = self._do_runs(bench, run_times)
+        if self._print_iterations:
+            self._print_results(run_times)
+        if self._heap_tracking:
+            self._report_heap()
+        self._report_benchmark(total)
+        print()
+
+    def measure(self, bench):
+        clock = self._clock
+        start_time = clock()
+        if not bench.inner_benchmark_loop(self._inner_iterations):
+            raise Exception('Benchmark failed with incorrect result')
+        return ticks_diff(clock(), start_time)
+
+    def _do_runs(self, bench, run_times):
+        size = len(run_times)
+        total = 0
+        for i in range(self._num_iterations):
+            run_time = self.measure(bench)
+            run_times[i % size] = run_time
+            total += run_time
+        return total
+
+    def _do_heap_runs(self, bench, run_times):
+        size = len(run_times)
+        total = 0
+        collections = 0
+        max_alloc = mem_alloc()
+        min_free = mem_free()
+        for i in range(self._num_iterations):
+            alloc_before = mem_alloc()
+            run_time = self.measure(bench)
+            alloc_after = mem_alloc()
+            free_after = mem_free()
+            if alloc_after < alloc_before:
+                collections += 1
+            max_alloc = max(max_alloc, alloc_after)
+            min_free = min(min_free, free_after)
+            run_times[i % size] = run_time
+            total += run_time
+        self._heap = (collections, max_alloc, min_free)
+        return total
+
+    def _report_heap(self):
+        collections, max_alloc, min_free = self._heap
+        print(self._name + ': heap: iterations-with-collection: ' + str(collections) + ' max-alloc: ' + str(max_alloc) + 'B min-free: ' + str(min_free) + 'B')
+
+    def _report_benchmark(self, total):
+        print(self._name + ': iterations=' + str(self._num_iterations) + ' average: ' + str(total // self._num_iterations) + self._unit + ' total: ' + str(total) + self._unit + '\n')
+
+    def _print_results(self, run_times):
+        size = len(run_times)
+        for i in range(self._num_iterations - size, self._num_iterations):
+            self._print_result(run_times[i % size])
+
+    def _print_result(self, run_time):
+        print(self._name + ': iterations=1 runtime: ' + str(run_time) + self._unit)
 
     def set_num_iterations(self, num_iterations):
         self._num_iterations = num_iterations
@@ -259,6 +257,33 @@ class Run:
     def set_inner_iterations(self, inner_iterations):
         self._inner_iterations = inner_iterations
 
+    def set_clock(self, clock):
+        self._clock, self._unit = CLOCKS[clock]
+
+    def set_print_iterations(self, print_iterations):
+        self._print_iterations = print_iterations
+
+    def set_heap_tracking(self, heap_tracking):
+        self._heap_tracking = heap_tracking
+
+
+def main(name, benchmark_suite, num_iterations):
+    run = Run(name, benchmark_suite, num_iterations)
+    args = [arg for arg in sys.argv[1:] if arg[:2] != '--']
+    if '--summary-only' in sys.argv:
+        run.set_print_iterations(False)
+    if '--heap' in sys.argv:
+        if mem_alloc is None:
+            print('The runtime does not report its heap usage')
+            sys.exit(1)
+        run.set_heap_tracking(True)
+    if len(args) > 0:
+        run.set_num_iterations(int(args[0]))
+    if len(args) > 1:
+        run.set_inner_iterations(int(args[1]))
+    if len(args) > 2:
+        run.set_clock(args[2])
+    run.run_benchmark()
+
 
-test = Run("NBody")
-test.run_benchmark()
+main('NBody', NBody, 2560000)
@@ -19,14 +19,19 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
+#
+# Generated by benchmarks/Python/bundle.py from queens.py for Pyodide. Do not edit.
+import sys
+import time
 
 
-class Queens():
-    def __init__(self):
-        self._free_maxs = None
-        self._free_rows = None
-        self._free_mins = None
-        self._queen_rows = None
+class Benchmark:
+
+    def benchmark(self):
+        pass
+
+    def verify_result(self, result):
+        pass
 
     def inner_benchmark_loop(self, inner_iterations):
         for _ in range(inner_iterations):
@@ -34,6 +39,15 @@ class Queens():
                 return False
         return True
 
+
+class Queens(Benchmark):
+
+    def __init__(self):
+        self._free_maxs = None
+        self._free_rows = None
+        self._free_mins = None
+        self._queen_rows = None
+
     def benchmark(self):
         result = True
         for _ in range(10):
@@ -48,7 +62,6 @@ class Queens():
         self._free_maxs = [True] * 16
         self._free_mins = [True] * 16
         self._queen_rows = [-1] * 8
-
         return self.place_queen(0)
 
     def place_queen(self, c):
@@ -56,19 +69,15 @@ class Queens():
             if self.get_row_column(r, c):
                 self._queen_rows[r] = c
                 self.set_row_column(r, c, False)
-
                 if c == 7:
                     return True
                 if self.place_queen(c + 1):
                     return True
-
                 self.set_row_column(r, c, True)
         return False
 
     def get_row_column(self, r, c):
-        return (
-            self._free_rows[r] and self._free_maxs[c + r] and self._free_mins[c - r + 7]
-        )
+        return self._free_rows[r] and self._free_maxs[c + r] and self._free_mins[c - r + 7]
 
     def set_row_column(self, r, c, v):
         self._free_rows[r] = v
@@ -76,57 +85,106 @@ class Queens():
         self._free_mins[c - r + 7] = v
 
 
-import time
-class Run:
-    def __init__(self, name):
-        self._name = name
-        self._benchmark_suite = Queens
-        self._total = 0
-        self._num_iterations = 5*3200
-        self._inner_iterations = 1
+CLOCKS = {'us': (time.perf_counter_ns, 'us')}
 
-    def run_benchmark(self):
-        print("Starting " + self._name + " benchmark ...")
 
-        self._do_runs(self._benchmark_suite())
-        self._report_benchmark()
-        print()
+DEFAULT_CLOCK = 'us'
 
-    def measure(self, bench):
-        start_time = time.perf_counter_ns()
-        if not bench.inner_benchmark_loop(self._inner_iterations):
-            raise Exception("Benchmark failed with incorrect result")
 
-        end_time = time.perf_counter_ns()
-        run_time = (end_time - start_time)
+mem_alloc = None
 
-        #self._print_result(run_time)
 
-        self._total += run_time
+mem_free = None
 
-    def _do_runs(self, bench):
-        for _ in range(self._num_iterations):
-            self.measure(bench)
 
-    def _report_benchmark(self):
-        print(
-            self._name
-            + ": iterations="
-            + str(self._num_iterations)
-            + " average: "
-            + str((self._total/1000000) / self._num_iterations)
-            + "ms total: "
-            + str(self._total/1000000)
-            + "ms\n"
-        )
+def ticks_diff(end, start):
+    return (end - start) // 1000
 
-    #def _print_result(self, run_time):
-        #print(self._name + ": iterations=1 runtime: " + str(run_time/1000000) + "ms")
 
+def new_sample_buffer(size):
+    return [0] * size
+
+
+SAMPLE_SIZE = 1000
+
+
+class Run:
+
+    def __init__(self, name, benchmark_suite, num_iterations):
+        self._name = name
+        self._benchmark_suite = benchmark_suite
+        self._num_iterations = num_iterations
+        self._inner_iterations = 1
+        self._clock, self._unit = CLOCKS[DEFAULT_CLOCK]
+        self._print_iterations = True
+        self._heap_tracking = False
+        self._heap = None
 
+    def run_benchmark(self):
+        print('Starting ' + self._name + ' benchmark ...')
+        bench = self._benchmark_suite()
+        run_times = new_sample_buffer(min(self._num_iterations, SAMPLE_SIZE))
+        if self._heap_tracking:
+            total = self._do_heap_runs(bench, run_times)
+        else:
+            total = self._do_runs(bench, run_times)
+        if self._print_iterations:
+            self._print_results(run_times)
+        if self._heap_tracking:
+            self._report_heap()
+        self._report_benchmark(total)
+        print()
 
-    def print_total(self):
-        print("Total Runtime: " + str(self._total) + "ms")
+    def measure(self, bench):
+        clock = self._clock
+        start_time = clock()
+        if not bench.inner_benchmark_loop(self._inner_iterations):
+            raise Exception('Benchmark failed with incorrect result')
+        return ticks_diff(clock(), start_time)
+
+    def _do_runs(self, bench, run_times):
+        size = len(run_times)
+        total = 0
+        for i in range(self._num_iterations):
+            run_time = self.measure(bench)
+            run_times[i % size] = run_time
+            total += run_time
+        return total
+
+    def _do_heap_runs(self, bench, run_times):
+        size = len(run_times)
+        total = 0
+        collections = 0
+        max_alloc = mem_alloc()
+        min_free = mem_free()
+        for i in range(self._num_iterations):
+            alloc_before = mem_alloc()
+            run_time = self.measure(bench)
+            alloc_after = mem_alloc()
+            free_after = mem_free()
+            if alloc_after < alloc_before:
+                collections += 1
+            max_alloc = max(max_alloc, alloc_after)
+            min_free = min(min_free, free_after)
+            run_times[i % size] = run_time
+            total += run_time
+        self._heap = (collections, max_alloc, min_free)
+        return total
+
+    def _report_heap(self):
+        collections, max_alloc, min_free = self._heap
+        print(self._name + ': heap: iterations-with-collection: ' + str(collections) + ' max-alloc: ' + str(max_alloc) + 'B min-free: ' + str(min_free) + 'B')
+
+    def _report_benchmark(self, total):
+        print(self._name + ': iterations=' + str(self._num_iterations) + ' average: ' + str(total // self._num_iterations) + self._unit + ' total: ' + str(total) + self._unit + '\n')
+
+    def _print_results(self, run_times):
+        size = len(run_times)
+        for i in range(self._num_iterations - size, self._num_iterations):
+            self._print_result(run_times[i % size])
+
+    def _print_result(self, run_time):
+        print(self._name + ': iterations=1 runtime: ' + str(run_time) + self._unit)
 
     def set_num_iterations(self, num_iterations):
         self._num_iterations = num_iterations
@@ -134,6 +192,33 @@ class Run:
     def set_inner_iterations(self, inner_iterations):
         self._inner_iterations = inner_iterations
 
+    def set_clock(self, clock):
+        self._clock, self._unit = CLOCKS[clock]
+
+    def set_print_iterations(self, print_iterations):
+        self._print_iterations = print_iterations
+
+    def set_heap_tracking(self, heap_tracking):
+        self._heap_tracking = heap_tracking
+
+
+def main(name, benchmark_suite, num_iterations):
+    run = Run(name, benchmark_suite, num_iterations)
+    args = [arg for arg in sys.argv[1:] if arg[:2] != '--']
+    if '--summary-only' in sys.argv:
+        run.set_print_iterations(False)
+    if '--heap' in sys.argv:
+        if mem_alloc is None:
+            print('The runtime does not report its heap usage')
+            sys.exit(1)
+        run.set_heap_tracking(True)
+    if len(args) > 0:
+        run.set_num_iterations(int(args[0]))
+    if len(args) > 1:
+        run.set_inner_iterations(int(args[1]))
+    if len(args) > 2:
+        run.set_clock(args[2])
+    run.run_benchmark()
+
 
-test = Run("Queens")
-test.run_benchmark()
+main('Queens', Queens, 16000)
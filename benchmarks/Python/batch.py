@@ -0,0 +1,163 @@
+# Copyright (c) 2024 see AUTHORS.md file
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the 'Software'), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED 'AS IS', WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import sys
+from random import Random
+
+from harness import create_run
+from rebench_conf import DEFAULT_CONF, load_conf, benchmark_sizes
+from registry import REGISTRY, UnknownBenchmarkError
+
+_BATCH_OPTIONS = ("conf", "suite", "order", "seed", "interleave", "benchmarks")
+_ORDERS = ("conf", "reverse", "random")
+
+
+def _default_iterations(conf, suite):
+    suites = conf.get("benchmark_suites", {})
+    if suite is None:
+        suite = next((name for name, s in suites.items() if s.get("benchmarks")), None)
+    values = suites.get(suite, {}).get("variable_values") or [1]
+    return values[0] if isinstance(values[0], int) else 1
+
+
+def order_runs(runs, order, seed):
+    if order == "conf":
+        return runs
+    if order == "reverse":
+        return list(reversed(runs))
+    if order == "random":
+        runs = list(runs)
+        Random(seed).shuffle(runs)
+        return runs
+    raise ValueError("Unknown order: " + order)
+
+
+def run_sequential(runs):
+    for run in runs:
+        run.run_benchmark()
+
+
+# Runs one iteration of each benchmark in turn, so that each iteration
+# follows iterations of all other benchmarks. Each benchmark stops as it
+# would when run on its own, e.g., at the end of its time budget.
+def run_interleaved(runs):
+    pending = [run.iterate(run.start_benchmark()) for run in runs]
+    while pending:
+        pending = [
+            iterations for iterations in pending if next(iterations, None) is not None
+        ]
+    for run in runs:
+        run.finish_benchmark()
+
+
+def print_usage():
+    print("./batch.py [options] [num-iterations]")
+    print()
+    print("Runs all benchmarks of a ReBench suite in this interpreter, with the")
+    print("problem sizes given as extra_args in the configuration.")
+    print()
+    print("  num-iterations - number of times to execute each benchmark,")
+    print("                   default: the suite's first variable value")
+    print()
+    print("Options:")
+    print("  --conf=file            - ReBench configuration, default: rebench.conf")
+    print("  --suite=name           - suite to take benchmarks and sizes from,")
+    print("                           default: the first suite with benchmarks")
+    print("  --benchmarks=selection - run only the selected benchmarks, e.g.,")
+    print("                           CD,Havlak or macro")
+    print("  --order=order          - conf (default), reverse, or random")
+    print("  --seed=n               - seed for the random order, default: 0")
+    print("  --interleave           - run the benchmarks round-robin, one")
+    print("                           iteration at a time")
+    print()
+    print("All other options are passed on to the harness, see harness.py.")
+
+
+def main(args):
+    options = {}
+    harness_options = []
+    positional = []
+    for arg in args[1:]:
+        if arg in ("-h", "--help"):
+            print_usage()
+            return 0
+        name, _, value = arg[2:].partition("=")
+        if arg.startswith("--") and name in _BATCH_OPTIONS:
+            options[name] = value
+        elif arg.startswith("--"):
+            harness_options.append(arg)
+        else:
+            positional.append(arg)
+
+    conf = load_conf(options.get("conf", DEFAULT_CONF))
+    suite = options.get("suite")
+    if suite is not None and suite not in conf.get("benchmark_suites", {}):
+        print("Unknown suite: " + suite)
+        print_usage()
+        return 1
+    order = options.get("order", "conf")
+    if order not in _ORDERS:
+        print("Unknown order: " + order)
+        print_usage()
+        return 1
+    seed = options.get("seed", "0") or "0"
+    if not seed.isdigit():
+        print("Invalid seed: " + seed)
+        print_usage()
+        return 1
+    if positional and not positional[0].isdigit():
+        print("Invalid number of iterations: " + positional[0])
+        print_usage()
+        return 1
+    if positional:
+        num_iterations = int(positional[0])
+    else:
+        num_iterations = _default_iterations(conf, suite)
+
+    try:
+        if "benchmarks" in options:
+            selected = [info.name for info in REGISTRY.select(options["benchmarks"])]
+        else:
+            selected = None
+
+        runs = []
+        for name, size in benchmark_sizes(conf, suite):
+            if selected is None or name in selected:
+                runs.append(
+                    create_run(
+                        REGISTRY.get(name), num_iterations, size, harness_options
+                    )
+                )
+    except UnknownBenchmarkError as error:
+        print(error)
+        return 1
+
+    runs = order_runs(runs, order, int(seed))
+    if "interleave" in options:
+        run_interleaved(runs)
+    else:
+        run_sequential(runs)
+
+    if runs:
+        runs[-1].print_total(sum(run.get_total() for run in runs))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,340 @@
+# Copyright (c) 2024 see AUTHORS.md file
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the 'Software'), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED 'AS IS', WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import ast
+import os
+import sys
+
+_BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+_SHIM_DIR = os.path.join(_BASE_DIR, "shims")
+
+_BUNDLE_OPTIONS = ("check",)
+
+# benchmarks of the single-file variants; the number of iterations of each
+# is given per runtime in RUNTIMES
+BENCHMARKS = (
+    "Bounce",
+    "Json",
+    "List",
+    "Mandelbrot",
+    "NBody",
+    "Permute",
+    "Queens",
+    "Richards",
+    "Sieve",
+    "Storage",
+    "Towers",
+)
+
+RUNTIMES = {
+    "MicroPython": {
+        "timing": "timing_micropython",
+        "modules": ("math", "sys", "utime", "array", "gc"),
+        "iterations": {"Json": 15, "Mandelbrot": 70000, "NBody": 6000},
+        "default_iterations": 200,
+        "exact_float_literals": False,
+    },
+    "RustPython": {
+        "timing": "timing_rustpython",
+        "modules": None,
+        "iterations": {},
+        "default_iterations": 200,
+        "exact_float_literals": True,
+    },
+    "Pyodide": {
+        "timing": "timing_pyodide",
+        "modules": None,
+        "iterations": {
+            "List": 8 * 3200,
+            "Mandelbrot": 1600 * 3200,
+            "NBody": 800 * 3200,
+            "Queens": 5 * 3200,
+        },
+        "default_iterations": 3200,
+        "exact_float_literals": True,
+    },
+}
+
+
+class BundleError(Exception):
+    pass
+
+
+def _module_path(module):
+    if module == "timing":
+        return None
+    if module == "run":
+        return os.path.join(_SHIM_DIR, "run.py")
+    if module.startswith("timing_"):
+        return os.path.join(_SHIM_DIR, module + ".py")
+    return os.path.join(_BASE_DIR, *module.split(".")) + ".py"
+
+
+def _is_local(module):
+    return module in ("benchmark", "timing") or module.startswith("som.")
+
+
+def _parse(module):
+    with open(_module_path(module), encoding="utf-8") as source_file:
+        return ast.parse(source_file.read())
+
+
+def _defined_names(node):
+    if isinstance(node, (ast.ClassDef, ast.FunctionDef)):
+        return [node.name]
+    if isinstance(node, ast.Assign):
+        return [target.id for target in node.targets if isinstance(target, ast.Name)]
+    return []
+
+
+def _used_names(node):
+    return {
+        child.id
+        for child in ast.walk(node)
+        if isinstance(child, ast.Name) and isinstance(child.ctx, ast.Load)
+    }
+
+
+# abc is not available on all runtimes, and the abstract methods only
+# document which methods a benchmark overrides
+class _StripAbstractMethods(ast.NodeTransformer):
+    def visit_FunctionDef(self, node):  # pylint: disable=invalid-name
+        node.decorator_list = [
+            decorator
+            for decorator in node.decorator_list
+            if not (
+                isinstance(decorator, ast.Name) and decorator.id == "abstractmethod"
+            )
+        ]
+        return node
+
+
+def _float_literal(node):
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+        node = node.operand
+    return isinstance(node, ast.Constant) and isinstance(node.value, float)
+
+
+# MicroPython does not parse float literals with correct rounding, so that
+# a result can be off by an ulp from the literal it is compared to. On such
+# runtimes, equality with a float literal allows a relative error of 1e-15.
+class _RelaxFloatEquality(ast.NodeTransformer):
+    def visit_Compare(self, node):  # pylint: disable=invalid-name
+        self.generic_visit(node)
+        if (
+            len(node.ops) != 1
+            or not isinstance(node.ops[0], ast.Eq)
+            or not _float_literal(node.comparators[0])
+        ):
+            return node
+        return ast.parse(
+            "abs(("
+            + ast.unparse(node.left)
+            + ") - ("
+            + ast.unparse(node.comparators[0])
+            + ")) <= 1e-15 * abs("
+            + ast.unparse(node.comparators[0])
+            + ")",
+            mode="eval",
+        ).body
+
+
+class Bundle:
+    def __init__(self, runtime):
+        self._settings = RUNTIMES[runtime]
+        self._imports = []
+        self._definitions = []
+        self._defined = {}
+        self._loaded = set()
+
+    # Collects the top-level definitions of the module after the ones of the
+    # local modules it imports, so that they are defined before their use.
+    def add_module(self, module):
+        if module in self._loaded:
+            return
+        self._loaded.add(module)
+        if module == "timing":
+            module = self._settings["timing"]
+
+        for node in _parse(module).body:
+            if isinstance(node, ast.ImportFrom) and _is_local(node.module):
+                self.add_module(node.module)
+            elif isinstance(node, ast.ImportFrom) and node.module == "abc":
+                continue
+            elif isinstance(node, (ast.Import, ast.ImportFrom)):
+                self._add_import(node)
+            elif isinstance(node, ast.Expr) and isinstance(node.value, ast.Constant):
+                continue
+            else:
+                self._add_definition(module, node)
+
+    def _add_import(self, node):
+        if isinstance(node, ast.ImportFrom):
+            names = [node.module]
+        else:
+            names = [alias.name for alias in node.names]
+        allowed = self._settings["modules"]
+        for name in names:
+            if allowed is not None and name.split(".")[0] not in allowed:
+                raise BundleError("the runtime does not provide " + name)
+        source = ast.unparse(node)
+        if source not in self._imports:
+            self._imports.append(source)
+
+    def _add_definition(self, module, node):
+        node = _StripAbstractMethods().visit(node)
+        if not self._settings["exact_float_literals"]:
+            node = _RelaxFloatEquality().visit(node)
+        for name in _defined_names(node):
+            if name in self._defined and self._defined[name][0] != module:
+                raise BundleError(
+                    name + " is defined in " + self._defined[name][0] + " and " + module
+                )
+            self._defined[name] = (module, node)
+        self._definitions.append(node)
+
+    # Keeps the definitions that the roots use directly or indirectly.
+    def _reachable(self, roots):
+        reachable = set()
+        pending = list(roots)
+        while pending:
+            name = pending.pop()
+            if name in reachable or name not in self._defined:
+                continue
+            reachable.add(name)
+            pending.extend(_used_names(self._defined[name][1]))
+        return reachable
+
+    def source(self, header, roots, main_call):
+        reachable = self._reachable(roots)
+        definitions = [
+            ast.unparse(node)
+            for node in self._definitions
+            if any(name in reachable for name in _defined_names(node))
+        ]
+        return (
+            header
+            + "\n".join(self._imports)
+            + "\n\n\n"
+            + "\n\n\n".join(definitions)
+            + "\n\n\n"
+            + main_call
+            + "\n"
+        )
+
+
+def _header(path):
+    lines = []
+    with open(path, encoding="utf-8") as source_file:
+        for line in source_file:
+            if not line.startswith("#"):
+                break
+            lines.append(line)
+    return "".join(lines)
+
+
+def bundle(runtime, name):
+    settings = RUNTIMES[runtime]
+    module = name.lower()
+    source_path = os.path.join(_BASE_DIR, module + ".py")
+
+    result = Bundle(runtime)
+    result.add_module(module)
+    result.add_module("run")
+
+    num_iterations = settings["iterations"].get(name, settings["default_iterations"])
+    header = (
+        _header(source_path)
+        + "#\n# Generated by benchmarks/Python/bundle.py from "
+        + module
+        + ".py for "
+        + runtime
+        + ". Do not edit.\n"
+    )
+    return result.source(
+        header,
+        [name, "main"],
+        "main(" + repr(name) + ", " + name + ", " + str(num_iterations) + ")",
+    )
+
+
+def output_path(runtime, name):
+    return os.path.join(_BASE_DIR, "..", runtime, name.lower() + ".py")
+
+
+def print_usage():
+    print("./bundle.py [--check] [runtime...]")
+    print()
+    print("Generates the single-file benchmarks of the constrained runtimes in")
+    print("../<runtime>/ from the benchmarks in this directory. The local")
+    print("imports are inlined, unused definitions are left out, and the")
+    print("harness is included with the timing module of the runtime.")
+    print()
+    print("  runtime - " + ", ".join(RUNTIMES) + ", default: all")
+    print()
+    print("Options:")
+    print("  --check - do not write the files, but exit with 1 if one of them")
+    print("            differs from the generated one")
+
+
+def main(args):
+    options = {}
+    runtimes = []
+    for arg in args[1:]:
+        if arg in ("-h", "--help"):
+            print_usage()
+            return 0
+        name = arg[2:]
+        if arg.startswith("--") and name in _BUNDLE_OPTIONS:
+            options[name] = True
+        elif arg.startswith("--") or arg not in RUNTIMES:
+            print("Unknown option or runtime: " + arg)
+            print_usage()
+            return 1
+        else:
+            runtimes.append(arg)
+
+    outdated = []
+    for runtime in runtimes or list(RUNTIMES):
+        for name in BENCHMARKS:
+            try:
+                source = bundle(runtime, name)
+            except BundleError as error:
+                print(runtime + ": " + name + ": " + str(error))
+                return 1
+
+            path = output_path(runtime, name)
+            if "check" in options:
+                if not os.path.exists(path):
+                    outdated.append(path)
+                    continue
+                with open(path, encoding="utf-8") as existing:
+                    if existing.read() != source:
+                        outdated.append(path)
+            else:
+                with open(path, "w", encoding="utf-8") as output:
+                    output.write(source)
+
+    for path in outdated:
+        print("Outdated: " + os.path.relpath(path))
+    return 1 if outdated else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,93 @@
+# Copyright (c) 2024 see AUTHORS.md file
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the 'Software'), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED 'AS IS', WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import time
+
+from stats import median
+
+CLOCKS = {
+    "perf_counter": time.perf_counter_ns,
+    "process_time": time.process_time_ns,
+}
+
+if hasattr(time, "thread_time_ns"):
+    CLOCKS["thread_time"] = time.thread_time_ns
+
+if hasattr(time, "CLOCK_MONOTONIC_RAW"):
+
+    def _monotonic_raw_ns():
+        return time.clock_gettime_ns(time.CLOCK_MONOTONIC_RAW)
+
+    CLOCKS["monotonic_raw"] = _monotonic_raw_ns
+
+
+def declared_resolution(name):
+    if name == "monotonic_raw":
+        return time.clock_getres(time.CLOCK_MONOTONIC_RAW)
+    return time.get_clock_info(name).resolution
+
+
+# the minimum number of samples, taken even if they exceed the time limit
+MIN_CALIBRATION_SAMPLES = 5
+
+
+class TimerCalibration:
+    # Each sample waits for the clock to step, which takes up to its
+    # resolution, so sampling stops after max_time_ns on coarse clocks.
+    def __init__(self, name, num_samples=10_000, max_time_ns=20_000_000):
+        clock = CLOCKS[name]
+        self.name = name
+        self.declared_resolution_ns = round(declared_resolution(name) * 1e9)
+
+        # overhead: the cost of a call, seen as the difference of back-to-back
+        # calls; resolution: the smallest non-zero step the clock makes
+        deltas = []
+        steps = []
+        start_time = time.perf_counter_ns()
+        for i in range(num_samples):
+            first = clock()
+            second = clock()
+            deltas.append(second - first)
+            while second == first:
+                second = clock()
+            steps.append(second - first)
+            if (
+                i + 1 >= MIN_CALIBRATION_SAMPLES
+                and time.perf_counter_ns() - start_time >= max_time_ns
+            ):
+                break
+
+        self.overhead_ns = round(median(deltas))
+        self.resolution_ns = min(steps)
+
+    # A timed region includes the overhead of one clock call. It is only
+    # subtracted from samples for which it is more than 0.1% of the time.
+    def correct(self, run_time):
+        if 0 < run_time < self.overhead_ns * 1000:
+            return max(run_time - self.overhead_ns, 0), True
+        return run_time, False
+
+
+_calibrations = {}
+
+
+def calibrate(name):
+    if name not in _calibrations:
+        _calibrations[name] = TimerCalibration(name)
+    return _calibrations[name]
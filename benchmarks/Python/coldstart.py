@@ -0,0 +1,194 @@
+# Copyright (c) 2024 see AUTHORS.md file
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the 'Software'), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED 'AS IS', WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+# The timestamps are taken first, before any import, and compared across
+# processes. This relies on perf_counter_ns() being a system-wide monotonic
+# clock, which it is on Linux, macOS, and Windows.
+from time import perf_counter_ns
+
+PROCESS_START = perf_counter_ns()
+
+# pylint: disable=wrong-import-position
+import os
+import subprocess
+import sys
+
+
+def _child(module, name, spawn_time, num_iterations, inner_iterations):
+    start_time = perf_counter_ns()
+    suite = getattr(__import__(module), name)
+    import_time = perf_counter_ns() - start_time
+
+    bench = suite()
+    run_times = []
+    for _ in range(num_iterations):
+        start_time = perf_counter_ns()
+        if not bench.inner_benchmark_loop(inner_iterations):
+            raise Exception("Benchmark failed with incorrect result")
+        run_times.append(perf_counter_ns() - start_time)
+
+    # imported only now to not affect the measured import time
+    from reporter import encode_value  # pylint: disable=import-outside-toplevel
+
+    print(
+        encode_value(
+            {
+                "startup_ns": PROCESS_START - spawn_time,
+                "import_ns": import_time,
+                "first_iteration_ns": run_times[0],
+                "steady_iteration_ns": (
+                    sum(run_times[1:]) / (len(run_times) - 1)
+                    if len(run_times) > 1
+                    else None
+                ),
+            }
+        )
+    )
+
+
+def measure_cold_starts(python, info, num_processes, num_iterations, inner_iterations):
+    # pylint: disable=import-outside-toplevel
+    from reporter import decode_value
+
+    results = []
+    for _ in range(num_processes):
+        spawn_time = perf_counter_ns()
+        output = subprocess.run(
+            [
+                python,
+                os.path.abspath(__file__),
+                "--child",
+                info.module,
+                info.name,
+                str(spawn_time),
+                str(num_iterations),
+                str(inner_iterations),
+            ],
+            check=True,
+            stdout=subprocess.PIPE,
+            text=True,
+        ).stdout
+        result = decode_value(output.strip().splitlines()[-1])
+        result["process_ns"] = perf_counter_ns() - spawn_time
+        results.append(result)
+    return results
+
+
+def _us(value):
+    if value is None:
+        return "-"
+    return str(round(value / 1000)) + "us"
+
+
+def print_report(name, results):
+    # pylint: disable=import-outside-toplevel
+    from stats import mean, median
+
+    print(name + ": processes=" + str(len(results)))
+    for key, label in (
+        ("startup_ns", "startup"),
+        ("import_ns", "import"),
+        ("first_iteration_ns", "first-iteration"),
+        ("steady_iteration_ns", "steady-iteration"),
+        ("process_ns", "process"),
+    ):
+        values = [result[key] for result in results if result[key] is not None]
+        if values:
+            print(
+                name
+                + ": "
+                + label
+                + ": median: "
+                + _us(median(values))
+                + " mean: "
+                + _us(mean(values))
+                + " min: "
+                + _us(min(values))
+            )
+    print()
+
+
+def print_usage():
+    print("./coldstart.py [options] benchmark [num-iterations [inner-iter]]")
+    print()
+    print("Runs each benchmark in fresh interpreters, and reports the time for")
+    print("interpreter startup, the import of the benchmark module, the first")
+    print("iteration, and the average of the remaining iterations.")
+    print()
+    print("  benchmark      - benchmark class name, or a selection such as")
+    print("                   CD,Havlak, macro, micro, or all")
+    print("  num-iterations - number of iterations per process, default: 2")
+    print("  inner-iter     - number of times the benchmark is executed in an")
+    print("                   inner loop, default: 1;")
+    print("                   `default` selects the problem size of rebench.conf")
+    print()
+    print("Options:")
+    print("  --processes=n  - number of fresh processes, default: 10")
+    print("  --python=path  - interpreter to measure, default: this one")
+
+
+def main(args):
+    # pylint: disable=import-outside-toplevel
+    from registry import REGISTRY, UnknownBenchmarkError
+
+    options = dict(arg[2:].partition("=")[::2] for arg in args if arg[:2] == "--")
+    args = [arg for arg in args if arg[:2] != "--"]
+    if len(args) < 2:
+        print_usage()
+        return 1
+
+    try:
+        selected = REGISTRY.select(args[1])
+    except UnknownBenchmarkError as error:
+        print(error)
+        return 1
+
+    num_iterations = int(args[2]) if len(args) > 2 else 2
+    for info in selected:
+        if len(args) > 3 and args[3] == "default":
+            inner_iterations = info.default_size()
+        else:
+            inner_iterations = int(args[3]) if len(args) > 3 else 1
+
+        try:
+            results = measure_cold_starts(
+                options.get("python", sys.executable),
+                info,
+                int(options.get("processes", 10)),
+                num_iterations,
+                inner_iterations,
+            )
+        except subprocess.CalledProcessError:
+            print(info.name + ": failed")
+            return 1
+        print_report(info.name, results)
+    return 0
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 7 and sys.argv[1] == "--child":
+        _child(
+            sys.argv[2],
+            sys.argv[3],
+            int(sys.argv[4]),
+            int(sys.argv[5]),
+            int(sys.argv[6]),
+        )
+    else:
+        sys.exit(main(sys.argv))
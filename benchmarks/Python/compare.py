@@ -0,0 +1,196 @@
+# Copyright (c) 2024 see AUTHORS.md file
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the 'Software'), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED 'AS IS', WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import math
+import re
+import sys
+
+from reporter import read_records
+from stats import bootstrap_ratio_ci, mann_whitney_u, median, ratio
+
+_COMPARE_OPTIONS = ("threshold", "alpha", "skip")
+
+_ITERATION_LINE = re.compile(r"^(\S+): iterations=1 runtime: (\d+)us$")
+
+
+# Reads the run times in nanoseconds per benchmark from either the JSON
+# records of --json-lines, without the warmup iterations if a steady state
+# was detected, or the text output of the harness.
+def read_run_times(path):
+    with open(path, encoding="utf-8") as stream:
+        first_line = stream.readline()
+
+    run_times = {}
+    if first_line.startswith("{"):
+        for record in read_records(path):
+            if record.get("type") == "iteration" and record.get("phase") != "warmup":
+                run_times.setdefault(record["benchmark"], []).append(
+                    record["run_time_ns"]
+                )
+        return run_times
+
+    with open(path, encoding="utf-8") as stream:
+        for line in stream:
+            match = _ITERATION_LINE.match(line.strip())
+            if match:
+                run_times.setdefault(match.group(1), []).append(
+                    int(match.group(2)) * 1000
+                )
+    return run_times
+
+
+class Comparison:
+    def __init__(self, name, old, new):
+        self.name = name
+        self.old_median = median(old)
+        self.new_median = median(new)
+        self.ratio = ratio(self.new_median, self.old_median)
+        self.ci_low, self.ci_high = bootstrap_ratio_ci(old, new)
+        _, self.p_value, self.effect_size = mann_whitney_u(old, new)
+
+    def is_significant(self, alpha):
+        return self.p_value < alpha
+
+    # a regression is only reported if it is significant, and even the
+    # lower bound of the ratio's confidence interval exceeds the threshold
+    def is_regression(self, alpha, threshold):
+        return self.is_significant(alpha) and self.ci_low > 1 + threshold
+
+    def is_speedup(self, alpha, threshold):
+        return self.is_significant(alpha) and self.ci_high < 1 - threshold
+
+
+def compare(old_run_times, new_run_times, skip=0):
+    comparisons = []
+    for name in sorted(old_run_times.keys() & new_run_times.keys()):
+        old = old_run_times[name][skip:]
+        new = new_run_times[name][skip:]
+        if old and new:
+            comparisons.append(Comparison(name, old, new))
+    return comparisons
+
+
+def _format_ratio(value):
+    if math.isnan(value):
+        return "n/a"
+    return format(value, ".3f")
+
+
+def print_comparisons(comparisons, alpha, threshold):
+    print(
+        "Benchmark".ljust(16)
+        + "Old".rjust(12)
+        + "New".rjust(12)
+        + "Ratio".rjust(8)
+        + "   95% CI".ljust(17)
+        + "p-value".rjust(9)
+        + "Delta".rjust(7)
+        + "  Change"
+    )
+    significant = [c for c in comparisons if c.is_significant(alpha)]
+    # undefined ratios, i.e., both medians 0, are listed last
+    for comparison in sorted(
+        significant, key=lambda c: -c.ratio if not math.isnan(c.ratio) else math.inf
+    ):
+        if comparison.is_regression(alpha, threshold):
+            change = "regression"
+        elif comparison.is_speedup(alpha, threshold):
+            change = "speedup"
+        else:
+            change = "below threshold"
+        print(
+            comparison.name.ljust(16)
+            + (str(round(comparison.old_median / 1000)) + "us").rjust(12)
+            + (str(round(comparison.new_median / 1000)) + "us").rjust(12)
+            + _format_ratio(comparison.ratio).rjust(8)
+            + "   ["
+            + _format_ratio(comparison.ci_low)
+            + ", "
+            + _format_ratio(comparison.ci_high)
+            + "]"
+            + format(comparison.p_value, ".4f").rjust(9)
+            + format(comparison.effect_size, ".2f").rjust(7)
+            + "  "
+            + change
+        )
+    print()
+    print(
+        str(len(comparisons) - len(significant))
+        + " of "
+        + str(len(comparisons))
+        + " benchmarks without significant change"
+    )
+
+
+def print_usage():
+    print("./compare.py [options] old-results new-results")
+    print()
+    print("Compares the run times of the benchmarks in both result files, which")
+    print("are either the output of harness.py or the records of --json-lines.")
+    print("Lists the significant changes, ranked from the largest regression")
+    print("to the largest speedup, with the ratio new/old of the medians, its")
+    print("bootstrap confidence interval, the p-value of a Mann-Whitney U test,")
+    print("and Cliff's delta as effect size.")
+    print()
+    print("Options:")
+    print("  --threshold=pct - exit with 1 if the ratio's confidence interval")
+    print("                    of a significant change is above 1 + pct/100,")
+    print("                    default: 5")
+    print("  --alpha=p       - significance level, default: 0.05")
+    print("  --skip=n        - ignore the first n iterations of each benchmark")
+    print("                    as warmup, default: 0")
+
+
+def main(args):
+    options = {}
+    positional = []
+    for arg in args[1:]:
+        if arg in ("-h", "--help"):
+            print_usage()
+            return 0
+        name, _, value = arg[2:].partition("=")
+        if arg.startswith("--") and name in _COMPARE_OPTIONS:
+            options[name] = value
+        elif arg.startswith("--"):
+            print("Unknown option: " + arg)
+            print_usage()
+            return 1
+        else:
+            positional.append(arg)
+
+    if len(positional) != 2:
+        print_usage()
+        return 1
+
+    threshold = float(options.get("threshold", 5)) / 100
+    alpha = float(options.get("alpha", 0.05))
+    comparisons = compare(
+        read_run_times(positional[0]),
+        read_run_times(positional[1]),
+        int(options.get("skip", 0)),
+    )
+    print_comparisons(comparisons, alpha, threshold)
+
+    if any(c.is_regression(alpha, threshold) for c in comparisons):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,313 @@
+# Copyright (c) 2024 see AUTHORS.md file
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the 'Software'), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED 'AS IS', WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import math
+import os
+import shutil
+import subprocess
+import sys
+
+from bundle import output_path
+from executor import parse_rebench_log
+from registry import REGISTRY, UnknownBenchmarkError
+from stats import mean, median
+
+_BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+_CROSS_RUNTIME_OPTIONS = (
+    "cpython",
+    "pypy",
+    "micropython",
+    "rustpython",
+    "runtimes",
+    "skip",
+    "timeout",
+)
+
+# CPython and PyPy run the benchmarks in this directory with harness.py, the
+# others the single-file variants generated by bundle.py. Pyodide is left
+# out, because it runs in a browser or Node.js, not as a local interpreter.
+RUNTIMES = {
+    "CPython": {
+        "implementation": "cpython",
+        "executables": ("python3", "python"),
+        "variants": None,
+    },
+    "PyPy": {
+        "implementation": "pypy",
+        "executables": ("pypy3", "pypy"),
+        "variants": None,
+    },
+    "MicroPython": {
+        "implementation": "micropython",
+        "executables": ("micropython",),
+        "variants": "MicroPython",
+    },
+    "RustPython": {
+        "implementation": "rustpython",
+        "executables": ("rustpython",),
+        "variants": "RustPython",
+    },
+}
+
+BASELINE = "CPython"
+
+
+def implementation_of(executable):
+    try:
+        result = subprocess.run(
+            [executable, "-c", "import sys; print(sys.implementation.name)"],
+            check=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            timeout=60,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip()
+
+
+# Finds the first candidate executable of each runtime that is the expected
+# implementation, e.g., so that a python3 that is PyPy is not taken as CPython.
+def find_runtimes(paths, names=None):
+    found = {}
+    for runtime, settings in RUNTIMES.items():
+        if names is not None and runtime not in names:
+            continue
+        if runtime.lower() in paths:
+            candidates = [paths[runtime.lower()]]
+        else:
+            candidates = [shutil.which(name) for name in settings["executables"]]
+            if sys.implementation.name == settings["implementation"]:
+                candidates.insert(0, sys.executable)
+
+        for candidate in candidates:
+            if (
+                candidate is not None
+                and implementation_of(candidate) == settings["implementation"]
+            ):
+                found[runtime] = candidate
+                break
+    return found
+
+
+def command(runtime, executable, name, num_iterations, inner_iterations):
+    variants = RUNTIMES[runtime]["variants"]
+    if variants is None:
+        args = [executable, os.path.join(_BASE_DIR, "harness.py"), name]
+    else:
+        script = output_path(variants, name)
+        if not os.path.exists(script):
+            return None
+        args = [executable, script]
+    return args + [str(num_iterations), str(inner_iterations)]
+
+
+class RuntimeResult:
+    def __init__(self, run_times_ms=None, error=None):
+        self.run_times_ms = run_times_ms
+        self.error = error
+
+    def median(self, skip):
+        if not self.run_times_ms or len(self.run_times_ms) <= skip:
+            return None
+        return median(self.run_times_ms[skip:])
+
+
+def run_benchmark(
+    runtime, executable, name, num_iterations, *, inner_iterations, timeout
+):
+    args = command(runtime, executable, name, num_iterations, inner_iterations)
+    if args is None:
+        return RuntimeResult(error="-")
+    try:
+        result = subprocess.run(
+            args,
+            check=False,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            timeout=timeout,
+        )
+    except subprocess.TimeoutExpired:
+        return RuntimeResult(error="timeout")
+    if result.returncode != 0:
+        return RuntimeResult(error="failed")
+    return RuntimeResult(parse_rebench_log(result.stdout))
+
+
+def _geometric_mean(values):
+    return math.exp(mean([math.log(value) for value in values]))
+
+
+# Prints the median run time of the baseline, and the ratio of the median of
+# each other runtime to it, i.e., values below 1 are faster than the baseline.
+def print_table(runtimes, results, skip):
+    print(
+        "Benchmark".ljust(12)
+        + "".join(runtime.rjust(13) for runtime in runtimes)
+        + "  (median of "
+        + BASELINE
+        + ", others relative to it)"
+    )
+    ratios = {runtime: [] for runtime in runtimes}
+    for name, by_runtime in results.items():
+        baseline = by_runtime[BASELINE].median(skip)
+        line = name.ljust(12)
+        for runtime in runtimes:
+            result = by_runtime[runtime]
+            value = result.median(skip)
+            if result.error is not None:
+                cell = result.error
+            elif value is None:
+                cell = "no results"
+            elif runtime == BASELINE:
+                cell = str(round(value * 1000)) + "us"
+            elif baseline is None:
+                cell = "-"
+            else:
+                ratios[runtime].append(value / baseline)
+                cell = format(value / baseline, ".2f")
+            line += cell.rjust(13)
+        print(line)
+
+    line = "geomean".ljust(12)
+    for runtime in runtimes:
+        if runtime == BASELINE:
+            cell = "1.00"
+        elif ratios[runtime]:
+            cell = format(_geometric_mean(ratios[runtime]), ".2f")
+        else:
+            cell = "-"
+        line += cell.rjust(13)
+    print(line)
+
+
+def print_usage():
+    print("./cross_runtime.py [options] [benchmark] [num-iterations [inner-iter]]")
+    print()
+    print("Runs the benchmarks on each locally installed runtime with the same")
+    print("number of iterations and inner iterations, and prints a table of the")
+    print("median run times relative to " + BASELINE + ". The runtimes are found")
+    print("on the PATH: " + ", ".join(RUNTIMES) + ".")
+    print()
+    print("  benchmark      - benchmark class name, or a selection such as")
+    print("                   CD,Havlak, macro, micro, or all (default)")
+    print("  num-iterations - number of iterations per runtime, default: 10")
+    print("  inner-iter     - number of times the benchmark is executed in an")
+    print("                   inner loop, default: 1;")
+    print("                   `default` selects the problem size of rebench.conf")
+    print()
+    print("Options:")
+    print("  --cpython=path, --pypy=path, --micropython=path, --rustpython=path")
+    print("                  - executable of the runtime, default: from the PATH")
+    print("  --runtimes=names - comma-separated runtimes, default: all found")
+    print("  --skip=n         - ignore the first n iterations as warmup,")
+    print("                     default: 0")
+    print("  --timeout=s      - stop a benchmark run after s seconds")
+
+
+# Returns None, after saying so, for text that is not a finite number of at
+# least the minimum
+def _parse_number(description, text, convert, minimum):
+    try:
+        number = convert(text)
+    except ValueError:
+        number = None
+    if number is None or not math.isfinite(number) or number < minimum:
+        print("Invalid value for " + description + ": " + text)
+        return None
+    return number
+
+
+def main(args):
+    options = {}
+    positional = []
+    for arg in args[1:]:
+        if arg in ("-h", "--help"):
+            print_usage()
+            return 0
+        name, _, value = arg[2:].partition("=")
+        if arg.startswith("--") and name in _CROSS_RUNTIME_OPTIONS:
+            options[name] = value
+        elif arg.startswith("--"):
+            print("Unknown option: " + arg)
+            print_usage()
+            return 1
+        else:
+            positional.append(arg)
+
+    try:
+        selected = REGISTRY.select(positional[0] if positional else "all")
+    except UnknownBenchmarkError as error:
+        print(error)
+        return 1
+
+    num_iterations = 10
+    if len(positional) > 1:
+        num_iterations = _parse_number("num-iterations", positional[1], int, 1)
+    inner = 1
+    if len(positional) > 2 and positional[2] != "default":
+        inner = _parse_number("inner-iter", positional[2], int, 1)
+    timeout = None
+    if "timeout" in options:
+        timeout = _parse_number("--timeout", options["timeout"], float, 0)
+    skip = _parse_number("--skip", options.get("skip", "0"), int, 0)
+    if None in (num_iterations, inner, skip) or (
+        "timeout" in options and timeout is None
+    ):
+        print_usage()
+        return 1
+
+    names = None
+    if "runtimes" in options:
+        names = options["runtimes"].split(",") + [BASELINE]
+    runtimes = find_runtimes(options, names)
+    if BASELINE not in runtimes:
+        print(BASELINE + " not found, use --" + BASELINE.lower() + "=path")
+        return 1
+    for runtime, executable in runtimes.items():
+        print(runtime + ": " + executable)
+    print()
+
+    results = {}
+    for info in selected:
+        if len(positional) > 2 and positional[2] == "default":
+            inner_iterations = info.default_size()
+        else:
+            inner_iterations = inner
+        results[info.name] = {
+            runtime: run_benchmark(
+                runtime,
+                executable,
+                info.name,
+                num_iterations,
+                inner_iterations=inner_iterations,
+                timeout=timeout,
+            )
+            for runtime, executable in runtimes.items()
+        }
+
+    print_table(list(runtimes), results, skip)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
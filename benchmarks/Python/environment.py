@@ -0,0 +1,183 @@
+# Copyright (c) 2024 see AUTHORS.md file
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the 'Software'), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED 'AS IS', WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import ctypes
+import os
+import sys
+
+_CPU_DIR = "/sys/devices/system/cpu/"
+
+# personality(2) flag that disables address space layout randomization
+_ADDR_NO_RANDOMIZE = 0x0040000
+
+REEXEC_VARIABLE = "AWFY_ISOLATED"
+
+
+def _read(path):
+    try:
+        with open(path, encoding="utf-8") as state_file:
+            return state_file.read().strip()
+    except OSError:
+        return None
+
+
+def parse_cpu_list(text):
+    # imported here, as parallel imports multiprocessing
+    from parallel import parse_cores  # pylint: disable=import-outside-toplevel
+
+    return parse_cores(text) if text else []
+
+
+def available_cores():
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+# Reads the Linux state that makes results drift between hosts and runs.
+# Settings that cannot be read, e.g., without cpufreq in a virtual machine,
+# or on other systems, are left out.
+def audit_environment():
+    cores = available_cores()
+    environment = {"cores": cores}
+
+    governors = sorted(
+        {
+            governor
+            for governor in (
+                _read(_CPU_DIR + "cpu" + str(core) + "/cpufreq/scaling_governor")
+                for core in cores
+            )
+            if governor is not None
+        }
+    )
+    if governors:
+        environment["scaling_governor"] = ",".join(governors)
+
+    no_turbo = _read(_CPU_DIR + "intel_pstate/no_turbo")
+    boost = _read(_CPU_DIR + "cpufreq/boost")
+    if no_turbo is not None:
+        environment["turbo"] = no_turbo == "0"
+    elif boost is not None:
+        environment["turbo"] = boost == "1"
+
+    smt_active = _read(_CPU_DIR + "smt/active")
+    if smt_active is not None:
+        environment["smt_active"] = smt_active == "1"
+    if len(cores) == 1:
+        siblings = _read(
+            _CPU_DIR + "cpu" + str(cores[0]) + "/topology/thread_siblings_list"
+        )
+        if siblings is not None:
+            environment["smt_siblings"] = [
+                cpu for cpu in parse_cpu_list(siblings) if cpu != cores[0]
+            ]
+
+    isolated = _read(_CPU_DIR + "isolated")
+    if isolated is not None:
+        environment["isolated_cores"] = parse_cpu_list(isolated)
+
+    randomize_va_space = _read("/proc/sys/kernel/randomize_va_space")
+    if randomize_va_space is not None:
+        environment["randomize_va_space"] = int(randomize_va_space)
+    environment["aslr_disabled_for_process"] = _aslr_disabled_for_process()
+
+    if hasattr(os, "getloadavg"):
+        environment["load_average"] = list(os.getloadavg())
+    environment["warnings"] = environment_warnings(environment)
+    return environment
+
+
+def environment_warnings(environment):
+    warnings = []
+    governor = environment.get("scaling_governor")
+    if governor is not None and governor != "performance":
+        warnings.append("CPU frequency governor is " + governor + ", not performance")
+    if environment.get("turbo"):
+        warnings.append("turbo boost is enabled")
+    if environment.get("smt_siblings"):
+        warnings.append(
+            "SMT siblings of the pinned core are online: "
+            + ", ".join(str(cpu) for cpu in environment["smt_siblings"])
+        )
+    if len(environment["cores"]) > 1:
+        warnings.append("the process is not pinned to a core")
+    if (
+        environment.get("randomize_va_space", 0) != 0
+        and not environment["aslr_disabled_for_process"]
+    ):
+        warnings.append("address space layout randomization is enabled")
+    load = environment.get("load_average")
+    if load is not None and load[0] > 1:
+        warnings.append("load average is " + format(load[0], ".2f"))
+    return warnings
+
+
+def _personality():
+    if not sys.platform.startswith("linux"):
+        return None
+    libc = ctypes.CDLL(None, use_errno=True)
+    # 0xffffffff queries the persona without changing it
+    persona = libc.personality(ctypes.c_ulong(0xFFFFFFFF))
+    if persona < 0:
+        return None
+    return libc, persona
+
+
+def _aslr_disabled_for_process():
+    personality = _personality()
+    return personality is not None and bool(personality[1] & _ADDR_NO_RANDOMIZE)
+
+
+# Prefers the isolated cores (isolcpus) that are online, and otherwise the
+# last core of the affinity mask, which usually handles the fewest
+# interrupts. Isolated cores are usually not in the inherited affinity mask,
+# so they are not filtered by it.
+def choose_core():
+    isolated = parse_cpu_list(_read(_CPU_DIR + "isolated") or "")
+    online = _read(_CPU_DIR + "online")
+    if online is not None:
+        online_cores = parse_cpu_list(online)
+        isolated = [core for core in isolated if core in online_cores]
+    return (isolated or available_cores())[-1]
+
+
+# Replaces the process with a new instance of the same command, with ASLR
+# disabled and pinned to the core. Both are inherited across exec. The
+# environment variable marks the new instance, so that it runs as is.
+def reexec_isolated(args, core=None):
+    if os.environ.get(REEXEC_VARIABLE):
+        return
+    if not hasattr(os, "sched_setaffinity"):
+        print("Isolating the benchmark requires Linux", file=sys.stderr)
+        return
+
+    if core is None:
+        core = choose_core()
+    os.sched_setaffinity(0, {core})
+
+    personality = _personality()
+    if personality is not None:
+        libc, persona = personality
+        if libc.personality(ctypes.c_ulong(persona | _ADDR_NO_RANDOMIZE)) < 0:
+            print("Could not disable ASLR", file=sys.stderr)
+
+    os.environ[REEXEC_VARIABLE] = str(core)
+    sys.stdout.flush()
+    os.execv(sys.executable, [sys.executable] + args)
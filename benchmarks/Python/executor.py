@@ -0,0 +1,400 @@
+# Copyright (c) 2024 see AUTHORS.md file
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the 'Software'), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED 'AS IS', WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import os
+import platform
+import queue
+import re
+import signal
+import subprocess
+import sys
+import threading
+from datetime import datetime, timezone
+
+from parallel import parse_cores
+from rebench_conf import ConfError, DEFAULT_CONF, benchmark_entries, load_conf
+
+_EXECUTOR_OPTIONS = ("conf", "data-file", "cores", "executor", "suite", "dry-run")
+
+_RUN_SETTINGS = ("invocations", "iterations", "warmup", "max_invocation_time")
+
+# the log format of the harnesses, as parsed by ReBench's RebenchLog adapter
+_REBENCH_LOG = re.compile(
+    r"^(?:.*: )?(\S+)( [\w.]+)?: iterations=([0-9]+) "
+    r"runtime: (?P<runtime>[0-9]+)(?P<unit>[a-zA-Z]+)"
+)
+
+_DATA_COLUMNS = (
+    "invocation",
+    "iteration",
+    "value",
+    "unit",
+    "criterion",
+    "benchmark",
+    "executor",
+    "suite",
+    "extraArgs",
+    "cores",
+    "inputSize",
+    "varValue",
+    "tag",
+    "machine",
+    "runId",
+)
+
+
+# A run is a benchmark with its suite, executor, and variable value, as
+# ReBench expands them from the experiments. Each run is executed with the
+# given number of invocations, i.e., processes.
+class BenchmarkRun:
+    def __init__(self, executor, suite, benchmark, settings):
+        self.executor = executor
+        self.suite = suite
+        self.benchmark = benchmark
+        self.extra_args = ""
+        self.variable = ""
+        self.cores = 1
+        self.input_size = ""
+        self.settings = settings
+        self.command = None
+        self.location = None
+
+    def describe(self):
+        return " ".join(
+            part
+            for part in (self.executor, self.suite, self.benchmark, self.extra_args)
+            if part
+        )
+
+
+class InvocationResult:
+    def __init__(self, run, invocation):
+        self.run = run
+        self.invocation = invocation
+        self.run_times_ms = []
+        self.status = None
+        self.output = ""
+
+
+def _as_list(value):
+    if value is None:
+        return []
+    if isinstance(value, list):
+        return value
+    return [value]
+
+
+def _run_settings(*levels):
+    settings = {"invocations": 1, "iterations": 1}
+    for level in levels:
+        for key in _RUN_SETTINGS:
+            if level and level.get(key) is not None:
+                settings[key] = level[key]
+    return settings
+
+
+# Yields (experiment, executor, suite) for the executions of the experiment,
+# where an execution may name its own suites instead of the experiment's.
+def _executions(experiment):
+    for execution in _as_list(experiment.get("executions")):
+        if isinstance(execution, dict):
+            for executor, details in execution.items():
+                suites = (details or {}).get("suites", experiment.get("suites"))
+                for suite in _as_list(suites):
+                    yield executor, suite
+        else:
+            for suite in _as_list(experiment.get("suites")):
+                yield execution, suite
+
+
+def _command(conf_dir, executor, suite, run):
+    if executor.get("path"):
+        executable = os.path.join(conf_dir, executor["path"], executor["executable"])
+    else:
+        executable = executor["executable"]
+    substitutions = {
+        "benchmark": run.benchmark,
+        "variable": run.variable,
+        "cores": run.cores,
+        "input": run.input_size,
+        "iterations": run.settings["iterations"],
+        "warmup": run.settings.get("warmup", 0),
+    }
+    parts = [
+        executable,
+        str(executor.get("args", "")).strip(),
+        (suite.get("command", "") % substitutions).strip(),
+        str(run.extra_args),
+    ]
+    return " ".join(part for part in parts if part)
+
+
+def expand_runs(conf, conf_dir, experiments=None):
+    if not experiments:
+        experiments = [conf.get("default_experiment", "all")]
+    if "all" in experiments:
+        experiments = list(conf.get("experiments", {}))
+
+    suites = conf.get("benchmark_suites", {})
+    executors = conf.get("executors", {})
+    runs = []
+    for experiment_name in experiments:
+        if experiment_name not in conf.get("experiments", {}):
+            raise ConfError("Unknown experiment: " + experiment_name)
+        experiment = conf["experiments"][experiment_name]
+        for executor_name, suite_name in _executions(experiment):
+            if executor_name not in executors:
+                raise ConfError("Unknown executor: " + executor_name)
+            if suite_name not in suites:
+                raise ConfError("Unknown benchmark suite: " + suite_name)
+            executor = executors[executor_name]
+            suite = suites[suite_name]
+
+            for name, details in benchmark_entries(suite.get("benchmarks")):
+                for variable in _as_list(suite.get("variable_values")) or [""]:
+                    run = BenchmarkRun(
+                        executor_name,
+                        suite_name,
+                        name,
+                        _run_settings(
+                            conf.get("runs"), experiment, executor, suite, details
+                        ),
+                    )
+                    run.extra_args = str(details.get("extra_args", ""))
+                    run.variable = str(variable)
+                    run.command = _command(conf_dir, executor, suite, run)
+                    run.location = os.path.join(conf_dir, suite.get("location", ""))
+                    runs.append(run)
+    return runs
+
+
+def parse_rebench_log(output):
+    run_times = []
+    for line in output.splitlines():
+        match = _REBENCH_LOG.match(line)
+        if match is None:
+            continue
+        value = float(match.group("runtime"))
+        if match.group("unit") == "us":
+            value /= 1000
+        run_times.append(value)
+    return run_times
+
+
+def run_invocation(result):
+    run = result.run
+    # pylint: disable-next=consider-using-with
+    process = subprocess.Popen(
+        run.command,
+        shell=True,
+        cwd=run.location,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        start_new_session=True,
+    )
+
+    max_time = run.settings.get("max_invocation_time")
+    try:
+        result.output, _ = process.communicate(
+            timeout=max_time if max_time and max_time > 0 else None
+        )
+    except subprocess.TimeoutExpired:
+        os.killpg(process.pid, signal.SIGKILL)
+        result.output, _ = process.communicate()
+        result.status = "timeout"
+
+    result.run_times_ms = parse_rebench_log(result.output)
+    if result.status is None:
+        if process.returncode != 0 or not result.run_times_ms:
+            result.status = "failed"
+        else:
+            result.status = "ok"
+
+
+class DataFile:
+    def __init__(self, path):
+        self._path = path
+        self._lock = threading.Lock()
+        self._machine = platform.node()
+        with open(path, "a", encoding="utf-8") as data_file:
+            data_file.write(
+                "# Execution start: "
+                + datetime.now(timezone.utc).isoformat(timespec="seconds")
+                + "\n# "
+                + "\t".join(_DATA_COLUMNS)
+                + "\n"
+            )
+
+    def write(self, result):
+        run = result.run
+        lines = []
+        for iteration, value in enumerate(result.run_times_ms):
+            fields = (
+                result.invocation,
+                iteration + 1,
+                value,
+                "ms",
+                "total",
+                run.benchmark,
+                run.executor,
+                run.suite,
+                run.extra_args,
+                run.cores,
+                run.input_size,
+                run.variable,
+                "",
+                self._machine,
+                run.describe(),
+            )
+            lines.append("\t".join(str(field) for field in fields) + "\n")
+        with self._lock:
+            with open(self._path, "a", encoding="utf-8") as data_file:
+                data_file.writelines(lines)
+
+
+# Each core has a worker thread that takes the next invocation from the
+# queue and runs it pinned to its core, so that invocations run in parallel
+# without sharing cores. The worker thread pins itself, as sched_setaffinity
+# of pid 0 applies to the calling thread only, so that the shell and the
+# benchmark inherit the core from the start. Pinning the child after Popen
+# would race with the shell, and preexec_fn is not safe with threads.
+def run_invocations(runs, cores, data_file):
+    jobs = queue.Queue()
+    results = []
+    for run in runs:
+        for invocation in range(run.settings["invocations"]):
+            result = InvocationResult(run, invocation + 1)
+            results.append(result)
+            jobs.put(result)
+
+    print_lock = threading.Lock()
+
+    def worker(core):
+        if core is not None:
+            os.sched_setaffinity(0, {core})
+        while True:
+            try:
+                result = jobs.get_nowait()
+            except queue.Empty:
+                return
+            run_invocation(result)
+            data_file.write(result)
+            with print_lock:
+                print(
+                    result.run.describe()
+                    + " #"
+                    + str(result.invocation)
+                    + ": "
+                    + result.status
+                    + ", "
+                    + str(len(result.run_times_ms))
+                    + " iterations"
+                )
+                if result.status != "ok":
+                    print(result.output)
+
+    threads = [threading.Thread(target=worker, args=(core,)) for core in cores]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def print_usage():
+    print("./executor.py [options] [experiment...]")
+    print()
+    print("Runs the experiments of a ReBench configuration without ReBench, and")
+    print("writes the results as a ReBench data file. Invocations run in")
+    print("parallel, each pinned to one of the cores.")
+    print()
+    print("  experiment - experiments to run, default: the default_experiment,")
+    print("               `all` selects all experiments")
+    print()
+    print("Options:")
+    print("  --conf=file      - ReBench configuration, default: rebench.conf")
+    print("  --data-file=file - data file to append to, default: the")
+    print("                     default_data_file of the configuration")
+    print("  --cores=list     - cores to use, e.g., 0,2-3, default: all cores")
+    print("                     available to the process")
+    print("  --executor=name  - run only the executions of this executor")
+    print("  --suite=name     - run only the benchmarks of this suite")
+    print("  --dry-run        - print the commands without running them")
+
+
+def main(args):
+    options = {}
+    experiments = []
+    for arg in args[1:]:
+        if arg in ("-h", "--help"):
+            print_usage()
+            return 0
+        name, _, value = arg[2:].partition("=")
+        if arg.startswith("--") and name in _EXECUTOR_OPTIONS:
+            options[name] = value
+        elif arg.startswith("--"):
+            print("Unknown option: " + arg)
+            print_usage()
+            return 1
+        else:
+            experiments.append(arg)
+
+    conf_path = options.get("conf", DEFAULT_CONF)
+    try:
+        conf = load_conf(conf_path)
+        runs = expand_runs(
+            conf, os.path.dirname(os.path.abspath(conf_path)), experiments
+        )
+    except ConfError as error:
+        print(error)
+        return 1
+
+    runs = [
+        run
+        for run in runs
+        if options.get("executor", run.executor) == run.executor
+        and options.get("suite", run.suite) == run.suite
+    ]
+    if "dry-run" in options:
+        for run in runs:
+            print("cd " + run.location + " && " + run.command)
+        return 0
+
+    if "cores" in options:
+        cores = parse_cores(options["cores"])
+    elif hasattr(os, "sched_getaffinity"):
+        cores = sorted(os.sched_getaffinity(0))
+    else:
+        cores = [None]
+    if not hasattr(os, "sched_setaffinity"):
+        cores = [None] * len(cores)
+
+    data_file = DataFile(
+        options.get("data-file") or conf.get("default_data_file", "benchmark.data")
+    )
+    results = run_invocations(runs, cores, data_file)
+
+    if all(result.status == "ok" for result in results):
+        return 0
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -19,37 +19,251 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
+import math
 import sys
 
+from clocks import CLOCKS
+from registry import REGISTRY, UnknownBenchmarkError
+from reporter import JsonLinesReporter, TextReporter
 from run import Run
 
 
-def process_arguments(args):
-    new_run = Run(args[1])
+# Exits with the usage for values that are not numbers, or below the minimum
+def parse_number(name, value, convert, minimum):
+    try:
+        number = convert(value)
+    except ValueError:
+        number = None
+    if number is None or not math.isfinite(number) or number < minimum:
+        print("Invalid value for --" + name + ": " + value)
+        print_usage()
+        sys.exit(1)
+    return number
+
+
+# The modules of the probes are imported only when they are used, to keep
+# them out of the startup of plain runs.
+def apply_option(new_run, option, options):
+    # pylint: disable=import-outside-toplevel
+    name, _, value = option[2:].partition("=")
+
+    if name == "json-lines":
+        if value in ("", "-"):
+            new_run.set_reporters([JsonLinesReporter()])
+        else:
+            new_run.set_reporters([TextReporter(), JsonLinesReporter(value)])
+    elif name == "memory":
+        from probes import MemoryProbe
+
+        new_run.add_probe(MemoryProbe())
+    elif name == "gc":
+        if value not in ("disable", "trace"):
+            print("Unknown GC mode: " + value)
+            print_usage()
+            sys.exit(1)
+        from probes import GcProbe
+
+        new_run.add_probe(GcProbe(value))
+    elif name == "som-counters":
+        from probes import SomCounterProbe
+
+        new_run.add_probe(SomCounterProbe())
+    elif name == "perf-counters":
+        from perf_counters import PerfCounterProbe
+
+        new_run.add_probe(PerfCounterProbe())
+    elif name == "profile":
+        from profiler import CProfileProbe, SamplingProbe
+
+        output_dir = options.get("profile-dir", ".")
+        if value in ("", "cprofile"):
+            new_run.add_probe(CProfileProbe(new_run, output_dir))
+        elif value == "sampling":
+            new_run.add_probe(SamplingProbe(new_run, output_dir))
+        else:
+            print("Unknown profiler: " + value)
+            sys.exit(1)
+    elif name == "profile-dir":
+        pass
+    elif name == "autorange":
+        if new_run.has_problem_size():
+            print(
+                new_run.name
+                + ": --autorange is ignored, as inner-iter is the problem size"
+            )
+        else:
+            target_ms = parse_number(name, value or "100", float, 0)
+            new_run.set_autorange(int(target_ms * 1_000_000))
+    elif name == "clock":
+        if value not in CLOCKS:
+            print("Unknown clock: " + value)
+            sys.exit(1)
+        new_run.set_clock(value)
+    elif name == "time-budget":
+        budget = parse_number(name, value, float, 0)
+        new_run.set_time_budget(int(budget * 1_000_000_000))
+    elif name == "precision":
+        new_run.set_precision(parse_number(name, value, float, 0) / 100)
+    elif name == "audit-environment":
+        from environment import audit_environment
+
+        new_run.set_environment_audit(audit_environment)
+    elif name == "isolate":
+        pass
+    elif name == "stats":
+        new_run.set_statistics(True)
+    elif name == "steady-state":
+        new_run.set_steady_state_iterations(parse_number(name, value or "100", int, 1))
+    elif name == "warmup-window":
+        new_run.set_warmup_window(parse_number(name, value, int, 1))
+    elif name == "warmup-tolerance":
+        new_run.set_warmup_tolerance(parse_number(name, value, float, 0) / 100)
+    else:
+        print("Unknown option: " + option)
+        print_usage()
+        sys.exit(1)
+
+
+def create_run(info, num_iterations, inner_iterations, options):
+    new_run = Run(info.name)
+
+    if num_iterations is not None:
+        new_run.set_num_iterations(num_iterations)
+    if inner_iterations == "default":
+        new_run.set_inner_iterations(info.default_size())
+    elif inner_iterations is not None:
+        new_run.set_inner_iterations(int(inner_iterations))
 
-    if len(args) > 2:
-        new_run.set_num_iterations(int(args[2]))
-        if len(args) > 3:
-            new_run.set_inner_iterations(int(args[3]))
+    option_values = dict(option[2:].partition("=")[::2] for option in options)
+    for option in options:
+        apply_option(new_run, option, option_values)
 
     return new_run
 
 
+def process_arguments(args):
+    options = [arg for arg in args[1:] if arg.startswith("--")]
+    args = [arg for arg in args if not arg.startswith("--")]
+
+    try:
+        selected = REGISTRY.select(args[1])
+    except UnknownBenchmarkError as error:
+        print(error)
+        sys.exit(1)
+
+    num_iterations = int(args[2]) if len(args) > 2 else None
+    inner_iterations = args[3] if len(args) > 3 else None
+    return [
+        create_run(info, num_iterations, inner_iterations, options) for info in selected
+    ]
+
+
+def print_benchmarks():
+    print("Benchmark   Category  Default size  Verified sizes")
+    for info in REGISTRY.benchmarks():
+        if info.verified_sizes() is None:
+            verified = "any"
+        else:
+            verified = ", ".join(str(size) for size in info.verified_sizes())
+        print(
+            info.name.ljust(12)
+            + info.category().ljust(10)
+            + str(info.default_size()).rjust(12)
+            + "  "
+            + verified
+        )
+
+
 def print_usage():
-    print("./harness.py [benchmark] [num-iterations [inner-iter]]")
+    print("./harness.py [options] [benchmark] [num-iterations [inner-iter]]")
+    print("./harness.py --list")
     print()
-    print("  benchmark      - benchmark class name ")
+    print("  benchmark      - benchmark class name, or a comma-separated list of")
+    print("                   names, glob patterns, all, macro, and micro; the")
+    print("                   benchmarks are run one after another")
     print("  num-iterations - number of times to execute benchmark, default: 1")
     print(
         "  inner-iter     - number of times the benchmark is executed in an inner loop, "
     )
-    print("                   which is measured in total, default: 1")
+    print("                   which is measured in total, default: 1;")
+    print("                   `default` selects the problem size of rebench.conf")
+    print()
+    print("Options:")
+    print("  --json-lines[=file]    - write one JSON record per iteration with the")
+    print("                           run time in nanoseconds to the file, or")
+    print("                           instead of the text output to stdout")
+    print("  --memory               - record peak RSS and allocated blocks per")
+    print("                           iteration, and tracemalloc current and peak")
+    print("                           bytes in an untimed iteration after the last")
+    print("  --gc=disable           - disable the GC in the timed region, and")
+    print("                           collect before each iteration")
+    print("  --gc=trace             - record each collection's generation and")
+    print("                           duration, and the GC share of each iteration")
+    print("  --som-counters         - count dictionary probes, chain steps, and")
+    print("                           resizes, vector growths, and set scans of")
+    print("                           the som library per iteration")
+    print("  --perf-counters        - count instructions, cycles, cache misses, and")
+    print("                           branch misses per iteration on Linux, and")
+    print("                           report instructions per cycle")
+    print("  --profile[=backend]    - profile the iterations after the first, and")
+    print("                           write a table and collapsed stacks per")
+    print("                           benchmark, backend: cprofile (default),")
+    print("                           sampling")
+    print("  --profile-dir=dir      - directory for the profiles, default: .")
+    print("  --autorange[=ms]       - grow inner-iter until one iteration takes at")
+    print("                           least the given time, default: 100ms, and")
+    print("                           report times per inner iteration; ignored")
+    print("                           where inner-iter is the problem size")
+    print("  --clock=name           - clock for the timed region: perf_counter")
+    print("                           (default), process_time, thread_time,")
+    print("                           monotonic_raw (Linux)")
+    print("  --time-budget=s        - stop iterating once the iterations took s")
+    print("                           seconds of wall-clock time")
+    print("  --precision=pct        - stop iterating once the 95% confidence")
+    print("                           interval of the mean is within pct percent")
+    print("                           of the mean, checked after 10 iterations")
+    print("  --audit-environment    - record CPU governor, turbo, SMT siblings,")
+    print("                           ASLR, and load average, and warn about")
+    print("                           settings that add noise")
+    print("  --isolate[=core]       - rerun the harness with ASLR disabled and")
+    print("                           pinned to the core, default: the last")
+    print("                           isolated core, or the last core")
+    print("  --stats                - report median, trimmed mean, percentiles,")
+    print("                           a bootstrap confidence interval of the")
+    print("                           median, and outliers")
+    print("  --steady-state[=n]     - detect the end of warmup and then measure n")
+    print("                           steady-state iterations, default: 100;")
+    print("                           num-iterations bounds the warmup")
+    print("  --warmup-window=n      - iterations per window compared to detect")
+    print("                           the steady state, default: 10")
+    print("  --warmup-tolerance=pct - percent by which windows may differ in")
+    print("                           the steady state, default: 5")
+
+
+def main(args):
+    if "--list" in args:
+        print_benchmarks()
+        return 0
+
+    if len([arg for arg in args if not arg.startswith("--")]) < 2:
+        print_usage()
+        return 1
+
+    for arg in args:
+        if arg == "--isolate" or arg.startswith("--isolate="):
+            # pylint: disable-next=import-outside-toplevel
+            from environment import reexec_isolated
+
+            core = arg[len("--isolate=") :]
+            reexec_isolated(
+                args, parse_number("isolate", core, int, 0) if core else None
+            )
 
+    for run in process_arguments(args):
+        run.run_benchmark()
+        run.print_total()
+    return 0
 
-if len(sys.argv) < 2:
-    print_usage()
-    sys.exit(1)
 
-run = process_arguments(sys.argv)
-run.run_benchmark()
-run.print_total()
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,196 @@
+# Copyright (c) 2024 see AUTHORS.md file
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the 'Software'), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED 'AS IS', WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import os
+import re
+import subprocess
+import sys
+
+from bundle import BENCHMARKS, output_path
+from executor import parse_rebench_log
+from stats import median
+
+_SWEEP_OPTIONS = ("micropython", "heap-sizes", "benchmarks")
+
+DEFAULT_HEAP_SIZES = "8M,4M,2M,1M,512K,256K,128K,64K"
+DEFAULT_BENCHMARKS = "Storage,Json,Richards"
+
+_HEAP_SUMMARY = re.compile(
+    r"^\S+: heap: iterations-with-collection: (\d+) "
+    r"max-alloc: (\d+)B min-free: (\d+)B$"
+)
+
+
+def parse_heap_size(size):
+    multiplier = {"K": 1024, "M": 1024 * 1024}.get(size[-1:].upper(), 1)
+    if multiplier > 1:
+        size = size[:-1]
+    return int(size) * multiplier
+
+
+class HeapResult:
+    def __init__(self, heap_size, run_times_ms, heap_summary, error):
+        self.heap_size = heap_size
+        self.run_times_ms = run_times_ms
+        self.error = error
+        if heap_summary is None:
+            self.collections = self.max_alloc = self.min_free = None
+        else:
+            self.collections, self.max_alloc, self.min_free = heap_summary
+
+    def throughput(self):
+        return 1000 / median(self.run_times_ms)
+
+
+def run_with_heap(micropython, name, heap_size, num_iterations, inner_iterations):
+    result = subprocess.run(
+        [
+            micropython,
+            "-X",
+            "heapsize=" + heap_size,
+            os.path.abspath(output_path("MicroPython", name)),
+            str(num_iterations),
+            str(inner_iterations),
+            "us",
+            "--heap",
+        ],
+        check=False,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+    )
+
+    heap_summary = None
+    for line in result.stdout.splitlines():
+        match = _HEAP_SUMMARY.match(line)
+        if match is not None:
+            heap_summary = tuple(int(group) for group in match.groups())
+
+    if "MemoryError" in result.stdout:
+        error = "out of memory"
+    elif result.returncode != 0:
+        error = "failed with exit code " + str(result.returncode)
+    else:
+        error = None
+    return HeapResult(heap_size, parse_rebench_log(result.stdout), heap_summary, error)
+
+
+# Runs the benchmark with the heap sizes from the largest to the smallest,
+# and relates the throughput to the one with the largest heap.
+def sweep(micropython, name, heap_sizes, num_iterations, inner_iterations):
+    heap_sizes = sorted(heap_sizes, key=parse_heap_size, reverse=True)
+    return [
+        run_with_heap(micropython, name, heap_size, num_iterations, inner_iterations)
+        for heap_size in heap_sizes
+    ]
+
+
+def print_sweep(name, results):
+    print(
+        "Benchmark".ljust(11)
+        + "Heap".rjust(6)
+        + "Median".rjust(12)
+        + "Throughput".rjust(12)
+        + "Relative".rjust(10)
+        + "GC iterations".rjust(15)
+        + "Min free".rjust(11)
+    )
+    baseline = None
+    for result in results:
+        line = name.ljust(11) + result.heap_size.rjust(6)
+        if result.error is not None or not result.run_times_ms:
+            print(line + "  " + (result.error or "no run times"))
+            continue
+
+        if baseline is None:
+            baseline = result.throughput()
+        line += (
+            (str(round(median(result.run_times_ms) * 1000)) + "us").rjust(12)
+            + (str(round(result.throughput(), 2)) + "/s").rjust(12)
+            + (str(round(100 * result.throughput() / baseline, 1)) + "%").rjust(10)
+        )
+        if result.collections is not None:
+            line += (
+                str(result.collections) + "/" + str(len(result.run_times_ms))
+            ).rjust(15) + (str(result.min_free) + "B").rjust(11)
+        print(line)
+    print()
+
+
+def print_usage():
+    print("./heap_sweep.py [options] [num-iterations [inner-iter]]")
+    print()
+    print("Runs the MicroPython variants with decreasing fixed heap sizes, and")
+    print("reports how the throughput degrades relative to the largest heap,")
+    print("together with the iterations in which the heap usage dropped, i.e.,")
+    print("a collection freed memory, and the least free memory.")
+    print()
+    print("  num-iterations - number of iterations per heap size, default: 10")
+    print("  inner-iter     - number of times the benchmark is executed in an")
+    print("                   inner loop, default: 1")
+    print()
+    print("Options:")
+    print("  --micropython=path     - MicroPython unix port, default: micropython")
+    print("  --heap-sizes=sizes     - comma-separated heap sizes with an optional K")
+    print("                           or M suffix, default: " + DEFAULT_HEAP_SIZES)
+    print("  --benchmarks=names     - comma-separated benchmarks, default:")
+    print("                           " + DEFAULT_BENCHMARKS)
+
+
+def main(args):
+    options = {}
+    positional = []
+    for arg in args[1:]:
+        if arg in ("-h", "--help"):
+            print_usage()
+            return 0
+        name, _, value = arg[2:].partition("=")
+        if arg.startswith("--") and name in _SWEEP_OPTIONS:
+            options[name] = value
+        elif arg.startswith("--"):
+            print("Unknown option: " + arg)
+            print_usage()
+            return 1
+        else:
+            positional.append(arg)
+
+    names = options.get("benchmarks", DEFAULT_BENCHMARKS).split(",")
+    for name in names:
+        if name not in BENCHMARKS:
+            print("Unknown benchmark: " + name)
+            return 1
+    heap_sizes = options.get("heap-sizes", DEFAULT_HEAP_SIZES).split(",")
+    num_iterations = int(positional[0]) if positional else 10
+    inner_iterations = int(positional[1]) if len(positional) > 1 else 1
+
+    micropython = options.get("micropython", "micropython")
+    try:
+        for name in names:
+            print_sweep(
+                name,
+                sweep(micropython, name, heap_sizes, num_iterations, inner_iterations),
+            )
+    except FileNotFoundError:
+        print("MicroPython not found: " + micropython)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
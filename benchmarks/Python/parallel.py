@@ -0,0 +1,222 @@
+# Copyright (c) 2024 see AUTHORS.md file
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the 'Software'), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED 'AS IS', WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import io
+import os
+import sys
+from contextlib import redirect_stdout
+import multiprocessing
+from multiprocessing.connection import wait
+
+from registry import REGISTRY, UnknownBenchmarkError
+from run import Run
+
+
+class Invocation:
+    def __init__(self, info, num_iterations=1, inner_iterations=1):
+        self.info = info
+        self.name = info.name
+        self.num_iterations = num_iterations
+        self.inner_iterations = inner_iterations
+        self.core = None
+        self.total = None
+        self.output = ""
+
+    def succeeded(self):
+        return self.total is not None
+
+
+def parse_cores(spec):
+    cores = []
+    for part in spec.split(","):
+        if "-" in part:
+            first, last = part.split("-")
+            cores.extend(range(int(first), int(last) + 1))
+        else:
+            cores.append(int(part))
+    return sorted(set(cores))
+
+
+def parse_invocations(spec):
+    parts = spec.split(":")
+    invocations = []
+    for info in REGISTRY.select(parts[0]):
+        invocation = Invocation(info)
+        if len(parts) > 1:
+            invocation.num_iterations = int(parts[1])
+            if len(parts) > 2:
+                if parts[2] == "default":
+                    invocation.inner_iterations = info.default_size()
+                else:
+                    invocation.inner_iterations = int(parts[2])
+        invocations.append(invocation)
+    return invocations
+
+
+def _run_pinned(core, invocation, conn):
+    os.sched_setaffinity(0, {core})
+
+    new_run = Run(invocation.name, invocation.info.load())
+    new_run.set_num_iterations(invocation.num_iterations)
+    new_run.set_inner_iterations(invocation.inner_iterations)
+
+    output = io.StringIO()
+    with redirect_stdout(output):
+        new_run.run_benchmark()
+
+    conn.send((new_run.get_total(), output.getvalue()))
+    conn.close()
+
+
+# With the forkserver context, a server process imports the harness and
+# the benchmark modules once, and forks each invocation's process from it.
+# This keeps invocations isolated from each other, but avoids paying for
+# interpreter startup and imports per invocation.
+def forkserver_context(invocations):
+    context = multiprocessing.get_context("forkserver")
+    modules = sorted({invocation.info.module for invocation in invocations})
+    context.set_forkserver_preload(["__main__", "run"] + modules)
+    return context
+
+
+def run_parallel(invocations, cores, context=multiprocessing):
+    pending = list(reversed(invocations))
+    free_cores = list(reversed(cores))
+    running = {}
+
+    while pending or running:
+        while pending and free_cores:
+            invocation = pending.pop()
+            invocation.core = free_cores.pop()
+
+            receiver, sender = context.Pipe(duplex=False)
+            process = context.Process(
+                target=_run_pinned, args=(invocation.core, invocation, sender)
+            )
+            process.start()
+            sender.close()
+            running[receiver] = (process, invocation)
+
+        for receiver in wait(list(running)):
+            process, invocation = running.pop(receiver)
+            try:
+                invocation.total, invocation.output = receiver.recv()
+            except EOFError:
+                pass
+            receiver.close()
+            process.join()
+            free_cores.append(invocation.core)
+
+    return invocations
+
+
+def print_report(invocations):
+    for invocation in invocations:
+        print(invocation.output, end="")
+
+    print("Benchmark       Iterations  Inner  Core  Total")
+    total = 0
+    for invocation in invocations:
+        if invocation.succeeded():
+            result = str(invocation.total) + "us"
+            total += invocation.total
+        else:
+            result = "failed"
+        print(
+            invocation.name.ljust(15)
+            + str(invocation.num_iterations).rjust(11)
+            + str(invocation.inner_iterations).rjust(7)
+            + str(invocation.core).rjust(6)
+            + "  "
+            + result
+        )
+    print("Total Runtime: " + str(total) + "us")
+
+
+def print_usage():
+    print(
+        "./parallel.py [--cores=list] [--forkserver]"
+        + " benchmark[:num-iterations[:inner-iter]] ..."
+    )
+    print()
+    print("  --cores=list   - cores to pin invocations to, e.g. 0,2,4-7,")
+    print("                   default: all cores available to this process")
+    print("  --forkserver   - fork invocations from a server process that")
+    print("                   imported the benchmarks already")
+    print("  benchmark      - benchmark class name, or a selection such as")
+    print("                   CD,Havlak, macro, micro, or all")
+    print("  num-iterations - number of times to execute benchmark, default: 1")
+    print("  inner-iter     - number of times the benchmark is executed in an")
+    print("                   inner loop, which is measured in total, default: 1;")
+    print("                   `default` selects the problem size of rebench.conf")
+    print()
+    print("Each invocation runs in its own process, pinned to a core that no")
+    print("other invocation uses at the same time.")
+
+
+def main(args):
+    cores = None
+    use_forkserver = False
+    invocations = []
+    for arg in args[1:]:
+        if arg == "--forkserver":
+            use_forkserver = True
+        elif arg.startswith("--cores="):
+            cores = parse_cores(arg[len("--cores=") :])
+        else:
+            try:
+                invocations.extend(parse_invocations(arg))
+            except UnknownBenchmarkError as error:
+                print(error)
+                return 1
+
+    if not invocations:
+        print_usage()
+        return 1
+
+    if not hasattr(os, "sched_setaffinity"):
+        print("Pinning invocations to cores requires os.sched_setaffinity (Linux)")
+        return 1
+
+    available = os.sched_getaffinity(0)
+    if cores is None:
+        cores = sorted(available)
+    unavailable = [core for core in cores if core not in available]
+    if unavailable:
+        print(
+            "Cores not available to this process: "
+            + ", ".join(str(core) for core in unavailable)
+            + "; available are: "
+            + ", ".join(str(core) for core in sorted(available))
+        )
+        return 1
+
+    if use_forkserver:
+        run_parallel(invocations, cores, forkserver_context(invocations))
+    else:
+        run_parallel(invocations, cores)
+    print_report(invocations)
+
+    if all(invocation.succeeded() for invocation in invocations):
+        return 0
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
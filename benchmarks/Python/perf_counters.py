@@ -0,0 +1,226 @@
+# Copyright (c) 2024 see AUTHORS.md file
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the 'Software'), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED 'AS IS', WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import ctypes
+import os
+import platform
+import struct
+import sys
+
+from probes import Probe
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+_SYSCALL_NUMBERS = {
+    "x86_64": 298,
+    "i386": 336,
+    "i686": 336,
+    "aarch64": 241,
+    "armv7l": 364,
+    "ppc64le": 319,
+    "riscv64": 241,
+    "s390x": 331,
+}
+
+PERF_TYPE_HARDWARE = 0
+
+# counters in the order they are opened, the first one that can be opened
+# leads the group, so that all counters measure the same instructions
+COUNTERS = (
+    ("instructions", 1),
+    ("cycles", 0),
+    ("cache_misses", 3),
+    ("branch_misses", 5),
+)
+
+_ATTR_DISABLED = 1 << 0
+_ATTR_EXCLUDE_KERNEL = 1 << 5
+_ATTR_EXCLUDE_HV = 1 << 6
+
+_FORMAT_TOTAL_TIME_ENABLED = 1 << 0
+_FORMAT_TOTAL_TIME_RUNNING = 1 << 1
+_FORMAT_GROUP = 1 << 3
+
+_FLAG_FD_CLOEXEC = 1 << 3
+
+_IOC_ENABLE = 0x2400
+_IOC_DISABLE = 0x2401
+_IOC_RESET = 0x2403
+_IOC_FLAG_GROUP = 1
+
+
+# struct perf_event_attr up to sample_regs_user, which ends at byte 88,
+# padded to PERF_ATTR_SIZE_VER7, i.e., 128 bytes, with the remaining fields
+# zeroed, which the kernel treats as unset
+class _PerfEventAttr(ctypes.Structure):
+    _fields_ = [
+        ("type", ctypes.c_uint32),
+        ("size", ctypes.c_uint32),
+        ("config", ctypes.c_uint64),
+        ("sample_period", ctypes.c_uint64),
+        ("sample_type", ctypes.c_uint64),
+        ("read_format", ctypes.c_uint64),
+        ("flags", ctypes.c_uint64),
+        ("wakeup_events", ctypes.c_uint32),
+        ("bp_type", ctypes.c_uint32),
+        ("config1", ctypes.c_uint64),
+        ("config2", ctypes.c_uint64),
+        ("branch_sample_type", ctypes.c_uint64),
+        ("sample_regs_user", ctypes.c_uint64),
+        ("padding", ctypes.c_uint8 * 40),
+    ]
+
+
+class PerfCountersUnavailable(Exception):
+    pass
+
+
+def perf_event_paranoid():
+    try:
+        with open(
+            "/proc/sys/kernel/perf_event_paranoid", encoding="utf-8"
+        ) as paranoid_file:
+            return int(paranoid_file.read())
+    except (OSError, ValueError):
+        return None
+
+
+def _perf_event_open(attr, group_fd):
+    libc = ctypes.CDLL(None, use_errno=True)
+    libc.syscall.restype = ctypes.c_long
+    fd = libc.syscall(
+        ctypes.c_long(_SYSCALL_NUMBERS[platform.machine()]),
+        ctypes.byref(attr),
+        ctypes.c_int(0),
+        ctypes.c_int(-1),
+        ctypes.c_int(group_fd),
+        ctypes.c_ulong(_FLAG_FD_CLOEXEC),
+    )
+    if fd < 0:
+        errno = ctypes.get_errno()
+        raise OSError(errno, os.strerror(errno))
+    return fd
+
+
+# Opens a group of hardware counters for the current thread, counting only
+# user-space events, which perf_event_paranoid=2 still permits.
+class CounterGroup:
+    def __init__(self):
+        if not sys.platform.startswith("linux") or fcntl is None:
+            raise PerfCountersUnavailable("perf_event_open requires Linux")
+        if platform.machine() not in _SYSCALL_NUMBERS:
+            raise PerfCountersUnavailable(
+                "unknown perf_event_open syscall on " + platform.machine()
+            )
+
+        self.names = []
+        self._fds = []
+        errors = []
+        for name, config in COUNTERS:
+            attr = _PerfEventAttr()
+            attr.type = PERF_TYPE_HARDWARE
+            attr.size = ctypes.sizeof(attr)
+            attr.config = config
+            attr.read_format = (
+                _FORMAT_GROUP | _FORMAT_TOTAL_TIME_ENABLED | _FORMAT_TOTAL_TIME_RUNNING
+            )
+            attr.flags = _ATTR_EXCLUDE_KERNEL | _ATTR_EXCLUDE_HV
+            if not self._fds:
+                attr.flags |= _ATTR_DISABLED
+            try:
+                fd = _perf_event_open(attr, self._fds[0] if self._fds else -1)
+            except OSError as err:
+                errors.append(name + ": " + err.strerror)
+                continue
+            self.names.append(name)
+            self._fds.append(fd)
+
+        if not self._fds:
+            message = ", ".join(errors)
+            paranoid = perf_event_paranoid()
+            if paranoid is not None:
+                message += " (perf_event_paranoid=" + str(paranoid) + ")"
+            raise PerfCountersUnavailable(message)
+        self.unavailable = errors
+
+    def _ioctl(self, request):
+        fcntl.ioctl(self._fds[0], request, _IOC_FLAG_GROUP)
+
+    def enable(self):
+        self._ioctl(_IOC_RESET)
+        self._ioctl(_IOC_ENABLE)
+
+    # returns the counts, scaled up if the kernel had to multiplex the
+    # counters, i.e., they were not running all the time they were enabled
+    def disable_and_read(self):
+        self._ioctl(_IOC_DISABLE)
+        size = 8 * (3 + len(self._fds))
+        values = struct.unpack(
+            "<" + str(3 + len(self._fds)) + "Q", os.read(self._fds[0], size)
+        )
+        _, time_enabled, time_running = values[:3]
+        if time_running == 0:
+            return dict.fromkeys(self.names, 0)
+        scale = time_enabled / time_running
+        return {
+            name: round(value * scale) for name, value in zip(self.names, values[3:])
+        }
+
+    def close(self):
+        for fd in reversed(self._fds):
+            os.close(fd)
+        self._fds = []
+
+
+# Counts instructions, cycles, cache misses, and branch misses in the timed
+# region. Where the counters cannot be opened, e.g., because of
+# perf_event_paranoid or a virtual machine without a PMU, it warns once and
+# records nothing.
+class PerfCounterProbe(Probe):
+    def __init__(self):
+        self._group = None
+
+    def start(self):
+        try:
+            self._group = CounterGroup()
+        except PerfCountersUnavailable as err:
+            print("Hardware counters unavailable: " + str(err), file=sys.stderr)
+            return
+        for error in self._group.unavailable:
+            print("Hardware counter unavailable: " + error, file=sys.stderr)
+
+    def before_iteration(self):
+        if self._group is not None:
+            self._group.enable()
+
+    def after_iteration(self, _run_time, measurements):
+        if self._group is None:
+            return
+        counts = self._group.disable_and_read()
+        measurements.update(counts)
+        if counts.get("cycles") and "instructions" in counts:
+            measurements["ipc"] = counts["instructions"] / counts["cycles"]
+
+    def stop(self):
+        if self._group is not None:
+            self._group.close()
+            self._group = None
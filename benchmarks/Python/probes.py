@@ -0,0 +1,173 @@
+# Copyright (c) 2024 see AUTHORS.md file
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the 'Software'), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED 'AS IS', WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import gc
+import sys
+from time import perf_counter_ns
+
+from som import counters
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+
+# A probe collects measurements around the timed region of each iteration.
+# Run calls start() before the first and stop() after the last iteration,
+# and before_iteration() and after_iteration() directly outside of the
+# timed region. after_iteration() gets the iteration's run time and adds
+# its results to the measurements dictionary, with the unit as suffix of
+# the key. untimed_pass() is called once after the last iteration, and may
+# run one more iteration with run_iteration(), e.g., under instrumentation
+# that would distort the run time.
+class Probe:
+    def start(self):
+        pass
+
+    def before_iteration(self):
+        pass
+
+    def after_iteration(self, run_time, measurements):
+        pass
+
+    def untimed_pass(self, run_iteration, measurements):
+        pass
+
+    def stop(self):
+        pass
+
+
+# tracemalloc slows down allocations many times over, so the traced bytes
+# are measured in a single untimed iteration after the timed ones, and only
+# the allocated blocks and the peak RSS around each timed iteration.
+class MemoryProbe(Probe):
+    def __init__(self):
+        self._blocks_before = 0
+
+    def before_iteration(self):
+        if hasattr(sys, "getallocatedblocks"):
+            self._blocks_before = sys.getallocatedblocks()
+
+    def after_iteration(self, _run_time, measurements):
+        if hasattr(sys, "getallocatedblocks"):
+            blocks = sys.getallocatedblocks()
+            measurements["allocated_blocks"] = blocks
+            measurements["allocated_blocks_delta"] = blocks - self._blocks_before
+        if resource is not None:
+            max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            # ru_maxrss is in bytes on macOS, and in kilobytes elsewhere
+            if sys.platform != "darwin":
+                max_rss *= 1024
+            measurements["peak_rss_bytes"] = max_rss
+
+    def untimed_pass(self, run_iteration, measurements):
+        if tracemalloc is None:
+            return
+        tracemalloc.start()
+        try:
+            run_iteration()
+            current, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        measurements["traced_current_bytes"] = current
+        measurements["traced_peak_bytes"] = peak
+
+
+# In the "disable" mode, the cyclic GC is disabled during the timed region,
+# and a full collection runs before each iteration. In the "trace" mode, the
+# GC stays enabled and each collection is recorded via gc.callbacks.
+class GcProbe(Probe):
+    def __init__(self, mode):
+        if mode not in ("disable", "trace"):
+            raise ValueError("Unknown GC mode: " + mode)
+        self._mode = mode
+        self._was_enabled = True
+        self._collect_time = 0
+        self._collection_start = 0
+        self._pauses = []
+
+    def _callback(self, phase, info):
+        if phase == "start":
+            self._collection_start = perf_counter_ns()
+        else:
+            self._pauses.append(
+                [info["generation"], perf_counter_ns() - self._collection_start]
+            )
+
+    def start(self):
+        self._was_enabled = gc.isenabled()
+        if self._mode == "trace":
+            gc.callbacks.append(self._callback)
+
+    def before_iteration(self):
+        if self._mode == "disable":
+            start_time = perf_counter_ns()
+            gc.collect()
+            self._collect_time = perf_counter_ns() - start_time
+            gc.disable()
+        else:
+            self._pauses = []
+
+    def after_iteration(self, run_time, measurements):
+        if self._mode == "disable":
+            if self._was_enabled:
+                gc.enable()
+            measurements["gc_between_iterations_ns"] = self._collect_time
+            return
+
+        gc_time = sum(duration for _, duration in self._pauses)
+        measurements["gc_collections"] = len(self._pauses)
+        for generation in range(3):
+            measurements["gc_collections_gen" + str(generation)] = sum(
+                1 for gen, _ in self._pauses if gen == generation
+            )
+        measurements["gc_time_ns"] = gc_time
+        measurements["gc_share_pct"] = 100 * gc_time / run_time if run_time else 0.0
+        measurements["gc_pauses"] = self._pauses
+
+    def stop(self):
+        if self._mode == "trace":
+            gc.callbacks.remove(self._callback)
+        elif self._was_enabled:
+            gc.enable()
+
+
+# Counts the operations of the som collection library per iteration, see
+# som/counters.py. The counting wrappers slow down the benchmarks, so the
+# run times are not comparable to uninstrumented runs. The counters are
+# shared by all runs, but reset before each iteration, so that interleaved
+# runs count only their own iterations.
+class SomCounterProbe(Probe):
+    def start(self):
+        counters.install()
+
+    def before_iteration(self):
+        counters.reset()
+
+    def after_iteration(self, _run_time, measurements):
+        measurements.update(counters.COUNTS)
+
+    def stop(self):
+        counters.uninstall()
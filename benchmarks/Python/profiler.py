@@ -0,0 +1,243 @@
+# Copyright (c) 2024 see AUTHORS.md file
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the 'Software'), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED 'AS IS', WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import cProfile
+import os
+import pstats
+import sys
+import threading
+from abc import abstractmethod
+from time import sleep
+
+from probes import Probe
+
+
+def _label(filename, name):
+    if filename == "~":
+        label = name
+    else:
+        label = os.path.splitext(os.path.basename(filename))[0] + "." + name
+    return label.replace(";", ":")
+
+
+def _write_collapsed(path, stacks):
+    with open(path, "w", encoding="utf-8") as collapsed:
+        for stack, value in sorted(stacks.items()):
+            if value > 0:
+                collapsed.write(stack + " " + str(value) + "\n")
+
+
+# Profiles only the iterations after the first one, and with warmup
+# detection, only the steady-state iterations. Writes a table of self and
+# cumulative time per function and collapsed stacks, which tools such as
+# flamegraph.pl or speedscope can read, to the output directory.
+class ProfileProbe(Probe):
+    def __init__(self, run, output_dir):
+        self._run = run
+        self._output_dir = output_dir
+        self._num_iterations = 0
+        self._num_profiled = 0
+        self._active = False
+
+    def before_iteration(self):
+        self._num_iterations += 1
+        self._active = self._num_iterations > 1 and self._run.phase != "warmup"
+        if self._active:
+            self._num_profiled += 1
+            self._enable()
+
+    def after_iteration(self, _run_time, _measurements):
+        if self._active:
+            self._disable()
+
+    def stop(self):
+        if self._num_profiled == 0:
+            print(
+                self._run.name
+                + ": no iterations were profiled, the profile is not written",
+                file=sys.stderr,
+            )
+            return
+
+        os.makedirs(self._output_dir, exist_ok=True)
+        base = os.path.join(self._output_dir, self._run.name)
+        self._write(base + ".profile.txt", base + ".collapsed")
+        print(
+            self._run.name
+            + ": profile written to "
+            + base
+            + ".profile.txt and "
+            + base
+            + ".collapsed",
+            file=sys.stderr,
+        )
+
+    @abstractmethod
+    def _enable(self):
+        pass
+
+    @abstractmethod
+    def _disable(self):
+        pass
+
+    @abstractmethod
+    def _write(self, table_path, collapsed_path):
+        pass
+
+
+# cProfile records only caller/callee pairs, not complete stacks. The
+# collapsed stacks are reconstructed from the call graph by attributing a
+# callee's time to its callers in proportion to the time spent in each call.
+class CProfileProbe(ProfileProbe):
+    def __init__(self, run, output_dir):
+        super().__init__(run, output_dir)
+        self._profile = cProfile.Profile()
+
+    def _enable(self):
+        self._profile.enable()
+
+    def _disable(self):
+        self._profile.disable()
+
+    def _write(self, table_path, collapsed_path):
+        with open(table_path, "w", encoding="utf-8") as table:
+            stats = pstats.Stats(self._profile, stream=table)
+            stats.sort_stats("cumulative").print_stats()
+            stats.sort_stats("tottime").print_stats()
+
+        _write_collapsed(collapsed_path, self._collapse(stats.stats))
+
+    @staticmethod
+    def _collapse(entries):
+        callees = {}
+        roots = []
+        for func, (_, _, _, _, callers) in entries.items():
+            if not callers:
+                roots.append(func)
+            for caller, (_, _, _, edge_time) in callers.items():
+                callees.setdefault(caller, []).append((func, edge_time))
+
+        total = sum(entries[root][3] for root in roots)
+        stacks = {}
+
+        def visit(func, stack, scale):
+            frames = stack + [_label(func[0], func[2])]
+            path = ";".join(frames)
+            self_time = entries[func][2] * scale
+            stacks[path] = stacks.get(path, 0) + round(self_time * 1_000_000)
+
+            for callee, edge_time in callees.get(func, []):
+                callee_time = entries[callee][3]
+                callee_scale = scale * edge_time / callee_time if callee_time else 0
+                # skip recursive calls, and paths with negligible time
+                if callee not in on_stack and callee_scale * callee_time > total / 1e6:
+                    on_stack.add(callee)
+                    visit(callee, frames, callee_scale)
+                    on_stack.remove(callee)
+
+        for root in roots:
+            on_stack = {root}
+            visit(root, [], 1.0)
+        return stacks
+
+
+# Samples the stack of the benchmark thread from a separate thread. Since the
+# sampler needs the GIL, the switch interval is lowered to the sampling
+# interval while the benchmark runs.
+class SamplingProbe(ProfileProbe):
+    def __init__(self, run, output_dir, interval=0.001):
+        super().__init__(run, output_dir)
+        self._interval = interval
+        self._thread_id = threading.get_ident()
+        self._base_frame = None
+        self._samples = {}
+        self._sampling = threading.Event()
+        self._stopped = False
+        self._switch_interval = sys.getswitchinterval()
+        self._sampler = threading.Thread(target=self._sample_loop, daemon=True)
+
+    def start(self):
+        sys.setswitchinterval(self._interval)
+        self._sampler.start()
+
+    def _sample_loop(self):
+        while not self._stopped:
+            self._sampling.wait()
+            frame = sys._current_frames().get(  # pylint: disable=protected-access
+                self._thread_id
+            )
+            if self._sampling.is_set():
+                self._record(frame)
+            sleep(self._interval)
+
+    def _record(self, frame):
+        frames = []
+        while frame is not None and frame is not self._base_frame:
+            code = frame.f_code
+            frames.append(_label(code.co_filename, code.co_name))
+            frame = frame.f_back
+        if frames:
+            stack = ";".join(reversed(frames))
+            self._samples[stack] = self._samples.get(stack, 0) + 1
+
+    def _enable(self):
+        # sys._getframe(2) is the frame of Run.measure()
+        self._base_frame = sys._getframe(2)  # pylint: disable=protected-access
+        self._sampling.set()
+
+    def _disable(self):
+        self._sampling.clear()
+
+    def stop(self):
+        self._stopped = True
+        self._sampling.set()
+        self._sampler.join()
+        sys.setswitchinterval(self._switch_interval)
+        super().stop()
+
+    def _write(self, table_path, collapsed_path):
+        self_samples = {}
+        cumulative_samples = {}
+        for stack, count in self._samples.items():
+            frames = stack.split(";")
+            self_samples[frames[-1]] = self_samples.get(frames[-1], 0) + count
+            for frame in set(frames):
+                cumulative_samples[frame] = cumulative_samples.get(frame, 0) + count
+
+        total = sum(self._samples.values())
+        with open(table_path, "w", encoding="utf-8") as table:
+            table.write(
+                str(total)
+                + " samples, interval "
+                + str(self._interval * 1000)
+                + "ms\n\n"
+            )
+            table.write("    self   cumulative  function\n")
+            for func, count in sorted(
+                cumulative_samples.items(), key=lambda item: -item[1]
+            ):
+                table.write(
+                    str(self_samples.get(func, 0)).rjust(8)
+                    + str(count).rjust(13)
+                    + "  "
+                    + func
+                    + "\n"
+                )
+
+        _write_collapsed(collapsed_path, self._samples)
@@ -0,0 +1,215 @@
+# Copyright (c) 2024 see AUTHORS.md file
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the 'Software'), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED 'AS IS', WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import os
+import re
+
+# ReBench configurations are YAML files. PyYAML is not always available,
+# so this module reads the subset of YAML used by rebench.conf and
+# test.conf: block mappings and sequences, flow sequences, plain and quoted
+# scalars, comments, anchors, and aliases.
+
+DEFAULT_CONF = os.path.join(os.path.dirname(__file__), "..", "..", "rebench.conf")
+TEST_CONF = os.path.join(os.path.dirname(__file__), "..", "..", "test.conf")
+
+_KEY = re.compile(r"""^("[^"]*"|'[^']*'|[^\s"'\[{#-][^:#]*|-[^\s:#][^:#]*):(\s+|$)""")
+
+
+class ConfError(Exception):
+    pass
+
+
+def _strip_comment(line):
+    quote = None
+    for i, char in enumerate(line):
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in "\"'":
+            quote = char
+        elif char == "#" and (i == 0 or line[i - 1] in " \t"):
+            return line[:i]
+    return line
+
+
+def _unquote(text):
+    if text[0] == '"':
+        return text[1:-1].replace('\\"', '"').replace("\\\\", "\\")
+    if text[0] == "'":
+        return text[1:-1].replace("''", "'")
+    return text
+
+
+class _Parser:
+    def __init__(self, text):
+        self._lines = []
+        for line in text.splitlines():
+            content = _strip_comment(line).rstrip()
+            if content.strip():
+                self._lines.append(
+                    (len(content) - len(content.lstrip()), content.strip())
+                )
+        self._pos = 0
+        self._anchors = {}
+
+    def parse(self):
+        if not self._lines:
+            return None
+        value = self._block(self._lines[0][0])
+        if self._pos < len(self._lines):
+            raise ConfError("Unexpected indentation: " + self._lines[self._pos][1])
+        return value
+
+    def _block(self, indent):
+        if self._lines[self._pos][1].startswith("-"):
+            return self._sequence(indent)
+        return self._mapping(indent)
+
+    def _nested(self, indent, is_sequence_item):
+        # a nested block is indented more, and a sequence may also start
+        # at the indentation of its key
+        if self._pos >= len(self._lines):
+            return None
+        next_indent, content = self._lines[self._pos]
+        if next_indent > indent or (
+            next_indent == indent
+            and not is_sequence_item
+            and (content == "-" or content.startswith("- "))
+        ):
+            return self._block(next_indent)
+        return None
+
+    def _mapping(self, indent):
+        result = {}
+        while self._pos < len(self._lines):
+            line_indent, content = self._lines[self._pos]
+            if line_indent != indent or content == "-" or content.startswith("- "):
+                break
+            match = _KEY.match(content)
+            if not match:
+                raise ConfError("Expected a key: " + content)
+            key = _unquote(match.group(1).strip())
+            self._pos += 1
+            result[key] = self._value(content[match.end() :].strip(), indent, False)
+        return result
+
+    def _sequence(self, indent):
+        result = []
+        while self._pos < len(self._lines):
+            line_indent, content = self._lines[self._pos]
+            if line_indent != indent or not (
+                content == "-" or content.startswith("- ")
+            ):
+                break
+            rest = content[1:].strip()
+            if _KEY.match(rest):
+                # a mapping that starts on the line of the sequence item
+                item_indent = indent + len(content) - len(rest)
+                self._lines[self._pos] = (item_indent, rest)
+                result.append(self._mapping(item_indent))
+            else:
+                self._pos += 1
+                result.append(self._value(rest, indent, True))
+        return result
+
+    def _value(self, text, indent, is_sequence_item):
+        anchor = None
+        if text.startswith("&"):
+            anchor, _, text = text[1:].partition(" ")
+            text = text.strip()
+
+        if text:
+            value = self._inline(text)
+        else:
+            value = self._nested(indent, is_sequence_item)
+
+        if anchor:
+            self._anchors[anchor] = value
+        return value
+
+    def _inline(self, text):
+        if text.startswith("*"):
+            if text[1:] not in self._anchors:
+                raise ConfError("Unknown alias: " + text)
+            return self._anchors[text[1:]]
+        if text.startswith("["):
+            if not text.endswith("]"):
+                raise ConfError("Unsupported flow sequence: " + text)
+            items = text[1:-1].split(",")
+            return [self._inline(item.strip()) for item in items if item.strip()]
+        if text.startswith("{"):
+            raise ConfError("Flow mappings are not supported: " + text)
+        return _scalar(text)
+
+
+def _scalar(text):
+    if text[0] in "\"'":
+        return _unquote(text)
+    if text in ("true", "True", "yes"):
+        return True
+    if text in ("false", "False", "no"):
+        return False
+    if text in ("null", "~"):
+        return None
+    if re.match(r"^[-+]?\d+$", text):
+        return int(text)
+    if re.match(r"^[-+]?(\d+\.\d*|\.\d+)([eE][-+]?\d+)?$", text):
+        return float(text)
+    return text
+
+
+def parse_conf(text):
+    return _Parser(text).parse()
+
+
+def load_conf(path=DEFAULT_CONF):
+    with open(path, encoding="utf-8") as conf_file:
+        return parse_conf(conf_file.read())
+
+
+# Benchmarks are given either by name or as a mapping from the name to
+# their settings. Returns a list of (name, settings) pairs.
+def benchmark_entries(benchmarks):
+    entries = []
+    for benchmark in benchmarks or []:
+        if isinstance(benchmark, dict):
+            for name, settings in benchmark.items():
+                entries.append((name, settings or {}))
+        else:
+            entries.append((str(benchmark), {}))
+    return entries
+
+
+# Returns the benchmark names and their extra_args of the first suite
+# that defines benchmarks, or of the given suite.
+def benchmark_sizes(conf, suite=None):
+    suites = conf.get("benchmark_suites", {})
+    if suite is None:
+        for candidate in suites.values():
+            if candidate.get("benchmarks"):
+                suite = candidate
+                break
+        else:
+            return []
+    else:
+        suite = suites[suite]
+    return [
+        (name, settings.get("extra_args"))
+        for name, settings in benchmark_entries(suite.get("benchmarks"))
+    ]
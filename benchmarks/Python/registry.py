@@ -0,0 +1,220 @@
+# Copyright (c) 2024 see AUTHORS.md file
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the 'Software'), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED 'AS IS', WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import ast
+import os
+from fnmatch import fnmatchcase
+from importlib import import_module
+
+from benchmark import Benchmark
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# The classification of the README
+MACRO_BENCHMARKS = ("CD", "DeltaBlue", "Havlak", "Json", "Richards")
+
+
+class UnknownBenchmarkError(Exception):
+    pass
+
+
+class BenchmarkInfo:
+    def __init__(self, name, module, registry):
+        self.name = name
+        self.module = module
+        self._registry = registry
+        self._verified_sizes = None
+        self._scanned = False
+
+    def category(self):
+        if self.name in MACRO_BENCHMARKS:
+            return "macro"
+        return "micro"
+
+    # None if the benchmark verifies its result for any problem size
+    def verified_sizes(self):
+        if not self._scanned:
+            path = os.path.join(self._registry.directory, self.module + ".py")
+            for node in _parse_module(path).body:
+                if _is_benchmark_class(node) and node.name == self.name:
+                    self.set_verified_sizes(_verified_sizes(node))
+        return self._verified_sizes
+
+    def set_verified_sizes(self, verified_sizes):
+        self._verified_sizes = verified_sizes
+        self._scanned = True
+
+    # the problem size in rebench.conf, or None
+    def default_size(self):
+        return self._registry.default_sizes().get(self.name)
+
+    def load(self):
+        module = import_module(self.module)
+        if not hasattr(module, self.name):
+            # e.g., the standard library's json module was imported first
+            raise UnknownBenchmarkError(
+                self.name + " not found in " + str(getattr(module, "__file__", ""))
+            )
+        return getattr(module, self.name)
+
+
+def _is_benchmark_class(node):
+    return isinstance(node, ast.ClassDef) and any(
+        isinstance(base, ast.Name) and base.id == "Benchmark" for base in node.bases
+    )
+
+
+# Benchmarks with a problem size verify their result in
+# _verify_result(result, size), with one `if size == <constant>:` per size.
+def _verified_sizes(class_node):
+    for node in class_node.body:
+        if isinstance(node, ast.FunctionDef) and node.name == "_verify_result":
+            size_param = node.args.args[-1].arg
+            sizes = []
+            for compare in ast.walk(node):
+                if (
+                    isinstance(compare, ast.Compare)
+                    and isinstance(compare.left, ast.Name)
+                    and compare.left.id == size_param
+                    and isinstance(compare.ops[0], ast.Eq)
+                    and isinstance(compare.comparators[0], ast.Constant)
+                ):
+                    sizes.append(compare.comparators[0].value)
+            return sorted(sizes)
+    return None
+
+
+def _parse_module(path):
+    with open(path, encoding="utf-8") as source:
+        return ast.parse(source.read(), path)
+
+
+# Resolves a benchmark name by importing its module, as the benchmark Xyz is
+# in xyz.py. Only listing and selecting by pattern parse all modules in the
+# benchmark directory, and only problem sizes need rebench.conf. Both are
+# done at most once. Benchmarks are listed in the order of rebench.conf.
+class Registry:
+    def __init__(self, directory=BENCHMARK_DIR, conf_path=None):
+        self.directory = directory
+        self._conf_path = conf_path
+        self._infos = {}
+        self._benchmarks = None
+        self._default_sizes = None
+
+    def benchmarks(self):
+        if self._benchmarks is None:
+            self._benchmarks = self._discover()
+        return self._benchmarks
+
+    def _info(self, name, module):
+        if name not in self._infos:
+            self._infos[name] = BenchmarkInfo(name, module, self)
+        return self._infos[name]
+
+    def _discover(self):
+        found = {}
+        for file_name in sorted(os.listdir(self.directory)):
+            if file_name.endswith(".py"):
+                module = file_name[:-3]
+                tree = _parse_module(os.path.join(self.directory, file_name))
+                for node in tree.body:
+                    if _is_benchmark_class(node):
+                        info = self._info(node.name, module)
+                        info.set_verified_sizes(_verified_sizes(node))
+                        found[node.name] = info
+
+        ordered = [found.pop(name) for name in self.default_sizes() if name in found]
+        return ordered + list(found.values())
+
+    def default_sizes(self):
+        if self._default_sizes is None:
+            # pylint: disable-next=import-outside-toplevel
+            from rebench_conf import DEFAULT_CONF, benchmark_sizes, load_conf
+
+            conf_path = self._conf_path or DEFAULT_CONF
+            self._default_sizes = {}
+            if os.path.exists(conf_path):
+                for name, size in benchmark_sizes(load_conf(conf_path)):
+                    self._default_sizes.setdefault(name, size)
+        return self._default_sizes
+
+    def _import(self, name):
+        module = name.lower()
+        if not os.path.exists(os.path.join(self.directory, module + ".py")):
+            return None
+        try:
+            loaded = import_module(module)
+        except ImportError:
+            return None
+        suite = getattr(loaded, name, None)
+        if (
+            not isinstance(suite, type)
+            or not issubclass(suite, Benchmark)
+            or suite is Benchmark
+        ):
+            return None
+        return self._info(name, module)
+
+    def get(self, name):
+        if self._benchmarks is None:
+            info = self._import(name)
+            if info is not None:
+                return info
+
+        for info in self.benchmarks():
+            if info.name == name:
+                return info
+        raise UnknownBenchmarkError(
+            "Unknown benchmark: "
+            + name
+            + ", available are: "
+            + ", ".join(info.name for info in self.benchmarks())
+        )
+
+    # Selects benchmarks by a comma-separated list of names, glob patterns,
+    # `all`, `macro`, and `micro`, e.g., "CD,Havlak", "macro", or "*e*".
+    def select(self, spec):
+        selected = []
+        for pattern in spec.split(","):
+            pattern = pattern.strip()
+            if not any(char in pattern for char in "*?[") and pattern not in (
+                "all",
+                "macro",
+                "micro",
+            ):
+                matches = [self.get(pattern)]
+            elif pattern == "all":
+                matches = self.benchmarks()
+            elif pattern in ("macro", "micro"):
+                matches = [i for i in self.benchmarks() if i.category() == pattern]
+            else:
+                matches = [i for i in self.benchmarks() if fnmatchcase(i.name, pattern)]
+            if not matches:
+                # raises with the list of available benchmarks
+                self.get(pattern)
+            for info in matches:
+                if info not in selected:
+                    selected.append(info)
+        return selected
+
+    def load(self, name):
+        return self.get(name).load()
+
+
+REGISTRY = Registry()
@@ -0,0 +1,457 @@
+# Copyright (c) 2024 see AUTHORS.md file
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the 'Software'), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED 'AS IS', WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import math
+import platform
+import sys
+
+
+# The standard library's json module is shadowed by the Json benchmark
+# in json.py, so records are encoded and decoded by hand.
+def _encode_string(value):
+    result = '"'
+    for char in value:
+        if char in ('"', "\\"):
+            result += "\\" + char
+        elif char < " ":
+            result += "\\u" + format(ord(char), "04x")
+        else:
+            result += char
+    return result + '"'
+
+
+def encode_value(value):
+    if value is None:
+        return "null"
+    if value is True:
+        return "true"
+    if value is False:
+        return "false"
+    if isinstance(value, str):
+        return _encode_string(value)
+    if isinstance(value, float):
+        if not math.isfinite(value):
+            return "null"
+        return repr(value)
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, dict):
+        return (
+            "{"
+            + ", ".join(
+                _encode_string(str(key)) + ": " + encode_value(val)
+                for key, val in value.items()
+            )
+            + "}"
+        )
+    return "[" + ", ".join(encode_value(elem) for elem in value) + "]"
+
+
+_ESCAPES = {"b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+_LITERALS = {"true": True, "false": False, "null": None}
+
+
+class _Decoder:
+    def __init__(self, text):
+        self._text = text
+        self._pos = 0
+
+    def _skip_whitespace(self):
+        while self._pos < len(self._text) and self._text[self._pos] in " \t\r\n":
+            self._pos += 1
+
+    def _expect(self, char):
+        self._skip_whitespace()
+        if self._text[self._pos : self._pos + 1] != char:
+            raise ValueError(
+                "Expected '" + char + "' at " + str(self._pos) + ": " + self._text
+            )
+        self._pos += 1
+
+    def _peek(self):
+        self._skip_whitespace()
+        return self._text[self._pos : self._pos + 1]
+
+    def decode(self):
+        value = self.value()
+        self._skip_whitespace()
+        if self._pos != len(self._text):
+            raise ValueError(
+                "Unexpected input at " + str(self._pos) + ": " + self._text
+            )
+        return value
+
+    def value(self):
+        char = self._peek()
+        if char == "{":
+            return self._object()
+        if char == "[":
+            return self._array()
+        if char == '"':
+            return self._string()
+        for literal, value in _LITERALS.items():
+            if self._text.startswith(literal, self._pos):
+                self._pos += len(literal)
+                return value
+        return self._number()
+
+    def _object(self):
+        result = {}
+        self._expect("{")
+        if self._peek() == "}":
+            self._pos += 1
+            return result
+        while True:
+            self._skip_whitespace()
+            key = self._string()
+            self._expect(":")
+            result[key] = self.value()
+            if self._peek() == ",":
+                self._pos += 1
+            else:
+                self._expect("}")
+                return result
+
+    def _array(self):
+        result = []
+        self._expect("[")
+        if self._peek() == "]":
+            self._pos += 1
+            return result
+        while True:
+            result.append(self.value())
+            if self._peek() == ",":
+                self._pos += 1
+            else:
+                self._expect("]")
+                return result
+
+    def _string(self):
+        self._expect('"')
+        result = ""
+        while True:
+            char = self._text[self._pos]
+            self._pos += 1
+            if char == '"':
+                return result
+            if char == "\\":
+                char = self._text[self._pos]
+                self._pos += 1
+                if char == "u":
+                    result += chr(int(self._text[self._pos : self._pos + 4], 16))
+                    self._pos += 4
+                else:
+                    result += _ESCAPES.get(char, char)
+            else:
+                result += char
+
+    def _number(self):
+        start = self._pos
+        while (
+            self._pos < len(self._text) and self._text[self._pos] in "+-0123456789.eE"
+        ):
+            self._pos += 1
+        number = self._text[start : self._pos]
+        if not number:
+            raise ValueError("Unexpected input at " + str(start) + ": " + self._text)
+        if "." in number or "e" in number or "E" in number:
+            return float(number)
+        return int(number)
+
+
+def decode_value(text):
+    return _Decoder(text).decode()
+
+
+def read_records(path):
+    with open(path, encoding="utf-8") as stream:
+        return [decode_value(line) for line in stream if line.strip()]
+
+
+def host_info():
+    return {
+        "implementation": sys.implementation.name,
+        "version": platform.python_version(),
+        "host": platform.node(),
+        "system": platform.system(),
+        "machine": platform.machine(),
+    }
+
+
+_UNITS = (("_bytes", "B"), ("_ns", "ns"), ("_pct", "%"))
+
+
+def _format_measurement(key, value, separator=": "):
+    for suffix, unit in _UNITS:
+        if key.endswith(suffix):
+            key = key[: -len(suffix)]
+            break
+    else:
+        unit = ""
+
+    if isinstance(value, float):
+        value = round(value, 2)
+    return key.replace("_", "-") + separator + str(value) + unit
+
+
+class TextReporter:
+    def start(self, run):
+        print("Starting " + run.name + " benchmark ...")
+
+    def environment(self, run):
+        for warning in run.environment["warnings"]:
+            print(run.name + ": environment: " + warning)
+
+    def timer(self, run):
+        # without "name: criterion: value" to keep ReBench from attributing
+        # the calibration to the first iteration
+        print(
+            run.name
+            + " timer clock="
+            + run.clock
+            + " resolution="
+            + str(run.timer.resolution_ns)
+            + "ns declared-resolution="
+            + str(run.timer.declared_resolution_ns)
+            + "ns overhead="
+            + str(run.timer.overhead_ns)
+            + "ns"
+        )
+
+    def autorange(self, run):
+        print(
+            run.name
+            + " autorange inner-iterations="
+            + str(run.inner_iterations)
+            + " sample="
+            + str(run.autorange_sample // 1000)
+            + "us"
+        )
+
+    def iteration(self, run, _iteration, run_time_ns, measurements):
+        # ReBench completes a data point with the runtime line, so the other
+        # criteria of the iteration have to come first
+        for key, value in measurements.items():
+            # detailed lists, e.g., of GC pauses, are only in the JSON records
+            if not isinstance(value, list):
+                print(run.name + ": " + _format_measurement(key, value))
+        print(run.name + ": iterations=1 runtime: " + str(run_time_ns // 1000) + "us")
+
+    def untimed(self, run, measurements):
+        print(
+            run.name
+            + ": untimed iteration: "
+            + " ".join(
+                _format_measurement(key, value, "=")
+                for key, value in measurements.items()
+            )
+        )
+
+    def summary(self, run):
+        total = run.get_total()
+        if run.phase is not None:
+            self._print_phases(run)
+        if run.stop_reason is not None:
+            print(
+                run.name
+                + ": stopped after "
+                + str(len(run.get_run_times()))
+                + " iterations: "
+                + run.stop_reason
+            )
+        statistics = run.get_statistics()
+        if statistics is not None:
+            self._print_statistics(run, statistics)
+        if run.is_autoranged() and run.get_run_times():
+            per_inner = run.get_total_ns() / len(run.get_run_times())
+            print(
+                run.name
+                + ": per inner iteration: average: "
+                + str(round(per_inner / run.inner_iterations))
+                + "ns"
+            )
+        print(
+            run.name
+            + ": iterations="
+            + str(len(run.get_run_times()))
+            + " average: "
+            + str(round(total / max(len(run.get_run_times()), 1)))
+            + "us total: "
+            + str(total)
+            + "us\n"
+        )
+        print()
+
+    @staticmethod
+    def _print_phase(run, phase, run_times):
+        total = sum(run_times) // 1000
+        print(
+            run.name
+            + ": "
+            + phase
+            + " iterations="
+            + str(len(run_times))
+            + " average: "
+            + str(round(total / max(len(run_times), 1)))
+            + "us total: "
+            + str(total)
+            + "us"
+        )
+
+    @staticmethod
+    def _print_statistics(run, statistics):
+        def us(key):
+            return str(round(statistics[key] / 1000)) + "us"
+
+        print(
+            run.name
+            + ": median: "
+            + us("median")
+            + " trimmed-mean: "
+            + us("trimmed_mean")
+            + " p50: "
+            + us("p50")
+            + " p90: "
+            + us("p90")
+            + " p99: "
+            + us("p99")
+        )
+        print(
+            run.name
+            + ": 95% confidence interval of the median: ["
+            + us("ci95_low")
+            + ", "
+            + us("ci95_high")
+            + "] outliers: "
+            + str(len(statistics["outliers"]))
+            + " "
+            + str(statistics["outliers"])
+        )
+
+    def _print_phases(self, run):
+        self._print_phase(run, "warmup", run.get_warmup_run_times())
+        if run.warmup_iterations is None:
+            print(
+                run.name
+                + ": no steady state detected after "
+                + str(len(run.get_run_times()))
+                + " iterations"
+            )
+        else:
+            self._print_phase(run, "steady", run.get_steady_run_times())
+
+    def total(self, _run, total):
+        print("Total Runtime: " + str(total) + "us")
+
+
+# Writes to stdout, or appends to the file at path. The file is opened for
+# each record, as executor.DataFile does, so that it is closed between the
+# records, and complete even if the run fails.
+class JsonLinesReporter:
+    def __init__(self, path=None):
+        self._path = path
+        self._host_info = host_info()
+
+    def _write(self, run, record):
+        if run.environment is not None:
+            record["environment"] = run.environment
+        record.update(self._host_info)
+        line = encode_value(record) + "\n"
+        if self._path is None:
+            sys.stdout.write(line)
+            sys.stdout.flush()
+        else:
+            with open(self._path, "a", encoding="utf-8") as stream:
+                stream.write(line)
+
+    def start(self, run):
+        pass
+
+    def environment(self, run):
+        self._write(run, {"type": "environment", "benchmark": run.name})
+
+    def timer(self, run):
+        self._write(
+            run,
+            {
+                "type": "timer",
+                "benchmark": run.name,
+                "clock": run.clock,
+                "resolution_ns": run.timer.resolution_ns,
+                "declared_resolution_ns": run.timer.declared_resolution_ns,
+                "overhead_ns": run.timer.overhead_ns,
+            },
+        )
+
+    def autorange(self, run):
+        self._write(
+            run,
+            {
+                "type": "autorange",
+                "benchmark": run.name,
+                "inner_iterations": run.inner_iterations,
+                "sample_ns": run.autorange_sample,
+            },
+        )
+
+    def iteration(self, run, iteration, run_time_ns, measurements):
+        record = {
+            "type": "iteration",
+            "benchmark": run.name,
+            "iteration": iteration,
+            "inner_iterations": run.inner_iterations,
+            "run_time_ns": run_time_ns,
+        }
+        if run.phase is not None:
+            record["phase"] = run.phase
+        if run.is_autoranged():
+            record["run_time_per_inner_ns"] = run_time_ns / run.inner_iterations
+        record.update(measurements)
+        self._write(run, record)
+
+    def untimed(self, run, measurements):
+        record = {
+            "type": "untimed",
+            "benchmark": run.name,
+            "inner_iterations": run.inner_iterations,
+        }
+        record.update(measurements)
+        self._write(run, record)
+
+    def summary(self, run):
+        record = {
+            "type": "summary",
+            "benchmark": run.name,
+            "iterations": len(run.get_run_times()),
+            "inner_iterations": run.inner_iterations,
+            "total_ns": run.get_total_ns(),
+        }
+        if run.phase is not None:
+            record["warmup_iterations"] = len(run.get_warmup_run_times())
+            record["steady_iterations"] = len(run.get_steady_run_times())
+            record["steady_state_detected"] = run.warmup_iterations is not None
+        if run.stop_reason is not None:
+            record["stop_reason"] = run.stop_reason
+        statistics = run.get_statistics()
+        if statistics is not None:
+            record["statistics"] = statistics
+        self._write(run, record)
+
+    def total(self, run, total):
+        pass
@@ -21,63 +21,295 @@
 # THE SOFTWARE.
 from time import perf_counter_ns
 
+from benchmark import Benchmark
+from clocks import CLOCKS, calibrate
+from registry import REGISTRY
+from reporter import TextReporter
+from stats import relative_ci_half_width, summarize
+from steady_state import SteadyStateDetector
 
-def _get_suite_from_name(name):
-    module = __import__(name.lower())
-    return getattr(module, name)
+# iterations needed before the precision target is checked, so that the
+# confidence interval is not based on a few similar early values
+MIN_PRECISION_ITERATIONS = 10
 
 
-class Run:
-    def __init__(self, name):
-        self._name = name
-        self._benchmark_suite = _get_suite_from_name(name)
+class Run:  # pylint: disable=too-many-public-methods
+    def __init__(self, name, benchmark_suite=None):
+        self.name = name
+        self._benchmark_suite = benchmark_suite or REGISTRY.load(name)
         self._total = 0
-        self._num_iterations = 1
-        self._inner_iterations = 1
+        self._run_times = []
+        self.num_iterations = 1
+        self.inner_iterations = 1
+        self._reporters = [TextReporter()]
+        self._statistics = False
+        self._probes = []
+
+        self._steady_state_iterations = None
+        self._warmup_window = 10
+        self._warmup_tolerance = 0.05
+        self.phase = None
+        self.warmup_iterations = None
+
+        self._autorange_target = None
+        self.autorange_sample = None
+
+        self.clock = "perf_counter"
+        self._clock = CLOCKS[self.clock]
+        self.timer = None
+
+        self._time_budget = None
+        self._precision = None
+        self._start_time = None
+        self.stop_reason = None
+        self._environment_audit = None
+        self.environment = None
 
     def run_benchmark(self):
-        print("Starting " + self._name + " benchmark ...")
+        bench = self.start_benchmark()
+        try:
+            for _ in self.iterate(bench):
+                pass
+        finally:
+            self._stop_probes()
+        self._report("summary")
+
+    # start_benchmark(), iterate(), and finish_benchmark() allow callers to
+    # drive the iterations themselves, e.g., to interleave benchmarks
+    def start_benchmark(self):
+        self._report("start")
+        if self._environment_audit is not None:
+            self.environment = self._environment_audit()
+            self._report("environment")
+        self.timer = calibrate(self.clock)
+        self._report("timer")
 
-        self._do_runs(self._benchmark_suite())
-        self._report_benchmark()
-        print()
+        bench = self._benchmark_suite()
+        if self._autorange_target is not None:
+            self._autorange(bench)
+        for probe in self._probes:
+            probe.start()
+        return bench
 
-    def measure(self, bench):
-        start_time = perf_counter_ns()
-        if not bench.inner_benchmark_loop(self._inner_iterations):
+    def _sample(self, bench, inner_iterations):
+        start_time = self._clock()
+        if not bench.inner_benchmark_loop(inner_iterations):
             raise Exception("Benchmark failed with incorrect result")
+        return self._clock() - start_time
 
-        end_time = perf_counter_ns()
-        run_time = (end_time - start_time) // 1000
+    # Grows inner_iterations in 1, 2, 5, 10, 20, 50, ... steps until a
+    # sample takes at least the target time.
+    def _autorange(self, bench):
+        candidates = (
+            multiplier * 10**exponent
+            for exponent in range(12)
+            for multiplier in (1, 2, 5)
+        )
+        for inner_iterations in candidates:
+            self.inner_iterations = inner_iterations
+            self.autorange_sample = self._sample(bench, inner_iterations)
+            if self.autorange_sample >= self._autorange_target:
+                break
 
-        self._print_result(run_time)
+        self._report("autorange")
+
+    def finish_benchmark(self):
+        self._stop_probes()
+        self._report("summary")
+
+    def _stop_probes(self):
+        for probe in reversed(self._probes):
+            probe.stop()
+
+    def measure(self, bench, iteration=1):
+        for probe in self._probes:
+            probe.before_iteration()
+
+        start_time = self._clock()
+        if not bench.inner_benchmark_loop(self.inner_iterations):
+            raise Exception("Benchmark failed with incorrect result")
+
+        end_time = self._clock()
+        run_time, corrected = self.timer.correct(end_time - start_time)
+
+        measurements = {}
+        if corrected:
+            measurements["timer_overhead_ns"] = self.timer.overhead_ns
+        for probe in reversed(self._probes):
+            probe.after_iteration(run_time, measurements)
+
+        self._report("iteration", iteration, run_time, measurements)
 
         self._total += run_time
+        self._run_times.append(run_time)
+        return run_time
 
-    def _do_runs(self, bench):
-        for _ in range(self._num_iterations):
-            self.measure(bench)
-
-    def _report_benchmark(self):
-        print(
-            self._name
-            + ": iterations="
-            + str(self._num_iterations)
-            + " average: "
-            + str(round(self._total / self._num_iterations))
-            + "us total: "
-            + str(self._total)
-            + "us\n"
-        )
+    # Yields the number of each iteration after it is measured, and stops
+    # after the last one, as given by num_iterations, the steady state, the
+    # time budget, or the precision target.
+    def iterate(self, bench):
+        self._start_time = perf_counter_ns()
+        yield from self._iterations(bench)
+        self._untimed_pass(bench)
+
+    def _iterations(self, bench):
+        if self._steady_state_iterations is None:
+            for i in range(self.num_iterations):
+                self.measure(bench, i + 1)
+                yield i + 1
+                if self._is_done(self._run_times):
+                    return
+            return
+
+        # num_iterations bounds the warmup, and once a steady state is
+        # detected, a fixed number of steady-state iterations is measured
+        self.phase = "warmup"
+        detector = SteadyStateDetector(self._warmup_window, self._warmup_tolerance)
+        iteration = 0
+        while iteration < self.num_iterations:
+            iteration += 1
+            is_steady = detector.is_steady(self.measure(bench, iteration))
+            yield iteration
+            if is_steady:
+                self.warmup_iterations = iteration
+                break
+            if self._is_done([]):
+                return
+
+        if self.warmup_iterations is None:
+            return
+
+        self.phase = "steady"
+        for _ in range(self._steady_state_iterations):
+            iteration += 1
+            self.measure(bench, iteration)
+            yield iteration
+            if self._is_done(self.get_steady_run_times()):
+                return
+
+    # Probes may run one more iteration after the measured ones, e.g., under
+    # instrumentation that would distort the run time. It is not part of the
+    # run times, the time budget, or the warmup.
+    def _untimed_pass(self, bench):
+        measurements = {}
+        for probe in self._probes:
+            probe.untimed_pass(
+                lambda: self._sample(bench, self.inner_iterations), measurements
+            )
+        if measurements:
+            self._report("untimed", measurements)
+
+    # The time budget is wall-clock time since the first iteration. The
+    # precision target applies to the given run times, i.e., only to the
+    # steady-state iterations if the steady state is detected.
+    def _is_done(self, run_times):
+        if (
+            self._time_budget is not None
+            and perf_counter_ns() - self._start_time >= self._time_budget
+        ):
+            self.stop_reason = "time budget exhausted"
+            return True
+        if (
+            self._precision is not None
+            and len(run_times) >= MIN_PRECISION_ITERATIONS
+            and relative_ci_half_width(run_times) <= self._precision
+        ):
+            self.stop_reason = "precision reached"
+            return True
+        return False
 
-    def _print_result(self, run_time):
-        print(self._name + ": iterations=1 runtime: " + str(run_time) + "us")
+    def _report(self, event, *args):
+        for reporter in self._reporters:
+            getattr(reporter, event)(self, *args)
 
-    def print_total(self):
-        print("Total Runtime: " + str(self._total) + "us")
+    # A batch of runs reports the total of all of them
+    def print_total(self, total=None):
+        self._report("total", self.get_total() if total is None else total)
+
+    def get_total(self):
+        return self._total // 1000
+
+    def get_total_ns(self):
+        return self._total
+
+    def get_run_times(self):
+        return self._run_times
+
+    def get_warmup_run_times(self):
+        if self.warmup_iterations is None:
+            return self._run_times
+        return self._run_times[: self.warmup_iterations]
+
+    def get_steady_run_times(self):
+        if self.warmup_iterations is None:
+            return []
+        return self._run_times[self.warmup_iterations :]
+
+    # summarizes the steady-state iterations if they were detected,
+    # and all iterations otherwise
+    def get_statistics(self):
+        if not self._statistics:
+            return None
+        if self.warmup_iterations is not None:
+            offset = self.warmup_iterations
+        else:
+            offset = 0
+        run_times = self._run_times[offset:]
+        if not run_times:
+            return None
+
+        statistics = summarize(run_times)
+        statistics["outliers"] = [i + offset + 1 for i in statistics["outliers"]]
+        return statistics
 
     def set_num_iterations(self, num_iterations):
-        self._num_iterations = num_iterations
+        self.num_iterations = num_iterations
 
     def set_inner_iterations(self, inner_iterations):
-        self._inner_iterations = inner_iterations
+        self.inner_iterations = inner_iterations
+
+    def set_reporters(self, reporters):
+        self._reporters = reporters
+
+    def add_probe(self, probe):
+        self._probes.append(probe)
+
+    def set_clock(self, clock):
+        self.clock = clock
+        self._clock = CLOCKS[clock]
+
+    # audit is called before each benchmark, and returns the environment
+    def set_environment_audit(self, audit):
+        self._environment_audit = audit
+
+    def set_autorange(self, target_ns):
+        self._autorange_target = target_ns
+
+    # Benchmarks with their own inner loop, e.g., Mandelbrot or CD, take
+    # inner_iterations as a problem size, not as a number of repetitions.
+    def has_problem_size(self):
+        return (
+            self._benchmark_suite.inner_benchmark_loop
+            is not Benchmark.inner_benchmark_loop
+        )
+
+    def is_autoranged(self):
+        return self._autorange_target is not None
+
+    def set_time_budget(self, time_budget_ns):
+        self._time_budget = time_budget_ns
+
+    def set_precision(self, precision):
+        self._precision = precision
+
+    def set_statistics(self, statistics):
+        self._statistics = statistics
+
+    def set_steady_state_iterations(self, steady_state_iterations):
+        self._steady_state_iterations = steady_state_iterations
+
+    def set_warmup_window(self, warmup_window):
+        self._warmup_window = warmup_window
+
+    def set_warmup_tolerance(self, warmup_tolerance):
+        self._warmup_tolerance = warmup_tolerance
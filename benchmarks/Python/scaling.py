@@ -0,0 +1,271 @@
+# Copyright (c) 2024 see AUTHORS.md file
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the 'Software'), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED 'AS IS', WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import os
+import subprocess
+import sys
+import threading
+from time import perf_counter_ns
+
+from parallel import parse_cores
+from registry import REGISTRY, UnknownBenchmarkError
+from reporter import decode_value, encode_value
+from stats import median
+
+_SCALING_OPTIONS = ("threads", "iterations", "inner-iter", "compare-gil", "python")
+
+DEFAULT_BENCHMARKS = "Richards,DeltaBlue,NBody,Json"
+
+
+def gil_enabled():
+    # sys._is_gil_enabled() exists since 3.13, before, the GIL is always on
+    if not hasattr(sys, "_is_gil_enabled"):
+        return True
+    return sys._is_gil_enabled()  # pylint: disable=protected-access,no-member
+
+
+class ScalingResult:
+    def __init__(self, name, threads, wall_time_ns, run_times):
+        self.name = name
+        self.threads = threads
+        self.wall_time_ns = wall_time_ns
+        self.run_times = run_times
+
+    # completed iterations per second, over all threads
+    def throughput(self):
+        return len(self.run_times) / (self.wall_time_ns / 1e9)
+
+    def median_latency(self):
+        return median(self.run_times)
+
+    def efficiency(self, single_thread):
+        return self.throughput() / (self.threads * single_thread.throughput())
+
+    def to_record(self):
+        return {
+            "benchmark": self.name,
+            "threads": self.threads,
+            "wall_time_ns": self.wall_time_ns,
+            "run_times_ns": self.run_times,
+            "gil_enabled": gil_enabled(),
+        }
+
+
+# Runs an independent instance of the benchmark in each thread. The threads
+# start together at a barrier, and each measures its own iterations.
+def measure_scaling(info, threads, num_iterations, inner_iterations):
+    suite = info.load()
+    benches = [suite() for _ in range(threads)]
+    run_times = [[] for _ in range(threads)]
+    failures = []
+    barrier = threading.Barrier(threads + 1)
+
+    def run_thread(bench, thread_run_times):
+        barrier.wait()
+        for _ in range(num_iterations):
+            start_time = perf_counter_ns()
+            if not bench.inner_benchmark_loop(inner_iterations):
+                failures.append(info.name)
+                return
+            thread_run_times.append(perf_counter_ns() - start_time)
+
+    workers = [
+        threading.Thread(target=run_thread, args=(bench, times))
+        for bench, times in zip(benches, run_times)
+    ]
+    for worker in workers:
+        worker.start()
+    barrier.wait()
+    start_time = perf_counter_ns()
+    for worker in workers:
+        worker.join()
+    wall_time = perf_counter_ns() - start_time
+
+    if failures:
+        raise Exception("Benchmark failed with incorrect result")
+    return ScalingResult(
+        info.name, threads, wall_time, [t for times in run_times for t in times]
+    )
+
+
+def print_results(results):
+    print(
+        "Benchmark".ljust(12)
+        + "Threads".rjust(8)
+        + "Throughput".rjust(13)
+        + "Latency".rjust(12)
+        + "Efficiency".rjust(12)
+    )
+    for result in results:
+        single_thread = next(
+            r for r in results if r.name == result.name and r.threads == 1
+        )
+        print(
+            result.name.ljust(12)
+            + str(result.threads).rjust(8)
+            + (format(result.throughput(), ".1f") + "/s").rjust(13)
+            + (str(round(result.median_latency() / 1000)) + "us").rjust(12)
+            + (format(100 * result.efficiency(single_thread), ".0f") + "%").rjust(12)
+        )
+
+
+# Runs the sweep in an interpreter with PYTHON_GIL set, which switches the
+# GIL on or off in free-threaded builds, and is ignored by others.
+def run_with_gil(python, gil, args):
+    env = dict(os.environ, PYTHON_GIL=gil)
+    output = subprocess.run(
+        [python, os.path.abspath(__file__), "--records"] + args,
+        env=env,
+        stdout=subprocess.PIPE,
+        check=True,
+        text=True,
+    ).stdout
+    results = []
+    gil_states = set()
+    for line in output.splitlines():
+        record = decode_value(line)
+        gil_states.add(record["gil_enabled"])
+        results.append(
+            ScalingResult(
+                record["benchmark"],
+                record["threads"],
+                record["wall_time_ns"],
+                record["run_times_ns"],
+            )
+        )
+    return results, gil_states == {True}
+
+
+def compare_gil(python, args):
+    with_gil, _ = run_with_gil(python, "1", args)
+    without_gil, gil_was_enabled = run_with_gil(python, "0", args)
+
+    print("GIL enabled:")
+    print_results(with_gil)
+    print()
+    if gil_was_enabled:
+        print(python + " is not a free-threaded build, the GIL stays enabled:")
+    else:
+        print("Free-threaded:")
+    print_results(without_gil)
+    print()
+
+    print("Benchmark".ljust(12) + "Threads".rjust(8) + "Free-threaded/GIL".rjust(19))
+    for gil, free in zip(with_gil, without_gil):
+        print(
+            gil.name.ljust(12)
+            + str(gil.threads).rjust(8)
+            + format(free.throughput() / gil.throughput(), ".2f").rjust(19)
+        )
+
+
+def default_threads():
+    if hasattr(os, "sched_getaffinity"):
+        num_cores = len(os.sched_getaffinity(0))
+    else:
+        num_cores = os.cpu_count() or 1
+    return list(range(1, num_cores + 1))
+
+
+def print_usage():
+    print("./scaling.py [options] [benchmarks]")
+    print()
+    print("Runs independent instances of each benchmark in 1 to n threads at")
+    print("the same time, and reports the throughput in iterations per second,")
+    print("the median latency of an iteration, and the scaling efficiency, i.e.,")
+    print("the throughput relative to n times the single-thread throughput.")
+    print()
+    print("  benchmarks - selection as for harness.py,")
+    print("               default: " + DEFAULT_BENCHMARKS)
+    print()
+    print("Options:")
+    print("  --threads=list  - thread counts, e.g., 1,2,4 or 1-8, default: 1 up")
+    print("                    to the number of available cores")
+    print("  --iterations=n  - iterations per thread, default: 10")
+    print("  --inner-iter=n  - inner iterations, or `default` for the problem")
+    print("                    size of rebench.conf, default: 1")
+    print("  --compare-gil   - run the sweep with the GIL enabled and disabled,")
+    print("                    which requires a free-threaded build (3.13t+)")
+    print("  --python=path   - interpreter for --compare-gil, default: this one")
+
+
+def main(args):
+    options = {}
+    selection = DEFAULT_BENCHMARKS
+    records = False
+    passed_on = []
+    for arg in args[1:]:
+        if arg in ("-h", "--help"):
+            print_usage()
+            return 0
+        name, _, value = arg[2:].partition("=")
+        if arg == "--records":
+            records = True
+        elif arg.startswith("--") and name in _SCALING_OPTIONS:
+            options[name] = value
+            if name not in ("compare-gil", "python"):
+                passed_on.append(arg)
+        elif arg.startswith("--"):
+            print("Unknown option: " + arg)
+            print_usage()
+            return 1
+        else:
+            selection = arg
+            passed_on.append(arg)
+
+    if "compare-gil" in options:
+        compare_gil(options.get("python") or sys.executable, passed_on)
+        return 0
+
+    if "threads" in options:
+        thread_counts = parse_cores(options["threads"])
+    else:
+        thread_counts = default_threads()
+    if 1 not in thread_counts:
+        thread_counts = [1] + thread_counts
+    num_iterations = int(options.get("iterations", 10))
+
+    try:
+        infos = REGISTRY.select(selection)
+    except UnknownBenchmarkError as error:
+        print(error)
+        return 1
+
+    results = []
+    for info in infos:
+        inner_iterations = options.get("inner-iter", "1")
+        if inner_iterations == "default":
+            inner_iterations = info.default_size()
+        for threads in thread_counts:
+            result = measure_scaling(
+                info, threads, num_iterations, int(inner_iterations)
+            )
+            if records:
+                print(encode_value(result.to_record()))
+            results.append(result)
+
+    if not records:
+        if not gil_enabled():
+            print("Free-threaded, the GIL is disabled")
+        print_results(results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
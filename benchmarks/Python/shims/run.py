@@ -0,0 +1,188 @@
+# This code is based on the SOM class library.
+#
+# Copyright (c) 2001-2021 see AUTHORS.md file
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the 'Software'), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED 'AS IS', WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import sys
+
+# timing is the timing module of the runtime, see bundle.py
+# pylint: disable-next=import-error
+from timing import (
+    CLOCKS,
+    DEFAULT_CLOCK,
+    mem_alloc,
+    mem_free,
+    new_sample_buffer,
+    ticks_diff,
+)
+
+# the number of run times kept to be printed, the most recent ones
+SAMPLE_SIZE = 1000
+
+
+# The harness of the single-file variants for constrained runtimes, which
+# bundle.py inlines with the timing module of the runtime. The most recent
+# run times are stored in a buffer of at most SAMPLE_SIZE entries, allocated
+# before the first iteration, so that measuring neither allocates nor
+# prints. They are printed after the run, unless --summary-only is given. The
+# number of iterations, inner iterations, and the clock can be given as
+# arguments, where the runtime has them, and --heap records the heap usage
+# around each iteration.
+class Run:
+    def __init__(self, name, benchmark_suite, num_iterations):
+        self._name = name
+        self._benchmark_suite = benchmark_suite
+        self._num_iterations = num_iterations
+        self._inner_iterations = 1
+        self._clock, self._unit = CLOCKS[DEFAULT_CLOCK]
+        self._print_iterations = True
+        self._heap_tracking = False
+        self._heap = None
+
+    def run_benchmark(self):
+        print("Starting " + self._name + " benchmark ...")
+
+        bench = self._benchmark_suite()
+        run_times = new_sample_buffer(min(self._num_iterations, SAMPLE_SIZE))
+        if self._heap_tracking:
+            total = self._do_heap_runs(bench, run_times)
+        else:
+            total = self._do_runs(bench, run_times)
+
+        if self._print_iterations:
+            self._print_results(run_times)
+        if self._heap_tracking:
+            self._report_heap()
+        self._report_benchmark(total)
+        print()
+
+    def measure(self, bench):
+        clock = self._clock
+        start_time = clock()
+        if not bench.inner_benchmark_loop(self._inner_iterations):
+            raise Exception("Benchmark failed with incorrect result")
+        return ticks_diff(clock(), start_time)
+
+    # Keeps the most recent run times in the buffer, and returns the total.
+    def _do_runs(self, bench, run_times):
+        size = len(run_times)
+        total = 0
+        for i in range(self._num_iterations):
+            run_time = self.measure(bench)
+            run_times[i % size] = run_time
+            total += run_time
+        return total
+
+    # Records the allocated bytes before and after each iteration, and the
+    # free bytes after it, outside of the timed region. Only the largest
+    # allocation, the least free memory, and the iterations after which less
+    # is allocated than before are kept, so that tracking allocates nothing.
+    # The runtime does not count collections, so these iterations are a lower
+    # bound of the ones with a collection.
+    def _do_heap_runs(self, bench, run_times):
+        size = len(run_times)
+        total = 0
+        collections = 0
+        max_alloc = mem_alloc()
+        min_free = mem_free()
+        for i in range(self._num_iterations):
+            alloc_before = mem_alloc()
+            run_time = self.measure(bench)
+            alloc_after = mem_alloc()
+            free_after = mem_free()
+
+            if alloc_after < alloc_before:
+                collections += 1
+            max_alloc = max(max_alloc, alloc_after)
+            min_free = min(min_free, free_after)
+            run_times[i % size] = run_time
+            total += run_time
+
+        self._heap = (collections, max_alloc, min_free)
+        return total
+
+    def _report_heap(self):
+        collections, max_alloc, min_free = self._heap
+        print(
+            self._name
+            + ": heap: iterations-with-collection: "
+            + str(collections)
+            + " max-alloc: "
+            + str(max_alloc)
+            + "B min-free: "
+            + str(min_free)
+            + "B"
+        )
+
+    def _report_benchmark(self, total):
+        print(
+            self._name
+            + ": iterations="
+            + str(self._num_iterations)
+            + " average: "
+            + str(total // self._num_iterations)
+            + self._unit
+            + " total: "
+            + str(total)
+            + self._unit
+            + "\n"
+        )
+
+    # prints the kept run times from the oldest to the most recent
+    def _print_results(self, run_times):
+        size = len(run_times)
+        for i in range(self._num_iterations - size, self._num_iterations):
+            self._print_result(run_times[i % size])
+
+    def _print_result(self, run_time):
+        print(self._name + ": iterations=1 runtime: " + str(run_time) + self._unit)
+
+    def set_num_iterations(self, num_iterations):
+        self._num_iterations = num_iterations
+
+    def set_inner_iterations(self, inner_iterations):
+        self._inner_iterations = inner_iterations
+
+    def set_clock(self, clock):
+        self._clock, self._unit = CLOCKS[clock]
+
+    def set_print_iterations(self, print_iterations):
+        self._print_iterations = print_iterations
+
+    def set_heap_tracking(self, heap_tracking):
+        self._heap_tracking = heap_tracking
+
+
+def main(name, benchmark_suite, num_iterations):
+    run = Run(name, benchmark_suite, num_iterations)
+    args = [arg for arg in sys.argv[1:] if arg[:2] != "--"]
+    if "--summary-only" in sys.argv:
+        run.set_print_iterations(False)
+    if "--heap" in sys.argv:
+        if mem_alloc is None:
+            print("The runtime does not report its heap usage")
+            sys.exit(1)
+        run.set_heap_tracking(True)
+    if len(args) > 0:
+        run.set_num_iterations(int(args[0]))
+    if len(args) > 1:
+        run.set_inner_iterations(int(args[1]))
+    if len(args) > 2:
+        run.set_clock(args[2])
+    run.run_benchmark()
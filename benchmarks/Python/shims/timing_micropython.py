@@ -0,0 +1,42 @@
+# Copyright (c) 2024 see AUTHORS.md file
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the 'Software'), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED 'AS IS', WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+from array import array
+from gc import mem_alloc, mem_free  # pylint: disable=no-name-in-module,unused-import
+
+import utime  # pylint: disable=import-error
+
+# ticks_us() counts microseconds, and ticks_cpu() the highest-resolution
+# counter of the port, e.g., CPU cycles, in port-specific units. Both wrap
+# around, which ticks_diff() accounts for.
+CLOCKS = {
+    "us": (utime.ticks_us, "us"),
+    "cpu": (utime.ticks_cpu, "cpu-ticks"),
+}
+DEFAULT_CLOCK = "us"
+
+
+def ticks_diff(end, start):
+    return utime.ticks_diff(end, start)
+
+
+# 4 bytes per run time, which does not overflow, as ticks_diff() is less
+# than half of the ticks period; "L" has 8 bytes on 64-bit unix ports
+def new_sample_buffer(size):
+    return array("I", bytes(4 * size))
@@ -0,0 +1,39 @@
+# Copyright (c) 2024 see AUTHORS.md file
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the 'Software'), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED 'AS IS', WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import time
+
+# time.time() is wall-clock time, which may jump, so the monotonic clocks are
+# preferred where the runtime has them
+CLOCKS = {
+    "us": (getattr(time, "perf_counter", getattr(time, "monotonic", time.time)), "us")
+}
+DEFAULT_CLOCK = "us"
+
+# the heap usage is not available
+mem_alloc = None  # pylint: disable=invalid-name
+mem_free = None  # pylint: disable=invalid-name
+
+
+def ticks_diff(end, start):
+    return round((end - start) * 1000000)
+
+
+def new_sample_buffer(size):
+    return [0] * size
@@ -0,0 +1,120 @@
+# This code is based on the SOM class library.
+#
+# Copyright (c) 2001-2021 see AUTHORS.md file
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the 'Software'), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED 'AS IS', WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+from som.dictionary import Dictionary, Entry
+from som.identity_dictionary import _IdEntry
+from som.identity_set import IdentitySet
+from som.set import Set
+from som.vector import Vector
+
+# Counts operations of the collection library to characterize the
+# workload of the benchmarks. The counters are installed by replacing the
+# methods with counting wrappers, so that the library itself is unchanged
+# and has no overhead while they are not installed.
+
+COUNTS = {
+    "dictionary_probes": 0,
+    "dictionary_chain_steps": 0,
+    "dictionary_resizes": 0,
+    "vector_growths": 0,
+    "vector_growth_copied_elements": 0,
+    "set_contains": 0,
+    "set_scanned_elements": 0,
+}
+
+_originals = []
+
+# install() and uninstall() nest, e.g., for interleaved runs that each count,
+# and only the outermost ones replace and restore the methods
+_nesting = [0]
+
+
+def _count(name):
+    def wrap(original):
+        def counting(*args):
+            COUNTS[name] += 1
+            return original(*args)
+
+        return counting
+
+    return wrap
+
+
+# at_put() and append() grow the storage in place, and copy all elements
+def _count_growth(original):
+    def counting(self, *args):
+        capacity = self.capacity()
+        original(self, *args)
+        if self.capacity() != capacity:
+            COUNTS["vector_growths"] += 1
+            COUNTS["vector_growth_copied_elements"] += capacity
+
+    return counting
+
+
+def _count_scan(original):
+    def has_some(self, block):
+        def counting_block(item):
+            COUNTS["set_scanned_elements"] += 1
+            return block(item)
+
+        return original(self, counting_block)
+
+    return has_some
+
+
+_INSTRUMENTED = (
+    (Dictionary, "at", _count("dictionary_probes")),
+    (Dictionary, "contains_key", _count("dictionary_probes")),
+    (Dictionary, "at_put", _count("dictionary_probes")),
+    (Dictionary, "_resize", _count("dictionary_resizes")),
+    (Entry, "match", _count("dictionary_chain_steps")),
+    (_IdEntry, "match", _count("dictionary_chain_steps")),
+    (Vector, "append", _count_growth),
+    (Vector, "at_put", _count_growth),
+    (Set, "contains", _count("set_contains")),
+    (IdentitySet, "contains", _count("set_contains")),
+    (Set, "has_some", _count_scan),
+)
+
+
+def install():
+    _nesting[0] += 1
+    if _originals:
+        return
+    for cls, name, wrap in _INSTRUMENTED:
+        original = cls.__dict__[name]
+        _originals.append((cls, name, original))
+        setattr(cls, name, wrap(original))
+
+
+def uninstall():
+    _nesting[0] = max(_nesting[0] - 1, 0)
+    if _nesting[0] > 0:
+        return
+    while _originals:
+        cls, name, original = _originals.pop()
+        setattr(cls, name, original)
+
+
+def reset():
+    for name in COUNTS:
+        COUNTS[name] = 0
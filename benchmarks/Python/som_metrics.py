@@ -0,0 +1,85 @@
+# Copyright (c) 2024 see AUTHORS.md file
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the 'Software'), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED 'AS IS', WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import sys
+
+from probes import SomCounterProbe
+from rebench_conf import TEST_CONF, benchmark_sizes, load_conf
+from registry import REGISTRY, UnknownBenchmarkError
+from run import Run
+from som import counters
+
+
+def count_operations(info, inner_iterations):
+    run = Run(info.name, info.load())
+    run.set_inner_iterations(inner_iterations)
+    run.set_reporters([])
+    run.add_probe(SomCounterProbe())
+    run.run_benchmark()
+    return dict(counters.COUNTS)
+
+
+# prints the table in the format of docs/metrics.md
+def print_table(results):
+    print('<table frame="hsides" rules="groups">')
+    print("<thead>")
+    print('<tr class="center">')
+    print("  <th></th>")
+    for name in counters.COUNTS:
+        print("  <th>" + name.replace("_", " ").capitalize() + "</th>")
+    print("</tr>")
+    print("</thead>")
+    print("<tbody>")
+    for benchmark, counts in results:
+        print('<tr class="center">')
+        print('  <th class="left">' + benchmark + "</th>")
+        for name in counters.COUNTS:
+            print('  <td class="right">' + str(counts[name]) + "</td>")
+        print("</tr>")
+    print("</tbody>")
+    print("</table>")
+
+
+# Counts the operations of one iteration of each selected benchmark, by
+# default with the problem sizes of test.conf.
+def main(args):
+    selection = args[1] if len(args) > 1 else "all"
+    inner_iterations = args[2] if len(args) > 2 else None
+    test_sizes = dict(benchmark_sizes(load_conf(TEST_CONF)))
+    try:
+        infos = REGISTRY.select(selection)
+    except UnknownBenchmarkError as error:
+        print(error)
+        return 1
+
+    results = []
+    for info in infos:
+        if inner_iterations is None:
+            size = int(test_sizes.get(info.name, 1))
+        elif inner_iterations == "default":
+            size = info.default_size()
+        else:
+            size = int(inner_iterations)
+        results.append((info.name, count_operations(info, size)))
+    print_table(results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
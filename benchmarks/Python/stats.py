@@ -0,0 +1,174 @@
+# Copyright (c) 2024 see AUTHORS.md file
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the 'Software'), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED 'AS IS', WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import math
+from random import Random
+
+# The functions follow the defaults of R, which is used for the reports:
+# percentiles interpolate linearly between the closest ranks (quantile type 7),
+# and the trimmed mean drops floor(n * trim) values at each end.
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    pos = (len(ordered) - 1) * pct / 100
+    lower = math.floor(pos)
+    upper = math.ceil(pos)
+    if ordered[lower] == ordered[upper]:
+        # also avoids inf - inf for infinite values
+        return ordered[lower]
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (pos - lower)
+
+
+def median(values):
+    return percentile(values, 50)
+
+
+def mean(values):
+    return sum(values) / len(values)
+
+
+def trimmed_mean(values, trim=0.1):
+    ordered = sorted(values)
+    num_trimmed = math.floor(len(ordered) * trim)
+    if num_trimmed > 0:
+        ordered = ordered[num_trimmed:-num_trimmed]
+    return mean(ordered)
+
+
+def stddev(values):
+    if len(values) < 2:
+        return 0.0
+    avg = mean(values)
+    return math.sqrt(sum((v - avg) ** 2 for v in values) / (len(values) - 1))
+
+
+# half-width of the 95% confidence interval of the mean, relative to the
+# mean, with the normal approximation
+# Relative to the mean, and infinite for a zero mean, e.g., of run times
+# below the clock resolution
+def relative_ci_half_width(values):
+    avg = mean(values)
+    if avg == 0:
+        return float("inf")
+    return 1.96 * stddev(values) / math.sqrt(len(values)) / avg
+
+
+def bootstrap_ci(
+    values, statistic=median, confidence=0.95, num_resamples=1000, seed=42
+):
+    random = Random(seed)
+    size = len(values)
+    estimates = sorted(
+        statistic([values[random.randrange(size)] for _ in range(size)])
+        for _ in range(num_resamples)
+    )
+    alpha = (1 - confidence) / 2 * 100
+    return percentile(estimates, alpha), percentile(estimates, 100 - alpha)
+
+
+# new / old, which is infinite if only old is 0, and undefined (nan) if
+# both are, e.g., for run times below the resolution of a text log
+def ratio(new, old):
+    if old == 0:
+        return math.inf if new > 0 else math.nan
+    return new / old
+
+
+# resamples with an undefined ratio are left out
+def bootstrap_ratio_ci(
+    old, new, *, statistic=median, confidence=0.95, num_resamples=1000, seed=42
+):
+    random = Random(seed)
+    estimates = [
+        ratio(
+            statistic([new[random.randrange(len(new))] for _ in new]),
+            statistic([old[random.randrange(len(old))] for _ in old]),
+        )
+        for _ in range(num_resamples)
+    ]
+    estimates = sorted(estimate for estimate in estimates if not math.isnan(estimate))
+    if not estimates:
+        return math.nan, math.nan
+    alpha = (1 - confidence) / 2 * 100
+    return percentile(estimates, alpha), percentile(estimates, 100 - alpha)
+
+
+def _ranks(values):
+    order = sorted(range(len(values)), key=lambda i: values[i])
+    ranks = [0.0] * len(values)
+    tie_groups = []
+    start = 0
+    while start < len(order):
+        end = start
+        while end + 1 < len(order) and values[order[end + 1]] == values[order[start]]:
+            end += 1
+        for i in range(start, end + 1):
+            ranks[order[i]] = (start + end) / 2 + 1
+        tie_groups.append(end - start + 1)
+        start = end + 1
+    return ranks, tie_groups
+
+
+# Two-sided Mann-Whitney U test with the normal approximation, corrected for
+# ties and continuity, as R's wilcox.test(exact=FALSE). Returns U of the new
+# values, the p-value, and Cliff's delta as effect size, which is positive
+# if the new values tend to be larger.
+def mann_whitney_u(old, new):
+    n_old = len(old)
+    n_new = len(new)
+    ranks, tie_groups = _ranks(list(old) + list(new))
+    u_new = sum(ranks[n_old:]) - n_new * (n_new + 1) / 2
+    delta = 2 * u_new / (n_old * n_new) - 1
+
+    size = n_old + n_new
+    ties = sum(t**3 - t for t in tie_groups)
+    variance = n_old * n_new / 12 * ((size + 1) - ties / (size * (size - 1)))
+    if variance == 0:
+        return u_new, 1.0, delta
+    diff = u_new - n_old * n_new / 2
+    z_score = (abs(diff) - 0.5) / math.sqrt(variance)
+    p_value = min(math.erfc(max(z_score, 0) / math.sqrt(2)), 1.0)
+    return u_new, p_value, delta
+
+
+# Tukey's fences: values more than 1.5 interquartile ranges below the first
+# or above the third quartile are outliers. Returns their indexes.
+def outliers(values, fence=1.5):
+    first = percentile(values, 25)
+    third = percentile(values, 75)
+    low = first - fence * (third - first)
+    high = third + fence * (third - first)
+    return [i for i, v in enumerate(values) if v < low or v > high]
+
+
+def summarize(values):
+    ci_low, ci_high = bootstrap_ci(values)
+    return {
+        "mean": mean(values),
+        "median": median(values),
+        "trimmed_mean": trimmed_mean(values),
+        "stddev": stddev(values),
+        "p50": percentile(values, 50),
+        "p90": percentile(values, 90),
+        "p99": percentile(values, 99),
+        "ci95_low": ci_low,
+        "ci95_high": ci_high,
+        "outliers": outliers(values),
+    }
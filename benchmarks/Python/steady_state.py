@@ -0,0 +1,50 @@
+# Copyright (c) 2024 see AUTHORS.md file
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the 'Software'), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED 'AS IS', WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+from stats import median, percentile
+
+
+# Compares the last two windows of iteration times. Warmup is considered
+# over when their medians differ by at most `tolerance`, and the spread
+# within the latest window, i.e., its interquartile range relative to the
+# median, is within `tolerance`, too.
+class SteadyStateDetector:
+    def __init__(self, window=10, tolerance=0.05):
+        self._window = window
+        self._tolerance = tolerance
+        self._run_times = []
+
+    def is_steady(self, run_time):
+        self._run_times.append(run_time)
+        if len(self._run_times) < 2 * self._window:
+            return False
+
+        latest = self._run_times[-self._window :]
+        previous = self._run_times[-2 * self._window : -self._window]
+
+        latest_median = median(latest)
+        if latest_median == 0:
+            return False
+
+        shift = abs(latest_median - median(previous)) / latest_median
+        if shift > self._tolerance:
+            return False
+
+        spread = percentile(latest, 75) - percentile(latest, 25)
+        return spread / latest_median <= self._tolerance
@@ -0,0 +1,392 @@
+# Copyright (c) 2024 see AUTHORS.md file
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the 'Software'), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED 'AS IS', WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import platform
+import sqlite3
+import sys
+from datetime import datetime, timezone
+
+from compare import compare, print_comparisons
+from reporter import read_records
+from stats import median
+
+_STORE_OPTIONS = (
+    "db",
+    "executor",
+    "version",
+    "commit",
+    "host",
+    "threshold",
+    "alpha",
+)
+
+DEFAULT_DB = "results.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS invocation (
+    id INTEGER PRIMARY KEY,
+    executor TEXT NOT NULL,
+    version TEXT,
+    commit_id TEXT,
+    host TEXT,
+    benchmark TEXT NOT NULL,
+    size TEXT,
+    recorded_at TEXT NOT NULL,
+    source TEXT
+);
+CREATE TABLE IF NOT EXISTS iteration (
+    invocation_id INTEGER NOT NULL REFERENCES invocation(id),
+    iteration INTEGER NOT NULL,
+    run_time_ns INTEGER NOT NULL,
+    phase TEXT,
+    PRIMARY KEY (invocation_id, iteration)
+);
+CREATE INDEX IF NOT EXISTS invocation_timeline
+    ON invocation (benchmark, executor, recorded_at);
+CREATE INDEX IF NOT EXISTS invocation_commit
+    ON invocation (executor, commit_id, benchmark);
+"""
+
+_UNIT_NS = {"ns": 1, "us": 1_000, "ms": 1_000_000, "s": 1_000_000_000}
+
+
+# An invocation is one execution of a benchmark, i.e., one process in the
+# harness, with the run times of its iterations in nanoseconds.
+class Invocation:
+    def __init__(self, benchmark, size, metadata, recorded_at=None):
+        self.benchmark = benchmark
+        self.size = size
+        self.metadata = metadata
+        self.recorded_at = recorded_at
+        self.iterations = []
+
+    def add_iteration(self, run_time_ns, phase=None):
+        self.iterations.append((len(self.iterations) + 1, run_time_ns, phase))
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+# Records of --json-lines. A benchmark's first iteration starts a new
+# invocation, which also separates the benchmarks of an interleaved batch.
+def parse_json_lines(path, metadata):
+    invocations = []
+    current = {}
+    for record in read_records(path):
+        if record.get("type") != "iteration":
+            continue
+        name = record["benchmark"]
+        if record["iteration"] == 1 or name not in current:
+            record_metadata = dict(metadata)
+            record_metadata.setdefault("executor", record.get("implementation"))
+            record_metadata.setdefault("version", record.get("version"))
+            record_metadata.setdefault("host", record.get("host"))
+            current[name] = Invocation(
+                name, str(record.get("inner_iterations")), record_metadata
+            )
+            invocations.append(current[name])
+        current[name].add_iteration(record["run_time_ns"], record.get("phase"))
+    return invocations
+
+
+# Text output of the harness, in which each invocation starts with
+# "Starting <name> benchmark ...". The problem size is not part of it.
+def parse_text_output(path, metadata):
+    metadata = dict(metadata)
+    metadata.setdefault("host", platform.node())
+    invocations = []
+    current = {}
+    with open(path, encoding="utf-8") as stream:
+        for line in stream:
+            line = line.strip()
+            if line.startswith("Starting ") and line.endswith(" benchmark ..."):
+                name = line[len("Starting ") : -len(" benchmark ...")]
+                current[name] = Invocation(name, None, metadata)
+                invocations.append(current[name])
+                continue
+            name, _, rest = line.partition(": iterations=1 runtime: ")
+            if rest.endswith("us") and rest[:-2].isdigit():
+                if name not in current:
+                    current[name] = Invocation(name, None, metadata)
+                    invocations.append(current[name])
+                current[name].add_iteration(int(rest[:-2]) * 1000)
+    return invocations
+
+
+# With the tag and run_id columns, machine is the second to last column.
+def _machine_column(fields):
+    if len(fields) > 12:
+        return fields[11]
+    if len(fields) > 10:
+        return fields[10]
+    return None
+
+
+# ReBench's data file, one tab-separated measurement per line:
+#   [timestamp] invocation iteration value unit criterion benchmark executor
+#   suite extra_args cores input_size var_value tag machine run_id
+# where the timestamp and the columns after extra_args are optional. Older
+# versions omit invocation and iteration, and all of a run's measurements
+# are then taken as one invocation, and omit tag and run_id.
+# Only the "total" criterion is the run time of an iteration. For the
+# benchmarks of this repository, extra_args is the problem size.
+def parse_rebench_data(path, metadata):
+    invocations = {}
+    with open(path, encoding="utf-8") as stream:
+        for line in stream:
+            if not line.strip() or line.startswith("#"):
+                continue
+            fields = line.rstrip("\n").split("\t")
+            recorded_at = None
+            if fields[0].startswith("["):
+                recorded_at = fields.pop(0).strip("[]")
+            if fields[0].isdigit() and fields[1].isdigit():
+                invocation = int(fields[0])
+                fields = fields[2:]
+            else:
+                invocation = 1
+
+            value, unit, criterion, benchmark, executor = fields[:5]
+            extra_args = fields[6] if len(fields) > 6 else ""
+            if criterion != "total" or unit not in _UNIT_NS:
+                continue
+
+            key = (benchmark, executor, fields[5], extra_args, invocation)
+            if key not in invocations:
+                run_metadata = dict(metadata)
+                run_metadata.setdefault("executor", executor)
+                machine = _machine_column(fields)
+                if machine:
+                    run_metadata.setdefault("host", machine)
+                invocations[key] = Invocation(
+                    benchmark, extra_args, run_metadata, recorded_at
+                )
+            invocations[key].add_iteration(round(float(value) * _UNIT_NS[unit]))
+    return list(invocations.values())
+
+
+def parse_results(path, metadata):
+    with open(path, encoding="utf-8") as stream:
+        first_line = stream.readline()
+    if first_line.startswith("{"):
+        return parse_json_lines(path, metadata)
+    if "\t" in first_line or first_line.startswith("#"):
+        return parse_rebench_data(path, metadata)
+    return parse_text_output(path, metadata)
+
+
+class ResultStore:
+    def __init__(self, path=DEFAULT_DB):
+        self._connection = sqlite3.connect(path)
+        self._connection.executescript(_SCHEMA)
+
+    def close(self):
+        self._connection.close()
+
+    def ingest(self, invocations, source=None):
+        recorded_at = _now()
+        with self._connection:
+            for invocation in invocations:
+                metadata = invocation.metadata
+                cursor = self._connection.execute(
+                    "INSERT INTO invocation (executor, version, commit_id, host, "
+                    "benchmark, size, recorded_at, source) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        metadata.get("executor") or "unknown",
+                        metadata.get("version"),
+                        metadata.get("commit"),
+                        metadata.get("host"),
+                        invocation.benchmark,
+                        invocation.size,
+                        invocation.recorded_at or recorded_at,
+                        source,
+                    ),
+                )
+                self._connection.executemany(
+                    "INSERT INTO iteration (invocation_id, iteration, run_time_ns, "
+                    "phase) VALUES (?, ?, ?, ?)",
+                    [
+                        (cursor.lastrowid, iteration, run_time, phase)
+                        for iteration, run_time, phase in invocation.iterations
+                    ],
+                )
+        return len(invocations)
+
+    # the median run time of each invocation, oldest first, without the
+    # warmup iterations of invocations in which a steady state was detected
+    def timeline(self, benchmark, executor):
+        rows = self._connection.execute(
+            "SELECT i.id, i.recorded_at, i.version, i.commit_id, i.host, i.size, "
+            "t.run_time_ns FROM invocation i JOIN iteration t "
+            "ON t.invocation_id = i.id "
+            "WHERE i.benchmark = ? AND i.executor = ? "
+            "AND (t.phase IS NULL OR t.phase != 'warmup') "
+            "ORDER BY i.recorded_at, i.id, t.iteration",
+            (benchmark, executor),
+        )
+        timeline = []
+        for row in rows:
+            if not timeline or timeline[-1][0] != row[0]:
+                timeline.append((row[0], row[1:6], []))
+            timeline[-1][2].append(row[6])
+        return [
+            details + (median(run_times), len(run_times))
+            for _, details, run_times in timeline
+        ]
+
+    def run_times(self, executor, commit):
+        rows = self._connection.execute(
+            "SELECT i.benchmark, t.run_time_ns FROM invocation i JOIN iteration t "
+            "ON t.invocation_id = i.id "
+            "WHERE i.executor = ? AND i.commit_id = ? "
+            "AND (t.phase IS NULL OR t.phase != 'warmup') "
+            "ORDER BY i.id, t.iteration",
+            (executor, commit),
+        )
+        run_times = {}
+        for benchmark, run_time in rows:
+            run_times.setdefault(benchmark, []).append(run_time)
+        return run_times
+
+    def latest_commit(self, executor):
+        row = self._connection.execute(
+            "SELECT commit_id FROM invocation "
+            "WHERE executor = ? AND commit_id IS NOT NULL "
+            "ORDER BY recorded_at DESC, id DESC LIMIT 1",
+            (executor,),
+        ).fetchone()
+        return row[0] if row else None
+
+    # compares the run times of the latest, or the given, commit of an
+    # executor with the ones of the baseline commit
+    def latest_vs_baseline(self, executor, baseline, latest=None):
+        if latest is None:
+            latest = self.latest_commit(executor)
+        return compare(
+            self.run_times(executor, baseline), self.run_times(executor, latest)
+        )
+
+
+def print_timeline(timeline):
+    print(
+        "Recorded".ljust(26)
+        + "Version".ljust(10)
+        + "Commit".ljust(14)
+        + "Size".rjust(8)
+        + "Median".rjust(12)
+        + "Iterations".rjust(12)
+    )
+    for recorded_at, version, commit, _, size, median_ns, iterations in timeline:
+        print(
+            recorded_at.ljust(26)
+            + (version or "").ljust(10)
+            + (commit or "")[:12].ljust(14)
+            + (size or "").rjust(8)
+            + (str(round(median_ns / 1000)) + "us").rjust(12)
+            + str(iterations).rjust(12)
+        )
+
+
+def print_usage():
+    print("./store.py [options] ingest file...")
+    print("./store.py [options] timeline benchmark executor")
+    print("./store.py [options] compare executor baseline-commit [commit]")
+    print()
+    print("Keeps the results of all invocations in an SQLite database.")
+    print()
+    print("  ingest   - add the results of harness.py, --json-lines records,")
+    print("             or ReBench data files")
+    print("  timeline - list the median run time of each invocation of a")
+    print("             benchmark on an executor over time")
+    print("  compare  - compare the latest, or the given, commit with the")
+    print("             baseline commit as compare.py does")
+    print()
+    print("Options:")
+    print("  --db=file       - database, default: " + DEFAULT_DB)
+    print("  --executor=name - executor of ingested results, default: the")
+    print("                    implementation in JSON records or the executor")
+    print("                    of ReBench data")
+    print("  --version=v     - interpreter version of ingested results")
+    print("  --commit=id     - commit of ingested results")
+    print("  --host=name     - host of ingested results, default: this host")
+    print("                    for text output")
+    print("  --threshold=pct - see compare.py, default: 5")
+    print("  --alpha=p       - see compare.py, default: 0.05")
+
+
+def main(args):
+    options = {}
+    positional = []
+    for arg in args[1:]:
+        if arg in ("-h", "--help"):
+            print_usage()
+            return 0
+        name, _, value = arg[2:].partition("=")
+        if arg.startswith("--") and name in _STORE_OPTIONS:
+            options[name] = value
+        elif arg.startswith("--"):
+            print("Unknown option: " + arg)
+            print_usage()
+            return 1
+        else:
+            positional.append(arg)
+
+    command = positional[0] if positional else None
+    arguments = positional[1:]
+    if (
+        (command == "ingest" and not arguments)
+        or (command == "timeline" and len(arguments) != 2)
+        or (command == "compare" and len(arguments) not in (2, 3))
+        or command not in ("ingest", "timeline", "compare")
+    ):
+        print_usage()
+        return 1
+
+    store = ResultStore(options.get("db", DEFAULT_DB))
+    try:
+        if command == "ingest":
+            metadata = {
+                key: options[key]
+                for key in ("executor", "version", "commit", "host")
+                if key in options
+            }
+            for path in arguments:
+                invocations = parse_results(path, metadata)
+                store.ingest(invocations, path)
+                print(path + ": " + str(len(invocations)) + " invocations")
+        elif command == "timeline":
+            print_timeline(store.timeline(arguments[0], arguments[1]))
+        else:
+            threshold = float(options.get("threshold", 5)) / 100
+            alpha = float(options.get("alpha", 0.05))
+            comparisons = store.latest_vs_baseline(
+                arguments[0], arguments[1], arguments[2] if arguments[2:] else None
+            )
+            print_comparisons(comparisons, alpha, threshold)
+            if any(c.is_regression(alpha, threshold) for c in comparisons):
+                return 1
+    finally:
+        store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))